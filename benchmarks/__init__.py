@@ -0,0 +1 @@
+"""Micro-benchmarks for the library concierge; run with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,90 @@
+"""Issue 100k family cards from several processes and check for duplicates.
+
+Every process runs a pool of threads calling ``issue_card_action`` against
+one shared SQLite database, so card numbers come from blocks leased off the
+same counter and every family is written in one transaction. The run is
+repeated with ``block_size=1`` (one counter round trip per batch) for
+comparison.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+FAMILY = {
+    "patron": {"name": "Pat Reader"},
+    "household_members": [{"name": "Sam"}, {"name": "Alex"}, {"name": "Robin"}],
+}
+
+
+def _worker(db_path: str, families: int, threads: int, block_size: int) -> list[str]:
+    os.environ["LIBRARY_DB_PATH"] = db_path
+    from library_agent.tools import tools
+    from library_agent.tools.card_numbers import CardNumberAllocator, SQLiteBlockSource
+
+    tools.set_card_allocator(
+        CardNumberAllocator(SQLiteBlockSource(db_path), block_size=block_size)
+    )
+
+    def issue(_: int) -> list[str]:
+        response = tools.issue_card_action(FAMILY)
+        return [response.card_number] + [card.card_number for card in response.household_cards]
+
+    with ThreadPoolExecutor(threads) as pool:
+        numbers = [number for batch in pool.map(issue, range(families)) for number in batch]
+    tools.get_store().close()
+    return numbers
+
+
+def _run(db_path: Path, processes: int, threads: int, cards: int, block_size: int) -> None:
+    from library_agent.tools import storage
+    from library_agent.tools.card_numbers import is_valid_card_number
+
+    storage.LibraryStore(db_path).close()  # create the schema once
+    families = cards // (1 + len(FAMILY["household_members"])) // processes
+    context = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    with context.Pool(processes) as pool:
+        results = pool.starmap(
+            _worker, [(str(db_path), families, threads, block_size)] * processes
+        )
+    elapsed = time.perf_counter() - start
+    numbers = [number for batch in results for number in batch]
+    store = storage.LibraryStore(db_path)
+    stored = store.count(storage.CARDS)
+    store.close()
+    print(
+        f"block_size={block_size:>5}: {len(numbers):,} cards in {elapsed:.2f}s "
+        f"({len(numbers) / elapsed:,.0f}/s), distinct={len(set(numbers)):,}, "
+        f"stored={stored:,}, all check digits valid="
+        f"{all(is_valid_card_number(number) for number in numbers)}"
+    )
+    if len(set(numbers)) != len(numbers):
+        raise SystemExit("duplicate card numbers issued")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for block_size in (1000, 1):
+            _run(
+                Path(tmp) / f"cards-{block_size}.sqlite",
+                args.processes,
+                args.threads,
+                args.cards,
+                block_size,
+            )
+
+
+if __name__ == "__main__":
+    main()
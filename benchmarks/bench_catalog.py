@@ -0,0 +1,68 @@
+"""Build time and top-k latency of the catalog index on a synthetic catalog."""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from library_agent.tools.catalog import CatalogEntry, CatalogIndex
+
+GENRES = [f"genre {name}" for name in "abcdefghijklmnopqrstuvwxyz"] + [
+    "mystery",
+    "cozy mystery",
+    "fantasy",
+    "romance",
+    "science fiction",
+    "thriller",
+    "historical fiction",
+    "horror",
+]
+MOODS = ["cozy", "dark", "hopeful", "funny", "tense", "comforting", "epic"]
+
+
+def synthetic_catalog(size: int, seed: int = 11) -> list[CatalogEntry]:
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(5000)] + MOODS
+    subjects = [f"subject {i}" for i in range(800)]
+    return [
+        CatalogEntry(
+            title=f"Title {i}",
+            author=f"Author {i % 40000}",
+            genres=tuple(rng.sample(GENRES, 2)),
+            subjects=tuple(rng.sample(subjects, 2)),
+            blurb=" ".join(rng.choices(words, k=12)),
+        )
+        for i in range(size)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    entries = synthetic_catalog(args.titles)
+    start = time.perf_counter()
+    index = CatalogIndex.build(entries)
+    print(f"built {len(index)} titles in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(3)
+    timings = []
+    for _ in range(args.queries):
+        genres = rng.sample(GENRES, rng.randint(1, 2))
+        mood = rng.choice(MOODS)
+        reads = [f"Title {rng.randrange(args.titles)}" for _ in range(rng.randint(0, 3))]
+        start = time.perf_counter()
+        index.recommend(genres, mood, reads, k=5)
+        timings.append((time.perf_counter() - start) * 1e3)
+    timings.sort()
+    print(
+        f"top-5 latency ms: p50={statistics.median(timings):.2f} "
+        f"p95={timings[int(len(timings) * 0.95)]:.2f} max={timings[-1]:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Open time and per-seed query latency of the memory-mapped co-read index."""
+from __future__ import annotations
+
+import argparse
+import csv
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from library_agent.tools.co_read import CoReadIndex, build_index
+
+
+def write_history(path: Path, titles: int, patrons: int, seed: int = 5) -> None:
+    rng = random.Random(seed)
+    with path.open("w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["patron", "title"])
+        for patron in range(patrons):
+            shelf = rng.randrange(titles)
+            for _ in range(rng.randint(2, 20)):
+                title = (shelf + int(rng.expovariate(0.05))) % titles
+                writer.writerow([f"p{patron}", f"Title {title}"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument("--patrons", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = Path(tmp) / "history.csv"
+        index_path = Path(tmp) / "co_read.idx"
+        write_history(history, args.titles, args.patrons)
+        start = time.perf_counter()
+        count = build_index(history, index_path)
+        print(f"built {count} titles in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        index = CoReadIndex.open(index_path)
+        print(f"open: {(time.perf_counter() - start) * 1e3:.2f}ms")
+
+        rng = random.Random(1)
+        seeds = [f"Title {rng.randrange(args.titles)}" for _ in range(args.queries)]
+        start = time.perf_counter()
+        for seed in seeds:
+            index.neighbors(seed)
+        per_seed = (time.perf_counter() - start) / len(seeds) * 1e6
+        start = time.perf_counter()
+        for i in range(0, len(seeds) - 3, 3):
+            index.recommend(seeds[i : i + 3], k=5)
+        per_call = (time.perf_counter() - start) / (len(seeds) // 3) * 1e6
+        print(f"neighbors: {per_seed:.1f}us/seed, recommend(3 seeds): {per_call:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
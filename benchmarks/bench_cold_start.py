@@ -0,0 +1,52 @@
+"""Cold start of `library_agent.agent` with and without the prompt bundle.
+
+Each run is a fresh interpreter. ADK, LiteLLM and pydantic are imported
+first so the numbers cover only this package: importing the agent module,
+then rendering every instruction (`render_prompts`). Build the bundle first
+with ``python -m library_agent.build_prompt_bundle``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_CHILD = """
+import json, time
+import google.adk, google.adk.models.lite_llm, pydantic
+start = time.perf_counter()
+from library_agent import agent
+imported = time.perf_counter()
+agent.render_prompts()
+done = time.perf_counter()
+print(json.dumps({"import": imported - start, "render": done - imported, "total": done - start}))
+"""
+
+
+def _run(bundle: bool) -> dict[str, float]:
+    env = dict(os.environ, LIBRARY_PROMPT_BUNDLE="1" if bundle else "0")
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=15)
+    args = parser.parse_args()
+
+    for label, bundle in (("live rendering", False), ("prompt bundle", True)):
+        runs = [_run(bundle) for _ in range(args.runs)]
+        medians = {key: statistics.median(run[key] for run in runs) * 1e3 for key in runs[0]}
+        print(
+            f"{label:<15} import {medians['import']:6.1f}ms  "
+            f"render {medians['render']:5.2f}ms  total {medians['total']:6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
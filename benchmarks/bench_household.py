@@ -0,0 +1,69 @@
+"""Build, snapshot and reload a household index with millions of links.
+
+Generates households of one to six people keyed by card number, then times
+linking, ``save``, ``load`` and lookups on the reloaded index.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from library_agent.tools.household import HouseholdIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--links", type=int, default=2_000_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    links: list[tuple[str, str]] = []
+    serial = 0
+    while len(links) < args.links:
+        primary = f"CARD-{serial:014d}"
+        serial += 1
+        for _ in range(rng.randrange(0, 6)):
+            links.append((primary, f"CARD-{serial:014d}"))
+            serial += 1
+    links = links[: args.links]
+
+    start = time.perf_counter()
+    index = HouseholdIndex.from_links(links)
+    built = time.perf_counter() - start
+    print(f"linked {index.links:,} pairs over {len(index):,} cards in {built:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "households.bin"
+        start = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        restored = HouseholdIndex.load(path)
+        loaded = time.perf_counter() - start
+        print(
+            f"snapshot {path.stat().st_size / 1e6:.0f} MB: "
+            f"save {saved:.2f}s, load {loaded:.2f}s"
+        )
+
+    keys = [rng.choice(links)[1] for _ in range(args.lookups)]
+    start = time.perf_counter()
+    for key in keys:
+        restored.size(key)
+    sized = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in keys[: args.lookups // 10]:
+        restored.members(key)
+    listed = time.perf_counter() - start
+    print(
+        f"size(): {sized / len(keys) * 1e9:.0f}ns per lookup, "
+        f"members(): {listed / (len(keys) // 10) * 1e6:.1f}us per household"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Startup time and memory of ``import library_agent.agent``.
+
+Each run is a fresh interpreter started with ``python -X importtime``. The
+report gives the median cumulative import time of the package, the slowest
+package modules, the largest third-party imports, and peak RSS, for lazy
+subagents (the default) and for ``LIBRARY_EAGER_AGENTS=1``, which builds every
+subagent and renders every prompt at import.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+
+_CHILD = "import resource; from library_agent import agent; " \
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+# "import time: self [us] | cumulative | imported package"
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _run(eager: bool) -> tuple[dict[str, int], int]:
+    env = dict(os.environ, LIBRARY_EAGER_AGENTS="1" if eager else "0")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative, int(result.stdout.strip().splitlines()[-1])
+
+
+def _top_level(runs: list[dict[str, int]]) -> dict[str, float]:
+    names = set.intersection(*(set(run) for run in runs))
+    return {name: statistics.median(run[name] for run in runs) / 1e3 for name in names}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, eager in (("lazy subagents", False), ("eager subagents", True)):
+        results = [_run(eager) for _ in range(args.runs)]
+        times = _top_level([cumulative for cumulative, _ in results])
+        rss = statistics.median(rss for _, rss in results)
+        if sys.platform != "darwin":
+            rss *= 1024  # ru_maxrss is KiB on Linux, bytes on macOS
+        total = times["library_agent.agent"]
+        adk = times["google.adk"]
+        print(
+            f"{label}: library_agent.agent {total:6.1f}ms, of which google.adk {adk:6.1f}ms "
+            f"and the rest {total - adk:5.1f}ms  peak RSS {rss / 2**20:5.1f}MiB"
+        )
+        ours = sorted(
+            (name for name in times if name.startswith("library_agent.") and name != "library_agent.agent"),
+            key=times.get,
+            reverse=True,
+        )
+        for name in ours[: args.top]:
+            print(f"    {name:<40} {times[name]:6.1f}ms")
+        others = sorted(
+            (name for name in times if "." not in name and not name.startswith("library_agent")),
+            key=times.get,
+            reverse=True,
+        )
+        print("    heaviest dependencies: " + ", ".join(
+            f"{name} {times[name]:.0f}ms" for name in others[:3]
+        ))
+
+
+if __name__ == "__main__":
+    main()
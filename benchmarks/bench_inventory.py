@@ -0,0 +1,89 @@
+"""Memory footprint and hold throughput of the copy inventory.
+
+Loads a large synthetic collection, then has many threads place holds on a
+popular slice of it (so holds queues grow) while status lookups are timed.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+
+from library_agent.tools.inventory import Inventory
+
+FORMATS = ("hardcover", "paperback", "ebook", "audiobook")
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=40_000)
+    parser.add_argument("--branches", type=int, default=12)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--holds-per-session", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    branches = [f"Branch {n}" for n in range(args.branches)]
+    inventory = Inventory(branches)
+    copies = 0
+    began = time.perf_counter()
+    for n in range(args.titles):
+        for format in FORMATS:
+            for branch in rng.sample(branches, 4):
+                count = rng.randrange(1, 40)
+                inventory.add_copies(f"Title {n}", format, branch, count)
+                copies += count
+    load_seconds = time.perf_counter() - began
+    print(
+        f"{len(inventory):,} title/formats, {copies:,} copies across {args.branches} "
+        f"branches: {inventory.nbytes / 1e6:.1f} MB of counts, loaded in {load_seconds:.1f}s"
+    )
+
+    popular = [f"Title {n}" for n in range(200)]
+    placed = []
+
+    def session(worker: int) -> None:
+        local = random.Random(worker)
+        for n in range(args.holds_per_session):
+            hold_id = f"ORD-{worker}-{n}"
+            inventory.reserve(hold_id, local.choice(popular), local.choice(FORMATS))
+            placed.append(hold_id)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(args.sessions)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    lookups = []
+    while any(thread.is_alive() for thread in threads):
+        if placed:
+            hold_id = placed[rng.randrange(len(placed))]
+            start = time.perf_counter()
+            inventory.status(hold_id)
+            lookups.append(time.perf_counter() - start)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    statuses: dict[str, int] = {}
+    for hold_id in placed:
+        status = inventory.status(hold_id).status
+        statuses[status] = statuses.get(status, 0) + 1
+    print(
+        f"{args.sessions} sessions placed {len(placed):,} holds in {elapsed:.2f}s "
+        f"({len(placed) / elapsed:,.0f}/s): {statuses}"
+    )
+    print(
+        f"status lookups under load: p50 {_percentile(lookups, 0.5) * 1e9:.0f}ns "
+        f"p99 {_percentile(lookups, 0.99) * 1e9:.0f}ns ({len(lookups):,} samples)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Cost of `list_missing_fields_action` per service, and what it saves in prompt.
+
+Times the tool on an empty section (everything missing) and on a half-filled
+one for every question-bank tool key, and compares the size of its JSON
+answer with the collection checklist an agent would otherwise reread.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from types import SimpleNamespace
+
+from google.adk.sessions.state import State
+
+from library_agent.tools import tools
+from library_agent.tools.question_bank import format_question_collection
+
+HALF_FILLED = {
+    "recommendation": {},
+    "book_order": {
+        "patron": {"name": "Eve Rider"},
+        "title": "Fourth Wing",
+        "format": "paperback",
+        "shipping_address": {"street_line1": "1 Library Way", "city": "Stack City"},
+    },
+    "card_request": {},
+    "household_request": {"primary_card_number": "CARD-7788"},
+    "event_request": {"patron": {"name": "Sam Lee"}},
+}
+
+
+def _time(section: str, ctx: SimpleNamespace, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        tools.list_missing_fields_action(section, ctx)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'tool key':<24}{'empty us':>10}{'partial us':>12}{'checklist':>11}{'answer':>8}")
+    for tool_key, section in tools.TOOL_SECTIONS.items():
+        empty = SimpleNamespace(state=State(value={}, delta={}))
+        # Stored directly: a half-filled section would not pass model validation.
+        partial = SimpleNamespace(
+            state=State(value={tools.LIBRARY_STATE_KEY: {section: HALF_FILLED[section]}}, delta={})
+        )
+        empty_us = _time(section, empty, args.calls)
+        partial_us = _time(section, partial, args.calls)
+        checklist = len(format_question_collection(tool_key))
+        answer = len(tools.list_missing_fields_action(section, partial).model_dump_json())
+        print(
+            f"{tool_key:<24}{empty_us:>10.1f}{partial_us:>12.1f}"
+            f"{checklist:>10}c{answer:>7}c"
+        )
+
+
+if __name__ == "__main__":
+    main()
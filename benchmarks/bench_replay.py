@@ -0,0 +1,77 @@
+"""Offline agent-tree benchmark from a recorded cassette.
+
+Records one run of a load-test scenario, then replays the same sessions
+from the cassette and reports turn latency. The recording comes from the
+scripted model (``--latency`` stands in for network time), or from the
+configured real model with ``--record-live``. Replay makes no model calls,
+so what remains is framework, tool and cassette time, and two commits can
+be compared turn for turn. Requests that miss the cassette are listed, which
+is how a prompt change shows up.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+
+from benchmarks.load_test import SCENARIOS, percentile, run_load
+from library_agent.agent import create_root_agent
+from library_agent.agent_registry import ModelPool, _default_client, set_model_pool
+from library_agent.cassette import (
+    Cassette,
+    CassetteLlm,
+    CassetteMissError,
+    missing_report,
+)
+from library_agent.scripted_llm import Latency, ScriptedLlm
+
+
+def _run(pool: ModelPool, opening: str, sessions: int, turns: int):
+    set_model_pool(pool)
+    return asyncio.run(
+        run_load(create_root_agent(), opening, sessions=sessions, concurrency=1, turns=turns)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="order")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--latency", default="0.02")
+    parser.add_argument("--cassette", type=Path, default=None, help="reuse or keep this file")
+    parser.add_argument("--record-live", action="store_true")
+    args = parser.parse_args()
+
+    opening, script = SCENARIOS[args.scenario]
+    path = args.cassette or Path(tempfile.mkdtemp()) / f"{args.scenario}.cas"
+    cassette = Cassette(path)
+    if not path.exists():
+        scripted = ScriptedLlm(script=script, latency=Latency.parse(args.latency))
+        source = _default_client if args.record_live else (lambda _name: scripted)
+        recorder = ModelPool(
+            lambda name: CassetteLlm(
+                model=name, mode="record", inner=source(name), cassette=cassette
+            )
+        )
+        samples, _ = _run(recorder, opening, args.sessions, args.turns)
+        print(_line("recorded", [sample.seconds for sample in samples]))
+
+    replayer = ModelPool(lambda name: CassetteLlm(model=name, mode="replay", cassette=cassette))
+    try:
+        samples, elapsed = _run(replayer, opening, args.sessions, args.turns)
+    except CassetteMissError:
+        print(missing_report(replayer.clients()))
+        raise SystemExit(1)
+    print(_line("replayed", [sample.seconds for sample in samples]))
+    print(f"{len(cassette)} recordings in {path}, {len(samples) / elapsed:.0f} turns/s replayed")
+
+
+def _line(label: str, values: list[float]) -> str:
+    p50, p95, p99 = (percentile(values, q) * 1e3 for q in (50, 95, 99))
+    return f"{label:<9} turn p50 {p50:7.2f}ms  p95 {p95:7.2f}ms  p99 {p99:7.2f}ms"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Turn latency and model calls with and without the response cache.
+
+Every session opens with the same question, which the root agent routes
+to card services. The card agent then asks for the patron's name, and a
+closing turn is answered as well. None of these replies has side effects,
+so with the cache only the first session reaches the scripted model, and
+the rest are served from memory. Concurrent sessions that ask before the
+first answer is stored still miss.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from benchmarks.load_test import percentile, run_load
+from library_agent.agent import create_root_agent
+from library_agent.agent_registry import ModelPool, set_model_pool
+from library_agent.response_cache import CachingLlm
+from library_agent.scripted_llm import Latency, ScriptedLlm, Step, transfer
+from library_agent.tools.dedup import DedupCache
+
+OPENING = "Hi, I'd like to get a library card."
+SCRIPT = {
+    "library_root_agent": [transfer("card_services_agent")],
+    "card_services_agent": [Step(text="Happy to help. What name should go on the card?")],
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--latency", default="lognormal:0.05,0.5")
+    args = parser.parse_args()
+
+    for cached in (False, True):
+        llm = ScriptedLlm(script=SCRIPT, latency=Latency.parse(args.latency), seed=7)
+        client = CachingLlm(inner=llm, cache=DedupCache(name="responses")) if cached else llm
+        set_model_pool(ModelPool(lambda _name: client))
+        samples, elapsed = asyncio.run(
+            run_load(
+                create_root_agent(),
+                OPENING,
+                sessions=args.sessions,
+                concurrency=args.concurrency,
+                turns=args.turns,
+            )
+        )
+        seconds = [sample.seconds for sample in samples]
+        p50, p95 = (percentile(seconds, q) * 1e3 for q in (50, 95))
+        line = (
+            f"{'cache' if cached else 'no cache':<9} p50 {p50:8.2f}ms  p95 {p95:8.2f}ms  "
+            f"{len(samples) / elapsed:7.1f} turns/s  model calls {llm.calls}"
+        )
+        if cached:
+            stats = client.stats
+            line += f"  hits {stats.hits} misses {stats.misses} ({stats.hit_rate:.0%})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
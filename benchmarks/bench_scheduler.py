@@ -0,0 +1,80 @@
+"""Booking-decision latency for a year of branch events across many rooms.
+
+Requests arrive in random order over a year of 9:00-21:00 hourly slots with
+mixed durations and party sizes, so most rooms fill up and a share of the
+requests end on the waitlist. A slice of the bookings is then cancelled to
+time waitlist promotion.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from library_agent.tools.scheduler import EventScheduler, Room
+
+YEAR_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=150_000)
+    parser.add_argument("--cancels", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    capacities = (8, 12, 20, 30, 50, 80, 120)
+    scheduler = EventScheduler(
+        (Room(f"Room {n}", rng.choice(capacities)) for n in range(args.rooms)),
+        clock=YEAR_START.timestamp,
+    )
+    requests = [
+        (
+            f"EVT-{n}",
+            YEAR_START + timedelta(days=rng.randrange(365), hours=9 + rng.randrange(12)),
+            rng.choice((1, 4, 10, 16, 25, 40, 70, 100)),
+            timedelta(minutes=rng.choice((45, 60, 90, 120))),
+        )
+        for n in range(args.requests)
+    ]
+
+    book_times = []
+    statuses = {"scheduled": 0, "waitlisted": 0, "over_capacity": 0, "past": 0}
+    for request_id, start, attendees, duration in requests:
+        began = time.perf_counter()
+        booking = scheduler.book(request_id, start, attendees=attendees, duration=duration)
+        book_times.append(time.perf_counter() - began)
+        statuses[booking.status] += 1
+
+    scheduled = [
+        request_id
+        for request_id, *_ in requests
+        if scheduler.status(request_id).status == "scheduled"
+    ]
+    cancel_times = []
+    promoted = 0
+    for request_id in rng.sample(scheduled, min(args.cancels, len(scheduled))):
+        began = time.perf_counter()
+        promoted += len(scheduler.cancel(request_id))
+        cancel_times.append(time.perf_counter() - began)
+
+    print(f"rooms={args.rooms} requests={args.requests:,} {statuses}")
+    for label, samples in (("book", book_times), ("cancel+promote", cancel_times)):
+        print(
+            f"{label:>15}: p50 {_percentile(samples, 0.5) * 1e6:7.1f}us"
+            f"  p99 {_percentile(samples, 0.99) * 1e6:7.1f}us"
+            f"  max {max(samples) * 1e6:8.1f}us"
+        )
+    print(f"promoted {promoted:,} waitlisted requests; {scheduler.waitlist_length():,} still waiting")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Bytes per session and encode/decode time for each state codec."""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Any
+
+from library_agent.tools.state_codec import codec_from_name, encoded_size
+
+from benchmarks.bench_state_updates import SECTIONS
+
+
+def _sessions(count: int, seed: int = 7) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    sessions = []
+    for index in range(count):
+        filled = rng.randint(1, len(SECTIONS))
+        state = {name: value for name, value in rng.sample(SECTIONS, filled)}
+        state["last_confirmation_note"] = f"Patron {index} approved the plan."
+        sessions.append(state)
+    return sessions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(
+        f"{'sessions':>9} {'codec':>13} {'bytes/session':>14} "
+        f"{'encode ms':>10} {'decode ms':>10}"
+    )
+    for count in args.sessions:
+        states = _sessions(count)
+        for name in ("plain", "compact", "compact+zlib"):
+            codec = codec_from_name(name)
+            start = time.perf_counter()
+            encoded = [codec.encode(state) for state in states]
+            encode_ms = (time.perf_counter() - start) * 1e3
+            start = time.perf_counter()
+            for value in encoded:
+                codec.decode(value)
+            decode_ms = (time.perf_counter() - start) * 1e3
+            size = sum(encoded_size(value) for value in encoded) / count
+            print(
+                f"{count:>9} {name:>13} {size:>14.0f} "
+                f"{encode_ms:>10.0f} {decode_ms:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
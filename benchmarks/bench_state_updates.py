@@ -0,0 +1,110 @@
+"""Per-call cost of `save_conversation_state_action` as the state fills up.
+
+Compares the delta path against the previous full-validation merge, updating
+a single postal code while one to five request sections are stored.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from google.adk.sessions.state import State
+
+from library_agent.tools import tools
+
+_ADDRESS = {
+    "street_line1": "1 Library Way",
+    "city": "Stack City",
+    "state_or_province": "CA",
+    "postal_code": "94016",
+}
+SECTIONS: list[tuple[str, dict[str, Any]]] = [
+    (
+        "book_order",
+        {
+            "patron": {"name": "Eve Rider", "contact_email": "eve@example.com"},
+            "title": "Fourth Wing",
+            "format": "hardcover",
+            "shipping_address": _ADDRESS,
+            "preferred_vendor": "Local Books",
+            "preferred_vendor_address": dict(_ADDRESS, street_line1="2 Vendor Rd"),
+        },
+    ),
+    (
+        "recommendation",
+        {
+            "patron": {"name": "Eve Rider"},
+            "favorite_genres": ["fantasy", "romance"],
+            "recent_reads": ["Iron Flame", "A Court of Thorns and Roses"],
+        },
+    ),
+    (
+        "card_request",
+        {
+            "patron": {"name": "Eve Rider"},
+            "household_members": [{"name": f"Member {i}"} for i in range(4)],
+        },
+    ),
+    (
+        "household_request",
+        {"primary_card_number": "CARD-1", "new_member": {"name": "Toby Rider"}},
+    ),
+    (
+        "event_request",
+        {"patron": {"name": "Eve Rider"}, "event_type": "Book Club", "attendees": 12},
+    ),
+]
+
+
+def _legacy_save(update: dict[str, Any], tool_context) -> None:
+    """The pre-delta implementation: four full Pydantic passes per call."""
+
+    def merge(base_value, update_value):
+        if update_value is None:
+            return None
+        if isinstance(base_value, dict) and isinstance(update_value, dict):
+            merged = dict(base_value)
+            for key, value in update_value.items():
+                merged[key] = merge(merged.get(key), value)
+            return merged
+        return update_value
+
+    stored = tool_context.state.get(tools.LIBRARY_STATE_KEY, {}) or {}
+    current = tools.ConversationState.model_validate(stored)
+    payload = current.model_dump(exclude_none=False)
+    for field, value in update.items():
+        payload[field] = merge(payload.get(field), value)
+    merged_state = tools.ConversationState.model_validate(payload)
+    tool_context.state[tools.LIBRARY_STATE_KEY] = merged_state.model_dump(
+        exclude_none=True
+    )
+
+
+def _time_per_call(save: Callable, filled: int, iterations: int) -> float:
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    tools.save_conversation_state_action(dict(SECTIONS[:filled]), ctx)
+    postal_codes = [f"{94000 + i % 500:05d}" for i in range(iterations)]
+    start = time.perf_counter()
+    for code in postal_codes:
+        save({"book_order": {"shipping_address": {"postal_code": code}}}, ctx)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'sections':>8} {'legacy us/call':>15} {'delta us/call':>14}")
+    for filled in range(1, len(SECTIONS) + 1):
+        legacy = _time_per_call(_legacy_save, filled, args.iterations)
+        delta = _time_per_call(
+            tools.save_conversation_state_action, filled, args.iterations
+        )
+        print(f"{filled:>8} {legacy:>15.1f} {delta:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Insert throughput of the SQLite store at 1, 8 and 64 concurrent writers.
+
+Each configuration runs against a fresh WAL database, once with group commit
+and once with ``max_batch=1`` (one commit, and one fsync, per insert).
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from library_agent.tools import storage, tools
+
+REQUEST = tools.EventRequest(
+    patron=tools.PatronDetails(name="Jo Reader"), event_type="Book Club", attendees=12
+)
+
+
+def _run(path: Path, writers: int, per_writer: int, max_batch: int) -> tuple[float, int]:
+    store = storage.LibraryStore(path, max_batch=max_batch)
+
+    def write(worker: int) -> None:
+        for index in range(per_writer):
+            response = tools.EventResponse(
+                event_request_id=f"EVT-{worker}-{index}", status="received"
+            )
+            store.record(storage.EVENTS, REQUEST, response)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    commits = store.writer.commits
+    store.close()
+    return writers * per_writer / elapsed, commits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--inserts", type=int, default=3200, help="total per run")
+    args = parser.parse_args()
+
+    print(f"{'writers':>7} {'mode':>13} {'inserts/s':>10} {'commits':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for writers in (1, 8, 64):
+            per_writer = max(args.inserts // writers, 1)
+            for mode, max_batch in (("per-insert", 1), ("group-commit", 256)):
+                path = Path(tmp) / f"{writers}-{mode}.sqlite"
+                rate, commits = _run(path, writers, per_writer, max_batch)
+                print(f"{writers:>7} {mode:>13} {rate:>10,.0f} {commits:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Throughput of the agent tools through ADK's calling path, before and after.
+
+"before" wraps each action in a plain ``FunctionTool``: the declaration is
+rebuilt for every model request and arguments go through ADK's generic
+conversion. "after" is the tool the agents use (``ValidatedFunctionTool``).
+One call is what a model turn costs the tool: fetching its declaration, then
+``run_async`` with the dict arguments the model sent. Arguments differ per
+call so order de-duplication does not short-circuit the work. The second
+pair of columns times ``run_async`` alone.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from google.adk.sessions.state import State
+from google.adk.tools import FunctionTool
+
+from library_agent.tools import tools
+from library_agent.tools.household import HouseholdIndex
+
+ADDRESS = {
+    "street_line1": "1 Library Way",
+    "city": "Stack City",
+    "state_or_province": "CA",
+    "postal_code": "94016",
+    "country": "USA",
+}
+
+ARGS: dict[str, Callable[[int], dict[str, Any]]] = {
+    "recommend_books": lambda i: {
+        "request": {
+            "patron": {"name": f"Reader {i}"},
+            "favorite_genres": ["mystery"],
+            "recent_reads": ["The Guest List"],
+        }
+    },
+    "order_book": lambda i: {
+        "request": {
+            "patron": {"name": f"Reader {i}"},
+            "title": "Fourth Wing",
+            "format": "paperback",
+            "shipping_address": ADDRESS,
+            "preferred_vendor": "Local Books",
+            "preferred_vendor_address": ADDRESS,
+        }
+    },
+    "issue_library_card": lambda i: {
+        "request": {"patron": {"name": f"Reader {i}"}, "household_members": [{"name": "Kid"}]}
+    },
+    "add_household_member": lambda i: {
+        "request": {"primary_card_number": f"CARD-{i:06d}", "new_member": {"name": "Toby"}}
+    },
+    "request_library_event": lambda i: {
+        "request": {"patron": {"name": f"Reader {i}"}, "event_type": "Book Club"}
+    },
+    "save_conversation_state": lambda i: {
+        "update": {
+            "card_request": {"patron": {"name": f"Reader {i}", "contact_email": "r@example.org"}},
+            "recommendation": {"patron": {"name": f"Reader {i}"}, "mood": "cosy"},
+        }
+    },
+    "list_missing_fields": lambda i: {"section": "book_order"},
+}
+
+
+async def _calls_per_second(name: str, tool, calls: int, declaration: bool) -> float:
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    args = [ARGS[name](i) for i in range(calls)]
+    start = time.perf_counter()
+    for call_args in args:
+        if declaration:
+            tool._get_declaration()
+        await tool.run_async(args=call_args, tool_context=ctx)
+    return calls / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2_000)
+    args = parser.parse_args()
+
+    tools.set_household_index(HouseholdIndex())
+    print(f"{'':<26}{'with declaration':^30}{'run_async only':^30}")
+    print(f"{'tool':<26}" + f"{'before/s':>10}{'after/s':>10}{'speed-up':>10}" * 2)
+    for name in ARGS:
+        after = getattr(tools, name)
+        before = FunctionTool(after.func)
+        row = f"{name:<26}"
+        for declaration in (True, False):
+            slow, fast = (
+                asyncio.run(_calls_per_second(name, tool, args.calls, declaration))
+                for tool in (before, after)
+            )
+            row += f"{slow:>10.0f}{fast:>10.0f}{fast / slow:>9.1f}x"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Cost of tool instrumentation per call, disabled and enabled.
+
+With no metrics installed, the only cost is the check in
+``ValidatedFunctionTool.run_async`` before it hands back ADK's coroutine.
+That cost is measured by creating and closing the coroutine both ways.
+Awaiting it would bury a few hundred nanoseconds in scheduler noise. The
+enabled cost on a no-op tool covers the timers, histograms and payload
+sizing. The per-tool table repeats that comparison on the real tools, with
+the arguments from ``bench_tool_calls``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import time
+import timeit
+from types import SimpleNamespace
+
+from google.adk.sessions.state import State
+from google.adk.tools import FunctionTool
+
+from benchmarks.bench_tool_calls import ARGS
+from library_agent.tools import tools
+from library_agent.tools.household import HouseholdIndex
+from library_agent.tools.instrumentation import ToolMetrics, set_tool_metrics
+from library_agent.tools.validation import ValidatedFunctionTool
+
+
+def noop(count: int) -> int:
+    """Return ``count``."""
+    return count
+
+
+async def _per_call(call, args_list, ctx) -> float:
+    start = time.perf_counter()
+    for args in args_list:
+        await call(args=args, tool_context=ctx)
+    return (time.perf_counter() - start) / len(args_list)
+
+
+_passes = itertools.count()
+
+
+def _best(call, make_args, calls: int, repeats: int) -> float:
+    # Fresh arguments per pass, so order de-duplication never short-circuits a call.
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    best = float("inf")
+    for _ in range(repeats):
+        start = next(_passes) * calls
+        call_args = [make_args(i) for i in range(start, start + calls)]
+        best = min(best, asyncio.run(_per_call(call, call_args, ctx)))
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=50_000)
+    parser.add_argument("--tool-calls", type=int, default=1_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    tool = ValidatedFunctionTool(noop)
+    bare = FunctionTool.run_async.__get__(tool)
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    dispatch = {
+        label: min(
+            timeit.repeat(
+                lambda: call(args={"count": 1}, tool_context=ctx).close(),
+                number=args.calls,
+                repeat=args.repeats,
+            )
+        )
+        / args.calls
+        for label, call in (("adk", bare), ("disabled", tool.run_async))
+    }
+    base = _best(bare, lambda i: {"count": i}, args.calls, args.repeats)
+    set_tool_metrics(ToolMetrics())
+    enabled = _best(tool.run_async, lambda i: {"count": i}, args.calls, args.repeats)
+    print(
+        f"disabled: +{(dispatch['disabled'] - dispatch['adk']) * 1e9:.0f}ns/call; "
+        f"enabled on a no-op tool: {base * 1e6:.2f}us -> {enabled * 1e6:.2f}us/call"
+    )
+
+    tools.set_household_index(HouseholdIndex())
+    print(f"{'tool':<26}{'off us':>10}{'on us':>10}{'overhead':>10}")
+    for name in ARGS:
+        real = getattr(tools, name)
+        set_tool_metrics(None)
+        off = _best(real.run_async, ARGS[name], args.tool_calls, args.repeats)
+        set_tool_metrics(ToolMetrics())
+        on = _best(real.run_async, ARGS[name], args.tool_calls, args.repeats)
+        print(f"{name:<26}{off * 1e6:>10.1f}{on * 1e6:>10.1f}{(on - off) / off:>9.1%}")
+    set_tool_metrics(None)
+
+
+if __name__ == "__main__":
+    main()
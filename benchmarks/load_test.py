@@ -0,0 +1,214 @@
+"""Concurrent load test of ``root_agent`` on the scripted local model.
+
+Every session runs the full flow for one scenario on a fresh
+``create_root_agent()``, with a model pool that hands out the scripted
+model. The root saves the patron's details and transfers to the subagent. The subagent calls its
+action tool and confirms. A closing turn is then answered by the subagent.
+Sessions run concurrently through one ``InMemoryRunner``, and model calls
+sleep for a sampled latency. The report covers:
+
+- p50/p95/p99 turn latency
+- the same percentiles for framework overhead (turn time minus model time)
+- turn throughput
+- model calls per turn
+
+``--latency 0`` measures the framework alone.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from library_agent.agent import create_root_agent
+from library_agent.agent_registry import ModelPool, set_model_pool
+from library_agent.scripted_llm import Latency, ScriptedLlm, Step, model_time, transfer
+
+_NAME_RE = re.compile(r"I'm (Reader \d+)")
+ADDRESS = {
+    "street_line1": "1 Library Way",
+    "city": "Stack City",
+    "state_or_province": "CA",
+    "postal_code": "94016",
+    "country": "USA",
+}
+
+
+def _patron(llm_request: LlmRequest) -> dict[str, Any]:
+    for content in llm_request.contents:
+        for part in content.parts or ():
+            match = _NAME_RE.search(part.text or "")
+            if match:
+                return {"name": match.group(1), "contact_email": "reader@example.org"}
+    return {"name": "Reader"}
+
+
+def _scenario(
+    agent_name: str,
+    section: str,
+    tool: str,
+    request: Callable[[dict[str, Any]], dict[str, Any]],
+) -> dict[str, list[Step]]:
+    return {
+        "library_root_agent": [
+            Step(
+                tool="save_conversation_state_action",
+                args=lambda req: {"update": {section: request(_patron(req))}},
+            ),
+            transfer(agent_name),
+        ],
+        agent_name: [
+            Step(tool=tool, args=lambda req: {"request": request(_patron(req))}),
+            Step(text="All set. Your confirmation number is above."),
+        ],
+    }
+
+
+SCENARIOS: dict[str, tuple[str, dict[str, list[Step]]]] = {
+    "order": (
+        "Hi, I'm Reader {i}. Please order Fourth Wing in paperback for me.",
+        _scenario(
+            "book_order_agent",
+            "book_order",
+            "order_book_action",
+            lambda patron: {
+                "patron": patron,
+                "title": "Fourth Wing",
+                "format": "paperback",
+                "shipping_address": ADDRESS,
+                "preferred_vendor": "Local Books",
+                "preferred_vendor_address": ADDRESS,
+            },
+        ),
+    ),
+    "card": (
+        "Hi, I'm Reader {i} and I need a library card.",
+        _scenario(
+            "card_services_agent",
+            "card_request",
+            "issue_card_action",
+            lambda patron: {"patron": patron},
+        ),
+    ),
+    "event": (
+        "Hi, I'm Reader {i}. Can I book a room for our book club?",
+        _scenario(
+            "events_agent",
+            "event_request",
+            "request_event_action",
+            lambda patron: {"patron": patron, "event_type": "Book Club", "attendees": 12},
+        ),
+    ),
+}
+
+
+@dataclass(frozen=True)
+class TurnSample:
+    seconds: float
+    model_seconds: float
+    model_calls: int
+
+    @property
+    def overhead(self) -> float:
+        return self.seconds - self.model_seconds
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (``q`` in 0-100)."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+async def _run_turn(runner, user_id: str, session_id: str, text: str) -> TurnSample:
+    spent: list[float] = []
+    token = model_time.set(spent)
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    start = time.perf_counter()
+    try:
+        async for _ in runner.run_async(
+            user_id=user_id, session_id=session_id, new_message=message
+        ):
+            pass
+    finally:
+        model_time.reset(token)
+    return TurnSample(time.perf_counter() - start, sum(spent), len(spent))
+
+
+async def run_load(
+    agent, opening: str, *, sessions: int, concurrency: int, turns: int
+) -> tuple[list[TurnSample], float]:
+    """Drive ``sessions`` conversations, ``concurrency`` at a time."""
+    runner = InMemoryRunner(agent=agent, app_name="library_load_test")
+    gate = asyncio.Semaphore(concurrency)
+    samples: list[TurnSample] = []
+
+    async def conversation(index: int) -> None:
+        async with gate:
+            user_id = f"user-{index}"
+            session = await runner.session_service.create_session(
+                app_name="library_load_test", user_id=user_id
+            )
+            messages = [opening.format(i=index)] + ["Thanks, that's everything."] * (turns - 1)
+            for text in messages:
+                samples.append(await _run_turn(runner, user_id, session.id, text))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation(index) for index in range(sessions)))
+    return samples, time.perf_counter() - start
+
+
+def _summary(label: str, values: list[float]) -> str:
+    p50, p95, p99 = (percentile(values, q) * 1e3 for q in (50, 95, 99))
+    return f"{label:<10} p50 {p50:8.2f}ms  p95 {p95:8.2f}ms  p99 {p99:8.2f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="order")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:0.05,0.5",
+        help="seconds per model call: 0.2, uniform:lo,hi or lognormal:median,sigma",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    opening, script = SCENARIOS[args.scenario]
+    llm = ScriptedLlm(script=script, latency=Latency.parse(args.latency), seed=args.seed)
+    # Every agent, card services included, takes its client from the pool.
+    set_model_pool(ModelPool(lambda _name: llm))
+
+    samples, elapsed = asyncio.run(
+        run_load(
+            create_root_agent(),
+            opening,
+            sessions=args.sessions,
+            concurrency=args.concurrency,
+            turns=args.turns,
+        )
+    )
+    print(
+        f"{args.scenario}: {args.sessions} sessions x {args.turns} turns, "
+        f"concurrency {args.concurrency}, latency {args.latency}"
+    )
+    print(_summary("turn", [sample.seconds for sample in samples]))
+    print(_summary("overhead", [sample.overhead for sample in samples]))
+    print(
+        f"throughput {len(samples) / elapsed:8.1f} turns/s  "
+        f"model calls/turn {sum(s.model_calls for s in samples) / len(samples):.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Routing accuracy and LLM round trips saved by the local pre-router.
+
+Accuracy is measured leave-one-out: each labelled utterance (the eval
+openers in ``evals/library_actions.test.json`` and the examples in
+``config/routing_examples.json``) is routed by a router trained without it.
+"Coverage" is the share the router was confident enough to route; the rest
+fall back to the LLM. A set of unroutable messages (greetings, answers to
+follow-up questions, unsupported asks) checks that those fall back too.
+
+Saved latency is the skipped root-agent calls times ``--root-llm-ms``, the
+assumed duration of one root LLM round trip.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from library_agent.pre_router import EXAMPLES_PATH, IntentRouter, load_examples
+
+EVALS = Path(__file__).resolve().parents[1] / "evals" / "library_actions.test.json"
+UNROUTABLE = (
+    "hi",
+    "hello, is anyone there?",
+    "yes, that's correct",
+    "My name is Quinn Lee",
+    "quinn@example.com",
+    "What are your opening hours?",
+    "Where is the nearest branch?",
+    "Can I renew my books online?",
+    "thanks!",
+    "no, that's all",
+)
+
+
+def _eval_cases(path: Path) -> list[tuple[str, str]]:
+    cases = []
+    for case in json.loads(path.read_text())["eval_cases"]:
+        turn = case["conversation"][0]
+        text = " ".join(part["text"] for part in turn["user_content"]["parts"])
+        agents = [
+            author
+            for author, _ in turn["intermediate_data"]["intermediate_responses"]
+            if author != "library_root_agent"
+        ]
+        cases.append((text, agents[0]))
+    return cases
+
+
+def _leave_one_out(
+    labelled: list[tuple[str, str]], examples: list[tuple[str, str]], threshold: float
+) -> tuple[int, int]:
+    routed = correct = 0
+    for text, expected in labelled:
+        router = IntentRouter(
+            [example for example in examples if example[0] != text], threshold=threshold
+        )
+        decision = router.route(text)
+        if decision.agent_name is not None:
+            routed += 1
+            correct += decision.agent_name == expected
+    return routed, correct
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--evals", type=Path, default=EVALS)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--root-llm-ms", type=float, default=800.0)
+    args = parser.parse_args()
+
+    examples = load_examples()
+    with EXAMPLES_PATH.open() as fh:
+        labelled_examples = [
+            (text, agent) for agent, texts in json.load(fh).items() for text in texts
+        ]
+    evals = _eval_cases(args.evals)
+    print(f"threshold {args.threshold}")
+    for name, labelled in (("eval openers", evals), ("all examples", labelled_examples)):
+        routed, correct = _leave_one_out(labelled, examples, args.threshold)
+        print(
+            f"{name:>13}: {len(labelled)} utterances, routed {routed} "
+            f"({routed / len(labelled):.0%} coverage), {correct}/{routed} correct"
+        )
+
+    router = IntentRouter(examples, threshold=args.threshold)
+    false_routes = [text for text in UNROUTABLE if router.route(text).agent_name]
+    print(f"   unroutable: {len(false_routes)}/{len(UNROUTABLE)} wrongly routed {false_routes}")
+
+    texts = [text for text, _ in labelled_examples] + list(UNROUTABLE)
+    start = time.perf_counter()
+    rounds = 200
+    for _ in range(rounds):
+        for text in texts:
+            router.route(text)
+    per_route = (time.perf_counter() - start) / (rounds * len(texts))
+    skipped = sum(1 for text, _ in evals if router.route(text).agent_name)
+    print(
+        f"route(): {per_route * 1e6:.0f}us per message; eval openers skip {skipped} of "
+        f"{len(evals)} root LLM calls, about {skipped * args.root_llm_ms / 1000:.1f}s saved "
+        f"at {args.root_llm_ms:.0f}ms per call"
+    )
+
+
+if __name__ == "__main__":
+    main()
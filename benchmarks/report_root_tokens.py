@@ -0,0 +1,69 @@
+"""Root-instruction token counts, full vs. intent-scoped, over the eval set.
+
+For every user turn in ``evals/library_actions.test.json`` this counts the
+tokens of the root instruction the model would receive in each mode, using
+tiktoken's ``o200k_base`` encoding (the GPT-4.1 family). Offline, where that
+encoding cannot be downloaded, it falls back to LiteLLM's bundled tokenizer.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+from library_agent import agent
+from library_agent.routing import resolve_intents
+
+EVALS = Path(__file__).resolve().parents[1] / "evals" / "library_actions.test.json"
+
+
+def _counter():
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("o200k_base")
+    except Exception:  # not installed, or the encoding cannot be downloaded
+        os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+        import litellm
+
+        return (
+            lambda text: litellm.token_counter(model="gpt-4.1-mini", text=text),
+            "LiteLLM bundled tokenizer",
+        )
+    return lambda text: len(encoding.encode(text)), "o200k_base"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--evals", type=Path, default=EVALS)
+    args = parser.parse_args()
+
+    count, encoding = _counter()
+    full = count(agent.root_instruction())
+    cases = json.loads(args.evals.read_text())["eval_cases"]
+    rows = [("(greeting, no intent yet)", "-", count(agent.root_instruction_for(())))]
+    for case in cases:
+        state = case.get("session_input", {}).get("state", {})
+        texts: list[str] = []
+        for turn in case["conversation"]:
+            texts.append(" ".join(part["text"] for part in turn["user_content"]["parts"]))
+            intents = resolve_intents(state, texts)
+            rows.append(
+                (case["eval_id"], ",".join(intents) or "-", count(agent.root_instruction_for(intents)))
+            )
+
+    print(f"root instruction tokens ({encoding}); full mode is {full:,} on every turn")
+    print(f"{'conversation':<32} {'intent':<18} {'scoped':>7} {'saved':>7}")
+    for name, intents, scoped in rows:
+        print(f"{name:<32} {intents:<18} {scoped:>7,} {1 - scoped / full:>7.0%}")
+    turns = len(rows) - 1
+    scoped_total = sum(scoped for _, _, scoped in rows[1:])
+    print(
+        f"eval turns: {turns}, full {full * turns:,} tokens, scoped {scoped_total:,} "
+        f"({1 - scoped_total / (full * turns):.0%} fewer)"
+    )
+
+
+if __name__ == "__main__":
+    main()
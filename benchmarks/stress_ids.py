@@ -0,0 +1,67 @@
+"""Allocate millions of ids across threads and processes; check uniqueness."""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import threading
+import time
+
+from library_agent.tools import ids
+
+
+def _draw_threads(threads: int, per_thread: int) -> list[int]:
+    allocator = ids.get_allocator()
+    buckets: list[list[int]] = [[] for _ in range(threads)]
+
+    def draw(bucket: list[int]) -> None:
+        next_int = allocator.next_int
+        bucket.extend(next_int() for _ in range(per_thread))
+
+    workers = [threading.Thread(target=draw, args=(bucket,)) for bucket in buckets]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return [value for bucket in buckets for value in bucket]
+
+
+def _process_task(args: tuple[int, int]) -> list[int]:
+    return _draw_threads(*args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--per-thread", type=int, default=125_000)
+    args = parser.parse_args()
+
+    total = args.processes * args.threads * args.per_thread
+    ids.get_allocator()
+    context = multiprocessing.get_context("fork")
+    start = time.perf_counter()
+    with context.Pool(args.processes) as pool:
+        batches = pool.map(
+            _process_task, [(args.threads, args.per_thread)] * args.processes
+        )
+    elapsed = time.perf_counter() - start
+
+    drawn = [value for batch in batches for value in batch]
+    unique = len(set(drawn))
+    workers = {ids.split_id(value)[1] for value in drawn[:: args.per_thread]}
+    print(
+        f"{total:,} ids from {args.processes} processes x {args.threads} threads "
+        f"in {elapsed:.2f}s ({total / elapsed:,.0f} ids/s); "
+        f"unique={unique == total} workers={sorted(workers)}"
+    )
+
+    start = time.perf_counter()
+    single = _draw_threads(1, 1_000_000)
+    elapsed = time.perf_counter() - start
+    print(f"single thread: {len(single) / elapsed:,.0f} ids/s")
+    if unique != total or len(set(single)) != len(single):
+        raise SystemExit("duplicate ids detected")
+
+
+if __name__ == "__main__":
+    main()
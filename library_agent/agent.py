@@ -1,8 +1,13 @@
 import os
 
 from google.adk import Agent
-from google.adk.models.lite_llm import LiteLlm
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models.base_llm import BaseLlm
 
+from library_agent import prompt_bundle
+from library_agent.agent_registry import LazyAgent, get_model_pool, warm_up
+from library_agent.pre_router import make_slot_filler, pre_route
+from library_agent.routing import SERVICES, SERVICES_BY_KEY, resolve_intents
 from library_agent.subagents import (
     book_order,
     book_recommendation,
@@ -10,113 +15,69 @@ from library_agent.subagents import (
     household_link,
     programming,
 )
+from library_agent.tools.question_bank import get_registry
 from library_agent.tools.requirements_helper import format_requirement_section
 from library_agent.tools.tools import (
     ConversationStateUpdate,
     LIBRARY_STATE_KEY,
+    list_missing_fields,
     save_conversation_state,
 )
 
 
-default_model = LiteLlm(
-    model="gpt-4.1-mini",
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
-
+DEFAULT_MODEL = "gpt-4.1-mini"
 
-book_recommendation_collection = book_recommendation.COLLECTION_SECTION
-book_recommendation_root = book_recommendation.ROOT_REQUIREMENTS_SECTION
 
-book_order_collection = book_order.COLLECTION_SECTION
-book_order_root = book_order.ROOT_REQUIREMENTS_SECTION
+def root_requirement_sections() -> str:
+    return "\n".join(service.requirements() for service in SERVICES)
 
-card_request_collection = card_services.COLLECTION_SECTION
-card_request_root = card_services.ROOT_REQUIREMENTS_SECTION
 
-household_request_collection = household_link.COLLECTION_SECTION
-household_request_root = household_link.ROOT_REQUIREMENTS_SECTION
+def root_confirmation_sections() -> str:
+    return "\n".join(service.confirmation() for service in SERVICES)
 
-event_request_collection = programming.COLLECTION_SECTION
-event_request_root = programming.ROOT_REQUIREMENTS_SECTION
 
-root_requirement_sections = "\n".join(
-    [
-        book_recommendation_root,
-        book_order_root,
-        card_request_root,
-        household_request_root,
-        event_request_root,
-    ]
-)
+def state_overview(sections: tuple[str, ...] | None = None) -> str:
+    """The state-key field list; ``sections`` limits which sections expand."""
+    return get_registry().memo(
+        ("state_overview", sections),
+        lambda _bank: format_requirement_section(
+            ConversationStateUpdate,
+            heading=f"Session state key `{LIBRARY_STATE_KEY}` tracks:",
+            sections=sections,
+        ),
+    )
 
-book_recommendation_confirmation = book_recommendation.CONFIRMATION_SECTION
-book_order_confirmation = book_order.CONFIRMATION_SECTION
-card_request_confirmation = card_services.CONFIRMATION_SECTION
-household_request_confirmation = household_link.CONFIRMATION_SECTION
-event_request_confirmation = programming.CONFIRMATION_SECTION
-
-book_recommendation_confirmation_root = book_recommendation.ROOT_CONFIRMATION_SECTION
-book_order_confirmation_root = book_order.ROOT_CONFIRMATION_SECTION
-card_request_confirmation_root = card_services.ROOT_CONFIRMATION_SECTION
-household_request_confirmation_root = household_link.ROOT_CONFIRMATION_SECTION
-event_request_confirmation_root = programming.ROOT_CONFIRMATION_SECTION
-
-root_confirmation_sections = "\n".join(
-    [
-        book_recommendation_confirmation_root,
-        book_order_confirmation_root,
-        card_request_confirmation_root,
-        household_request_confirmation_root,
-        event_request_confirmation_root,
-    ]
-)
 
-state_overview = format_requirement_section(
-    ConversationStateUpdate,
-    heading=f"Session state key `{LIBRARY_STATE_KEY}` tracks:",
-)
 state_usage_guidance = (
     f"Use `save_conversation_state` whenever details change so `{LIBRARY_STATE_KEY}` "
     "stays synchronized for every agent."
 )
 state_reference_tip = (
     f"Consult `{LIBRARY_STATE_KEY}` before re-asking for data; only gather what "
-    "is missing or needs correction."
+    "is missing or needs correction; `list_missing_fields` returns the required "
+    "fields a section still lacks."
 )
 
 
-book_matching_agent = book_recommendation.create_agent(default_model)
-
-book_order_agent = book_order.create_agent(default_model)
-
-card_services_agent = card_services.create_agent(default_model)
-
-household_link_agent = household_link.create_agent(default_model)
-
-programming_agent = programming.create_agent(default_model)
-
-
-root_agent = Agent(
-    name="library_root_agent",
-    global_instruction="""
-You are the CityStack Public Library Concierge. Be warm, efficient, and privacy-aware while guiding patrons.
-Your responsibilities:
-- Diagnose each visitor's goal (book recommendations, ordering/holds, new cards, household additions, event/program requests).
-- Gather only the personal data needed for that service and state why it is required.
-- Decide whether to solve the request yourself or route to a specialized librarian sub-tools. Prefer routing once all required details are collected.
-""",
-    instruction=f"""
+def build_root_instruction(
+    requirement_sections: str,
+    confirmation_sections: str,
+    overview: str | None = None,
+) -> str:
+    if overview is None:
+        overview = state_overview()
+    return f"""
 Conversation workflow
 1. Welcome patrons as the CityStack Library concierge and restate that you will connect them to the right librarian specialist.
 2. Clarify their objective. If vague, ask short follow-ups to determine whether they need: recommendations, a book order/hold, a new library card, a household add-on, or an event/program booking.
 3. Capture required data before transfer:
-{root_requirement_sections}
+{requirement_sections}
    {state_reference_tip}
-{state_overview}
+{overview}
 {state_usage_guidance}
 4. After each update, call `save_conversation_state` so `{LIBRARY_STATE_KEY}` stays current for every agent.
 5. Reflect the plan back to the patron and confirm accuracy, then read it aloud for approval:
-{root_confirmation_sections}
+{confirmation_sections}
    Do not proceed until the patron explicitly says the details are correct.
 6. When ready, hand off to the matching sub-tools and provide a "Handoff Summary" with Customer goal, Key details, Urgency, and Missing info (if any). Ask if they have final questions before transferring.
 7. If no sub-tools applies or data is missing, continue assisting personally, explain why the request is paused, and propose next steps (e.g., gather a card number, escalate to staff).
@@ -125,14 +86,180 @@ Guardrails
 - Do not promise availability, pricing, or policy exceptions; instead describe what will be attempted.
 - Redact or paraphrase sensitive raw data (full addresses, IDs) when repeating it aloud.
 - Offer a human staff escalation when the patron is uncomfortable sharing required info or when you cannot proceed safely.
-""",
-    sub_agents=[
-        book_matching_agent,
-        book_order_agent,
-        card_services_agent,
-        household_link_agent,
-        programming_agent,
-    ],
-    tools=[save_conversation_state],
-    model=default_model,
+"""
+
+
+def root_instruction(_context: ReadonlyContext | None = None) -> str:
+    """Instruction provider embedding every service's blocks."""
+    return get_registry().memo(
+        ("root_instruction", "full"),
+        lambda _bank: build_root_instruction(
+            root_requirement_sections(), root_confirmation_sections()
+        ),
+    )
+
+
+routing_requirement_sections = "\n".join(
+    [
+        "   Identify the service first; its data checklist is added here once the goal is clear:",
+        *(
+            f"     - {service.description} (`{service.agent_name}`)"
+            for service in SERVICES
+        ),
+    ]
 )
+routing_confirmation_sections = (
+    "   The matching confirmation checklist is added here once the service is known."
+)
+
+
+def root_instruction_for(intents: tuple[str, ...]) -> str:
+    """Root instruction carrying only the given services' blocks."""
+    return get_registry().memo(
+        ("root_instruction", intents), lambda _bank: _render_root_instruction(intents)
+    )
+
+
+def _render_root_instruction(intents: tuple[str, ...]) -> str:
+    services = [SERVICES_BY_KEY[key] for key in intents]
+    overview = state_overview(tuple(service.state_field for service in services))
+    if not services:
+        return build_root_instruction(
+            routing_requirement_sections, routing_confirmation_sections, overview
+        )
+    return build_root_instruction(
+        "\n".join(service.requirements() for service in services),
+        "\n".join(service.confirmation() for service in services),
+        overview,
+    )
+
+
+def render_prompts() -> None:
+    """Render every instruction the agents can ask for, filling the memo."""
+    for module in (
+        book_recommendation,
+        book_order,
+        card_services,
+        household_link,
+        programming,
+    ):
+        module.instruction()
+    root_instruction()
+    root_instruction_for(())
+    for service in SERVICES:
+        root_instruction_for((service.key,))
+
+
+def _user_texts(context: ReadonlyContext) -> list[str]:
+    texts = []
+    for event in context.session.events:
+        if event.author == "user" and event.content and event.content.parts:
+            texts.append(" ".join(part.text for part in event.content.parts if part.text))
+    return texts
+
+
+def scoped_root_instruction(context: ReadonlyContext) -> str:
+    """Instruction provider: a routing prompt until an intent is detected."""
+    return root_instruction_for(resolve_intents(context.state, _user_texts(context)))
+
+
+# "0" ignores the pre-rendered prompt bundle and renders every prompt live.
+PROMPT_BUNDLE_ENABLED = os.getenv("LIBRARY_PROMPT_BUNDLE") != "0"
+if PROMPT_BUNDLE_ENABLED:
+    prompt_bundle.load()
+
+# "full" embeds every service's blocks; "scoped" sends only the detected ones.
+ROOT_INSTRUCTION_MODE = os.getenv("LIBRARY_ROOT_INSTRUCTION_MODE", "full")
+# "1" lets the local pre-router transfer obvious requests without an LLM call.
+PRE_ROUTER_ENABLED = os.getenv("LIBRARY_PRE_ROUTER") == "1"
+# "1" extracts emails, card numbers, formats, etc. locally into pending slots.
+SLOT_EXTRACTION_ENABLED = os.getenv("LIBRARY_SLOT_EXTRACTION") == "1"
+
+
+def root_slot_tools(state, text: str) -> tuple[str, ...]:
+    """Question-bank tool keys whose slots the root agent should extract."""
+    return tuple(SERVICES_BY_KEY[key].tool_key for key in resolve_intents(state, [text]))
+
+
+# "1" builds every subagent at import instead of on its first transfer.
+EAGER_AGENTS = os.getenv("LIBRARY_EAGER_AGENTS") == "1"
+_SERVICES_BY_AGENT = {service.agent_name: service for service in SERVICES}
+
+
+def _lazy_subagent(module, model: BaseLlm | None = None) -> LazyAgent:
+    def build() -> Agent:
+        agent = module.create_agent(model or get_model_pool().get(DEFAULT_MODEL))
+        if SLOT_EXTRACTION_ENABLED:
+            agent.before_model_callback = make_slot_filler(
+                [_SERVICES_BY_AGENT[agent.name].tool_key]
+            )
+        return agent
+
+    return LazyAgent(name=module.AGENT_NAME, description=module.DESCRIPTION, factory=build)
+
+
+root_before_model_callbacks = [
+    callback
+    for enabled, callback in (
+        (SLOT_EXTRACTION_ENABLED, make_slot_filler(root_slot_tools)),
+        (PRE_ROUTER_ENABLED, pre_route),
+    )
+    if enabled
+]
+
+
+def create_root_agent(model: BaseLlm | None = None) -> Agent:
+    """Build the concierge tree on ``model``, or on the pool's default client.
+
+    Subagents are built on first transfer; card services always takes its
+    own model from the pool.
+    """
+    return Agent(
+        name="library_root_agent",
+        global_instruction="""
+You are the CityStack Public Library Concierge. Be warm, efficient, and privacy-aware while guiding patrons.
+Your responsibilities:
+- Diagnose each visitor's goal (book recommendations, ordering/holds, new cards, household additions, event/program requests).
+- Gather only the personal data needed for that service and state why it is required.
+- Decide whether to solve the request yourself or route to a specialized librarian sub-tools. Prefer routing once all required details are collected.
+""",
+        instruction=(
+            scoped_root_instruction
+            if ROOT_INSTRUCTION_MODE == "scoped"
+            else root_instruction
+        ),
+        sub_agents=[
+            _lazy_subagent(module, model)
+            for module in (
+                book_recommendation,
+                book_order,
+                card_services,
+                household_link,
+                programming,
+            )
+        ],
+        tools=[save_conversation_state, list_missing_fields],
+        model=model or get_model_pool().get(DEFAULT_MODEL),
+        before_model_callback=root_before_model_callbacks or None,
+    )
+
+
+root_agent = create_root_agent()
+(
+    book_matching_agent,
+    book_order_agent,
+    card_services_agent,
+    household_link_agent,
+    programming_agent,
+) = root_agent.sub_agents
+
+
+def warm_up_agents() -> int:
+    """Build every subagent and render every prompt now; return agents built."""
+    built = warm_up(root_agent.sub_agents)
+    render_prompts()
+    return built
+
+
+if EAGER_AGENTS:
+    warm_up_agents()
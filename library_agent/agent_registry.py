@@ -0,0 +1,158 @@
+"""Lazily built subagents and a shared pool of model clients.
+
+``LazyAgent`` stands in for a subagent in the root agent's ``sub_agents``.
+Routing only needs a name and a description, so the real agent (and its
+model client) is built by its factory the first time control transfers to
+it, and every later turn runs that same instance. ``ModelPool`` hands out
+one client per model name. Without it, an agent configured with a plain
+model string gets a new client from ADK's registry on every model call.
+Servers that would rather pay for construction at startup can call
+``warm_up``. With `LIBRARY_CASSETTE` set, the pool's clients record to or
+replay from a cassette (see ``library_agent.cassette``). With
+`LIBRARY_RESPONSE_CACHE=1` they answer repeated prompts from a shared
+response cache (see ``library_agent.response_cache``).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import AsyncGenerator, Callable, Iterable
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.registry import LLMRegistry
+from pydantic import PrivateAttr
+
+
+def _default_client(model: str) -> BaseLlm:
+    if model.startswith("gemini"):
+        return LLMRegistry.new_llm(model)
+    from google.adk.models.lite_llm import LiteLlm
+
+    return LiteLlm(model=model, api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def _cassette_factory() -> Callable[[str], BaseLlm]:
+    """Default clients, wrapped in a cassette when `LIBRARY_CASSETTE` is set."""
+    mode = os.getenv("LIBRARY_CASSETTE")
+    if not mode:
+        return _default_client
+    if mode not in ("record", "replay"):
+        raise ValueError(f"LIBRARY_CASSETTE must be 'record' or 'replay', not '{mode}'")
+    from library_agent.cassette import DEFAULT_CASSETTE_PATH, CassetteLlm, get_cassette
+
+    cassette = get_cassette(os.getenv("LIBRARY_CASSETTE_PATH", DEFAULT_CASSETTE_PATH))
+
+    def build(model: str) -> BaseLlm:
+        # Replay never builds a real client, so it needs no credentials.
+        inner = _default_client(model) if mode == "record" else None
+        return CassetteLlm(model=model, mode=mode, inner=inner, cassette=cassette)
+
+    return build
+
+
+def _client_factory() -> Callable[[str], BaseLlm]:
+    factory = _cassette_factory()
+    if os.getenv("LIBRARY_RESPONSE_CACHE") != "1":
+        return factory
+    from library_agent.response_cache import CachingLlm, get_response_cache
+
+    cache = get_response_cache()
+    return lambda model: CachingLlm(model=model, inner=factory(model), cache=cache)
+
+
+class ModelPool:
+    """One model client per model name, created on first use and then shared."""
+
+    def __init__(self, factory: Callable[[str], BaseLlm] = _default_client) -> None:
+        self._factory = factory
+        self._clients: dict[str, BaseLlm] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def clients(self) -> list[BaseLlm]:
+        return list(self._clients.values())
+
+    def get(self, model: str) -> BaseLlm:
+        client = self._clients.get(model)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(model)
+                if client is None:
+                    client = self._clients[model] = self._factory(model)
+        return client
+
+
+_model_pool: ModelPool | None = None
+_model_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> ModelPool:
+    global _model_pool
+    if _model_pool is None:
+        with _model_pool_lock:
+            if _model_pool is None:
+                _model_pool = ModelPool(_client_factory())
+    return _model_pool
+
+
+def set_model_pool(pool: ModelPool | None) -> None:
+    global _model_pool
+    _model_pool = pool
+
+
+class LazyAgent(BaseAgent):
+    """Placeholder subagent that builds the real one on first run."""
+
+    # The runner only resumes a subagent across turns when every agent up the
+    # tree declares this attribute; the real agent's own setting still applies.
+    disallow_transfer_to_parent: bool = False
+
+    _factory: Callable[[], BaseAgent] = PrivateAttr()
+    _agent: BaseAgent | None = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, *, factory: Callable[[], BaseAgent], **data) -> None:
+        super().__init__(**data)
+        self._factory = factory
+
+    @property
+    def loaded(self) -> bool:
+        return self._agent is not None
+
+    def resolve(self) -> BaseAgent:
+        """Return the real agent, building it on the first call."""
+        if self._agent is None:
+            with self._lock:
+                if self._agent is None:
+                    agent = self._factory()
+                    if agent.name != self.name:
+                        raise ValueError(
+                            f"Factory for '{self.name}' built an agent named '{agent.name}'"
+                        )
+                    # Transfers back to the root and to peers go through the parent.
+                    agent.parent_agent = self.parent_agent
+                    self._agent = agent
+        return self._agent
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        async for event in self.resolve().run_async(ctx):
+            yield event
+
+    async def _run_live_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        async for event in self.resolve().run_live(ctx):
+            yield event
+
+
+def warm_up(agents: Iterable[BaseAgent]) -> int:
+    """Build every ``LazyAgent`` in ``agents``; return how many were built now."""
+    built = 0
+    for agent in agents:
+        if isinstance(agent, LazyAgent) and not agent.loaded:
+            agent.resolve()
+            built += 1
+    return built
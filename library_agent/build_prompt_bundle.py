@@ -0,0 +1,27 @@
+"""Build step: ``python -m library_agent.build_prompt_bundle [--check]``."""
+from __future__ import annotations
+
+import argparse
+
+from library_agent.prompt_bundle import BUNDLE_PATH, build, check_question_paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the pre-rendered prompt bundle.")
+    parser.add_argument("--output", default=str(BUNDLE_PATH))
+    parser.add_argument(
+        "--check", action="store_true", help="only cross-check question ids against the models"
+    )
+    args = parser.parse_args()
+    errors = check_question_paths()
+    if errors:
+        raise SystemExit("\n".join(errors))
+    if args.check:
+        print("question ids match the request models")
+        return
+    count = build(args.output)
+    print(f"wrote {count} renders to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Record/replay cassettes for model traffic.
+
+``CassetteLlm`` wraps a model. In ``record`` mode it calls the wrapped
+model and appends every request fingerprint (see ``llm_fingerprint``)
+with its responses to a cassette file. In ``replay`` mode it answers from
+the cassette and never builds or calls a real client. A request whose
+fingerprint was never recorded is logged as a ``MissingFingerprint`` and
+raises ``CassetteMissError``. ``missing_report`` summarises the misses, which
+is usually the list of prompts that changed since the recording.
+
+The file is append-only: a magic header, then one record per model call::
+
+    32-byte SHA-256 fingerprint | 4-byte little-endian length | JSON payload
+
+The payload is the list of ``LlmResponse`` dumps for that call. For replay
+the file is memory-mapped and indexed once by fingerprint. When a
+fingerprint was recorded more than once, the last recording wins. Each
+record goes out in a single ``O_APPEND`` write, so concurrent recorders on
+one host do not interleave. The header is written by whichever recorder
+first takes an exclusive ``flock`` on an empty file; the others see it is
+there once they get the lock.
+
+Set ``LIBRARY_CASSETTE=record`` or ``replay`` (with an optional
+``LIBRARY_CASSETTE_PATH``) and the shared model pool wraps every agent's
+client.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncGenerator, Literal
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import PrivateAttr
+
+from library_agent.llm_fingerprint import fingerprint
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+DEFAULT_CASSETTE_PATH = (
+    Path(__file__).resolve().parents[1] / "evals" / "cassettes" / "default.cas"
+)
+MAGIC = b"LIBCAS1\n"
+_HEADER = struct.Struct("<32sI")
+
+CassetteMode = Literal["record", "replay"]
+
+
+class CassetteMissError(LookupError):
+    """Replay found no recording for a request."""
+
+
+@dataclass(frozen=True)
+class MissingFingerprint:
+    fingerprint: str
+    agent: str | None
+    last_message: str
+
+
+class Cassette:
+    """Append-only fingerprint -> responses file with an mmap index."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._index: dict[bytes, tuple[int, int]] = {}
+        self._indexed_size = 0
+        self._map: mmap.mmap | None = None
+
+    def append(self, key: bytes, payload: bytes) -> None:
+        record = _HEADER.pack(key, len(payload)) + payload
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size == 0:
+                # Only the first writer into an empty file adds the header;
+                # the lock is released when ``fd`` is closed.
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                if os.fstat(fd).st_size == 0:
+                    os.write(fd, MAGIC)
+            os.write(fd, record)
+        finally:
+            os.close(fd)
+
+    def _refresh(self) -> None:
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size == self._indexed_size:
+            return
+        with self.path.open("rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[: len(MAGIC)] != MAGIC:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a cassette file")
+        offset = max(self._indexed_size, len(MAGIC))
+        while offset + _HEADER.size <= size:
+            key, length = _HEADER.unpack_from(mapped, offset)
+            start = offset + _HEADER.size
+            if start + length > size:
+                break  # a record still being written
+            self._index[key] = (start, length)
+            offset = start + length
+        if self._map is not None:
+            self._map.close()
+        self._map, self._indexed_size = mapped, offset
+
+    def get(self, key: bytes) -> bytes | None:
+        with self._lock:
+            if key not in self._index:
+                self._refresh()
+            location = self._index.get(key)
+            if location is None or self._map is None:
+                return None
+            start, length = location
+            return self._map[start : start + length]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+            self._map, self._index, self._indexed_size = None, {}, 0
+
+
+def _last_user_text(llm_request: LlmRequest) -> str:
+    for content in reversed(llm_request.contents):
+        if content.role == "user":
+            text = " ".join(part.text for part in content.parts or () if part.text)
+            if text:
+                return text[:120]
+    return ""
+
+
+class CassetteLlm(BaseLlm):
+    """Model wrapper that records to, or replays from, a ``Cassette``."""
+
+    mode: CassetteMode = "replay"
+    inner: BaseLlm | None = None
+    missing: list[MissingFingerprint] = []
+
+    _cassette: Cassette = PrivateAttr()
+
+    def __init__(self, *, cassette: Cassette, **data) -> None:
+        if data.get("mode", "replay") == "record" and data.get("inner") is None:
+            raise ValueError("Recording needs the model to record from")
+        if "model" not in data and data.get("inner") is not None:
+            data["model"] = data["inner"].model
+        super().__init__(**data)
+        self._cassette = cassette
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = fingerprint(llm_request)
+        if self.mode == "record":
+            responses = []
+            async for response in self.inner.generate_content_async(llm_request, stream):
+                responses.append(response)
+                yield response
+            payload = json.dumps(
+                [response.model_dump(mode="json", exclude_none=True) for response in responses],
+                separators=(",", ":"),
+            )
+            self._cassette.append(key, payload.encode("utf-8"))
+            return
+        payload = self._cassette.get(key)
+        if payload is None:
+            labels = llm_request.config.labels if llm_request.config else None
+            self.missing.append(
+                MissingFingerprint(
+                    key.hex(), (labels or {}).get("adk_agent_name"), _last_user_text(llm_request)
+                )
+            )
+            raise CassetteMissError(
+                f"No recording for request {key.hex()[:12]} in {self._cassette.path}"
+            )
+        for item in json.loads(payload):
+            yield LlmResponse.model_validate(item)
+
+
+def missing_report(models: list[CassetteLlm]) -> str:
+    """One line per replay miss across ``models``; empty when all hit."""
+    lines = [
+        f"{miss.fingerprint[:12]} {miss.agent or '?'}: {miss.last_message!r}"
+        for model in models
+        for miss in model.missing
+    ]
+    if not lines:
+        return ""
+    header = f"{len(lines)} request(s) missing from the cassette (prompt or flow changed):"
+    return "\n".join([header, *lines])
+
+
+_cassettes: dict[Path, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str | Path = DEFAULT_CASSETTE_PATH) -> Cassette:
+    """Return the process-wide ``Cassette`` for ``path``."""
+    path = Path(path).resolve()
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(path)
+        return cassette
@@ -0,0 +1,463 @@
+"""Parallel, incremental runner for ``evals/library_actions.test.json``.
+
+``python -m library_agent.eval_runner [--mock] [--workers N] [--rerun]``
+
+Each case runs in a worker process against the configured model or, with
+``--mock``, against a ``ScriptedLlm`` that replays the case's expected
+trajectory. A case's hash covers:
+
+- its JSON
+- the model mode
+- the rendered instructions and tool declarations of every agent it
+  passes through
+
+Results are cached by that hash in ``evals/.eval_cache.json``, so after a
+prompt edit only the cases routed through the edited agent run again. A case
+that raises scores zero with its error recorded and is not cached, so the
+next run retries it. The cache is written even when the run is interrupted.
+
+``tool_trajectory_avg_score`` and ``response_match_score`` are scored for
+all invocations at once against the thresholds in ``evals/test_config.json``.
+The trajectory metric is an exact name-and-args match, as in ADK. It
+compares only the five action tools; transfers and state bookkeeping are
+left out. Each tool is named the way the eval set names it, which is its
+``library_agent.tools.tools`` attribute (``order_book``) rather than the
+action function (``order_book_action``). The response metric is ROUGE-1 F1.
+It uses ``rouge_score``'s stemming tokenizer when that is installed and
+plain lowercase word tokens otherwise.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from library_agent import agent as agent_module
+from library_agent.agent_registry import (
+    LazyAgent,
+    ModelPool,
+    get_model_pool,
+    set_model_pool,
+)
+from library_agent.scripted_llm import Latency, ScriptedLlm, Step, transfer
+from library_agent.tools import tools
+
+EVALS_DIR = Path(__file__).resolve().parents[1] / "evals"
+EVAL_SET_PATH = EVALS_DIR / "library_actions.test.json"
+CONFIG_PATH = EVALS_DIR / "test_config.json"
+CACHE_PATH = EVALS_DIR / ".eval_cache.json"
+CACHE_FORMAT = 1
+ROOT_AGENT_NAME = "library_root_agent"
+# FunctionTool name -> the name the eval set records.
+ACTION_TOOLS = {
+    getattr(tools, attribute).name: attribute
+    for attribute in (
+        "recommend_books",
+        "order_book",
+        "issue_library_card",
+        "add_household_member",
+        "request_library_event",
+    )
+}
+_EVAL_TOOLS = {alias: name for name, alias in ACTION_TOOLS.items()}
+
+ToolUse = tuple[str, dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class Invocation:
+    tool_uses: tuple[ToolUse, ...]
+    response: str
+
+
+@dataclass(frozen=True)
+class CaseScore:
+    eval_id: str
+    tool_trajectory_avg_score: float
+    response_match_score: float
+    passed: bool
+    cached: bool
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class EvalReport:
+    scores: list[CaseScore]
+    ran: int
+    cached: int
+    seconds: float
+
+    @property
+    def passed(self) -> bool:
+        return all(score.passed for score in self.scores)
+
+
+def load_eval_set(path: str | Path = EVAL_SET_PATH) -> list[dict[str, Any]]:
+    with Path(path).open("r", encoding="utf-8") as fh:
+        return json.load(fh)["eval_cases"]
+
+
+def load_criteria(path: str | Path = CONFIG_PATH) -> dict[str, float]:
+    with Path(path).open("r", encoding="utf-8") as fh:
+        return json.load(fh)["criteria"]
+
+
+def _text(content: dict[str, Any] | None) -> str:
+    return " ".join(part.get("text", "") for part in (content or {}).get("parts", [])).strip()
+
+
+def _case_agents(case: dict[str, Any]) -> list[str]:
+    """Agents a case passes through, in order, starting at the root."""
+    agents = [ROOT_AGENT_NAME]
+    for invocation in case["conversation"]:
+        data = invocation.get("intermediate_data", {})
+        for author, _ in data.get("intermediate_responses", []):
+            if author not in agents:
+                agents.append(author)
+    return agents
+
+
+# Hashing ------------------------------------------------------------------
+
+
+def _digest(*parts: Any) -> str:
+    text = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _declarations(agent) -> list[Any]:
+    return [
+        tool._get_declaration().model_dump(mode="json", exclude_none=True)
+        for tool in agent.tools
+    ]
+
+
+def agent_fingerprints() -> dict[str, str]:
+    """Hash of every agent's rendered instructions and tool declarations."""
+    root = agent_module.create_root_agent(ScriptedLlm())
+    root_prompts = [agent_module.root_instruction(), agent_module.root_instruction_for(())]
+    root_prompts += [
+        agent_module.root_instruction_for((service.key,)) for service in agent_module.SERVICES
+    ]
+    fingerprints = {
+        root.name: _digest(
+            root.global_instruction,
+            root_prompts,
+            _declarations(root),
+            [(sub.name, sub.description) for sub in root.sub_agents],
+            agent_module.ROOT_INSTRUCTION_MODE,
+            agent_module.PRE_ROUTER_ENABLED,
+            agent_module.SLOT_EXTRACTION_ENABLED,
+        )
+    }
+    for lazy in root.sub_agents:
+        sub = lazy.resolve() if isinstance(lazy, LazyAgent) else lazy
+        instruction = sub.instruction(None) if callable(sub.instruction) else sub.instruction
+        fingerprints[sub.name] = _digest(instruction, _declarations(sub))
+    return fingerprints
+
+
+def case_hash(case: dict[str, Any], fingerprints: dict[str, str], mode: str) -> str:
+    return _digest(
+        CACHE_FORMAT,
+        mode,
+        case,
+        [(name, fingerprints.get(name)) for name in _case_agents(case)],
+    )
+
+
+# Running ------------------------------------------------------------------
+
+
+def mock_script(case: dict[str, Any]) -> dict[str, list[Step]]:
+    """Script replaying the case's expected transfers, tool calls and replies."""
+    script: dict[str, list[Step]] = {}
+    current = ROOT_AGENT_NAME
+    for invocation in case["conversation"]:
+        data = invocation.get("intermediate_data", {})
+        authors = [author for author, _ in data.get("intermediate_responses", [])]
+        target = authors[-1] if authors else current
+        if target != current:
+            script.setdefault(current, []).append(transfer(target))
+            current = target
+        steps = script.setdefault(target, [])
+        for use in data.get("tool_uses", []):
+            name = _EVAL_TOOLS.get(use["name"], use["name"])
+            steps.append(Step(tool=name, args={"request": use.get("args", {})}))
+        steps.append(Step(text=_text(invocation.get("final_response")) or "Done."))
+    return script
+
+
+def _tool_uses(events: Iterable[Any]) -> tuple[ToolUse, ...]:
+    uses = []
+    for event in events:
+        for call in event.get_function_calls():
+            if call.name in ACTION_TOOLS:
+                args = dict(call.args or {})
+                uses.append((ACTION_TOOLS[call.name], args.get("request", args)))
+    return tuple(uses)
+
+
+async def _run_conversation(root, case: dict[str, Any]) -> list[Invocation]:
+    session_input = case.get("session_input", {})
+    app_name = session_input.get("app_name", "library_concierge")
+    user_id = session_input.get("user_id", "eval_user")
+    runner = InMemoryRunner(agent=root, app_name=app_name)
+    session = await runner.session_service.create_session(
+        app_name=app_name, user_id=user_id, state=dict(session_input.get("state") or {})
+    )
+    results = []
+    for invocation in case["conversation"]:
+        message = types.Content.model_validate(invocation["user_content"])
+        events = [
+            event
+            async for event in runner.run_async(
+                user_id=user_id, session_id=session.id, new_message=message
+            )
+        ]
+        finals = [
+            " ".join(part.text for part in event.content.parts if part.text)
+            for event in events
+            if event.is_final_response() and event.content and event.content.parts
+        ]
+        response = next((text for text in reversed(finals) if text), "")
+        results.append(Invocation(_tool_uses(events), response))
+    return results
+
+
+def run_case(
+    case: dict[str, Any], mock: bool, latency: Latency = Latency()
+) -> list[Invocation]:
+    """Run one case on a fresh agent tree; the worker-process entry point."""
+    if not mock:
+        return asyncio.run(_run_conversation(agent_module.create_root_agent(), case))
+    llm = ScriptedLlm(script=mock_script(case), latency=latency)
+    previous = get_model_pool()
+    set_model_pool(ModelPool(lambda _name: llm))
+    try:
+        return asyncio.run(_run_conversation(agent_module.create_root_agent(), case))
+    finally:
+        set_model_pool(previous)
+
+
+# Scoring ------------------------------------------------------------------
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokenizer():
+    try:
+        from rouge_score.tokenizers import DefaultTokenizer
+    except ImportError:
+        return lambda text: _WORD_RE.findall(text.lower())
+    return DefaultTokenizer(use_stemmer=True).tokenize
+
+
+def response_match_scores(references: Sequence[str], candidates: Sequence[str]) -> np.ndarray:
+    """ROUGE-1 F1 for each ``(reference, candidate)`` pair, as one matrix op."""
+    tokenize = _tokenizer()
+    vocabulary: dict[str, int] = {}
+    rows = []
+    for text in (*references, *candidates):
+        rows.append([vocabulary.setdefault(token, len(vocabulary)) for token in tokenize(text)])
+    counts = np.zeros((len(rows), max(len(vocabulary), 1)))
+    for row, ids in enumerate(rows):
+        np.add.at(counts[row], ids, 1)
+    reference, candidate = counts[: len(references)], counts[len(references) :]
+    overlap = np.minimum(reference, candidate).sum(axis=1)
+    zeros = np.zeros_like(overlap)
+    precision = np.divide(overlap, candidate.sum(axis=1), out=zeros.copy(), where=overlap > 0)
+    recall = np.divide(overlap, reference.sum(axis=1), out=zeros.copy(), where=overlap > 0)
+    total = precision + recall
+    return np.divide(2 * precision * recall, total, out=np.zeros_like(total), where=total > 0)
+
+
+def _expected_uses(invocation: dict[str, Any]) -> tuple[ToolUse, ...]:
+    uses = invocation.get("intermediate_data", {}).get("tool_uses", [])
+    return tuple((use["name"], use.get("args", {})) for use in uses)
+
+
+def score_cases(
+    cases: Sequence[dict[str, Any]],
+    results: Sequence[Sequence[Invocation]],
+    criteria: dict[str, float],
+    cached: Sequence[bool],
+    errors: Sequence[str | None] | None = None,
+) -> list[CaseScore]:
+    """Score every invocation of every case in one batch; average per case.
+
+    Cases with an entry in ``errors`` fail whatever their scores.
+    """
+    errors = errors or [None] * len(cases)
+    owners, trajectory, references, candidates = [], [], [], []
+    for index, (case, invocations) in enumerate(zip(cases, results)):
+        for expected, actual in zip(case["conversation"], invocations):
+            owners.append(index)
+            trajectory.append(float(_expected_uses(expected) == actual.tool_uses))
+            references.append(_text(expected.get("final_response")))
+            candidates.append(actual.response)
+    owner = np.asarray(owners, dtype=int)
+    per_case = np.maximum(np.bincount(owner, minlength=len(cases)), 1)
+    trajectory_avg = np.bincount(owner, np.asarray(trajectory), len(cases)) / per_case
+    response_avg = (
+        np.bincount(owner, response_match_scores(references, candidates), len(cases)) / per_case
+    )
+    scores = []
+    for index, case in enumerate(cases):
+        values = {
+            "tool_trajectory_avg_score": float(trajectory_avg[index]),
+            "response_match_score": float(response_avg[index]),
+        }
+        scores.append(
+            CaseScore(
+                eval_id=case["eval_id"],
+                passed=errors[index] is None
+                and all(values[name] >= threshold for name, threshold in criteria.items()),
+                cached=cached[index],
+                error=errors[index],
+                **values,
+            )
+        )
+    return scores
+
+
+# Cache --------------------------------------------------------------------
+
+
+def _load_cache(path: Path) -> dict[str, Any]:
+    try:
+        payload = json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    return payload.get("results", {}) if payload.get("format") == CACHE_FORMAT else {}
+
+
+def _save_cache(path: Path, results: dict[str, Any]) -> None:
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(
+        json.dumps({"format": CACHE_FORMAT, "results": results}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    os.replace(temporary, path)
+
+
+def _encode(invocations: Sequence[Invocation]) -> list[dict[str, Any]]:
+    return [
+        {"tool_uses": [list(use) for use in item.tool_uses], "response": item.response}
+        for item in invocations
+    ]
+
+
+def _decode(entries: list[dict[str, Any]]) -> list[Invocation]:
+    return [
+        Invocation(tuple((name, args) for name, args in entry["tool_uses"]), entry["response"])
+        for entry in entries
+    ]
+
+
+def run_eval_set(
+    path: str | Path = EVAL_SET_PATH,
+    *,
+    mock: bool = False,
+    latency: Latency = Latency(),
+    workers: int | None = None,
+    cache_path: str | Path | None = CACHE_PATH,
+    rerun: bool = False,
+    criteria: dict[str, float] | None = None,
+) -> EvalReport:
+    """Run every case whose hash is not cached, in parallel, and score them all."""
+    start = time.perf_counter()
+    cases = load_eval_set(path)
+    criteria = load_criteria() if criteria is None else criteria
+    mode = "mock" if mock else agent_module.DEFAULT_MODEL
+    fingerprints = agent_fingerprints()
+    hashes = [case_hash(case, fingerprints, mode) for case in cases]
+    cache = _load_cache(Path(cache_path)) if cache_path and not rerun else {}
+    results: list[list[Invocation] | None] = [
+        _decode(cache[digest]) if digest in cache else None for digest in hashes
+    ]
+    pending = [index for index, result in enumerate(results) if result is None]
+    errors: list[str | None] = [None] * len(cases)
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    try:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(run_case, cases[index], mock, latency): index for index in pending
+                }
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        results[index] = future.result()
+                    except Exception as exc:
+                        errors[index] = f"{type(exc).__name__}: {exc}"
+        else:
+            for index in pending:
+                try:
+                    results[index] = run_case(cases[index], mock, latency)
+                except Exception as exc:
+                    errors[index] = f"{type(exc).__name__}: {exc}"
+    finally:
+        if cache_path:
+            # Only the current hashes are kept, so the cache never outgrows the
+            # set; failed and unfinished cases are left out so they run again.
+            _save_cache(
+                Path(cache_path),
+                {
+                    digest: _encode(result)
+                    for digest, result in zip(hashes, results)
+                    if result is not None
+                },
+            )
+    cached = [index not in pending for index in range(len(cases))]
+    scores = score_cases(
+        cases, [result or [] for result in results], criteria, cached, errors
+    )
+    return EvalReport(scores, len(pending), len(cases) - len(pending), time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the library eval set incrementally.")
+    parser.add_argument("--evals", type=Path, default=EVAL_SET_PATH)
+    parser.add_argument("--mock", action="store_true", help="replay expected turns locally")
+    parser.add_argument(
+        "--mock-latency", default="0", help="simulated seconds per mock model call, e.g. 0.5"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="default: one per core")
+    parser.add_argument("--rerun", action="store_true", help="ignore cached results")
+    args = parser.parse_args()
+
+    report = run_eval_set(
+        args.evals,
+        mock=args.mock,
+        latency=Latency.parse(args.mock_latency),
+        workers=args.workers,
+        rerun=args.rerun,
+    )
+    for score in report.scores:
+        print(
+            f"{'PASS' if score.passed else 'FAIL'} {score.eval_id:<32} "
+            f"trajectory {score.tool_trajectory_avg_score:.2f}  "
+            f"response {score.response_match_score:.2f}{'  (cached)' if score.cached else ''}"
+        )
+        if score.error:
+            print(f"     {score.error}")
+    print(f"{report.ran} run, {report.cached} cached in {report.seconds:.2f}s")
+    if not report.passed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
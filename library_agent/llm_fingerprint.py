@@ -0,0 +1,100 @@
+"""Stable fingerprints of model requests.
+
+Two runs of the same conversation do not produce byte-identical requests.
+ADK gives every function call a random ``id``, and the tools answer with
+fresh order ids, card numbers, card expiry timestamps and so on.
+``canonical_request`` reduces an ``LlmRequest`` to plain JSON data and drops
+or masks those values. ``fingerprint`` is the SHA-256 of that data. It identifies "the
+same prompt" for recording and replaying model traffic.
+
+Callers that must not conflate requests differing only in an order id (a
+response cache would echo the wrong confirmation) pass
+``mask=mask_timestamps``, which leaves generated ids in place.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Any, Callable
+
+from google.adk.models.llm_request import LlmRequest
+
+# Values minted per call: Snowflake ids from ``tools.ids.new_id``
+# (``ORD-02X2F9BPEE000``) and card numbers from ``tools.card_numbers``
+# (``CARD-20000000000014``).
+_GENERATED_ID_RE = re.compile(r"\b(?:[A-Z]{2,4}-[0-9A-HJKMNP-TV-Z]{13}|CARD-\d{14})\b")
+_TIMESTAMP_RE = re.compile(
+    r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+# Keys whose values differ on every run and never change what a model should say.
+_VOLATILE_KEYS = frozenset({"id", "thought_signature", "will_continue"})
+# Request config that only affects transport.
+_TRANSPORT_CONFIG = {"http_options", "labels"}
+
+
+Mask = Callable[[str], str]
+
+
+def mask_timestamps(text: str) -> str:
+    """Replace ISO timestamps in ``text`` with a placeholder."""
+    return _TIMESTAMP_RE.sub("<timestamp>", text)
+
+
+def mask_volatile(text: str) -> str:
+    """Replace generated ids and timestamps in ``text`` with placeholders."""
+    return mask_timestamps(_GENERATED_ID_RE.sub("<id>", text))
+
+
+def has_volatile(text: str) -> bool:
+    """True when ``text`` contains a generated id or a timestamp."""
+    return bool(_GENERATED_ID_RE.search(text) or _TIMESTAMP_RE.search(text))
+
+
+def _normalize(value: Any, mask: Mask) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: _normalize(item, mask)
+            for key, item in value.items()
+            if key not in _VOLATILE_KEYS
+        }
+    if isinstance(value, list):
+        return [_normalize(item, mask) for item in value]
+    if isinstance(value, str):
+        return mask(value)
+    return value
+
+
+def canonical_request(llm_request: LlmRequest, *, mask: Mask = mask_volatile) -> dict[str, Any]:
+    """Plain-data view of ``llm_request`` without run-to-run noise."""
+    config = llm_request.config
+    return {
+        "model": llm_request.model,
+        "agent": (config.labels or {}).get("adk_agent_name") if config else None,
+        "contents": _normalize(
+            [
+                content.model_dump(mode="json", exclude_none=True)
+                for content in llm_request.contents
+            ],
+            mask,
+        ),
+        "config": _normalize(
+            config.model_dump(mode="json", exclude_none=True, exclude=_TRANSPORT_CONFIG)
+            if config
+            else {},
+            mask,
+        ),
+    }
+
+
+def digest(canonical: Any) -> bytes:
+    """SHA-256 of the sorted-key JSON encoding of ``canonical``."""
+    text = json.dumps(
+        canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def fingerprint(llm_request: LlmRequest, *, mask: Mask = mask_volatile) -> bytes:
+    """SHA-256 digest of ``canonical_request(llm_request)``."""
+    return digest(canonical_request(llm_request, mask=mask))
@@ -0,0 +1,194 @@
+"""Local pre-router that hands obvious requests to a subagent without an LLM call.
+
+``IntentRouter`` is a multinomial naive-Bayes classifier over word unigrams
+and bigrams, trained on the subagent descriptions plus labelled utterances
+from ``config/routing_examples.json``. The keyword cues in
+``library_agent.routing`` are added to its log-odds, and the softmax of the
+result is the routing confidence. ``pre_route`` runs as the root agent's
+``before_model_callback``: when the newest user message clears the
+threshold, it answers with a ``transfer_to_agent`` call in place of the model
+response; otherwise it returns ``None`` and the LLM routes as usual.
+
+``make_slot_filler`` builds the other pre-processing callback: it runs the
+question-bank slot extractors over the newest user message, upserts what
+they find into `LIBRARY_STATE_KEY` and tells the model which details are
+already captured, so recording them does not cost a tool-call turn.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from library_agent.routing import SERVICES, cue_scores
+from library_agent.tools.slot_extractors import describe_pending_slots, upsert_slots
+
+EXAMPLES_PATH = Path(__file__).resolve().parent / "config" / "routing_examples.json"
+DEFAULT_THRESHOLD = 0.85
+# Log-odds added per unit of keyword-cue weight.
+CUE_WEIGHT = 1.5
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and the to for of on in at my me i m we our you your can could "
+    "please would d like want need is it this that with be".split()
+)
+_AGENT_TO_KEY = {service.agent_name: service.key for service in SERVICES}
+
+
+def tokenize(text: str) -> list[str]:
+    words = [word for word in _TOKEN_RE.findall(text.lower()) if word not in _STOPWORDS]
+    return words + [f"{first}_{second}" for first, second in zip(words, words[1:])]
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    agent_name: str | None
+    confidence: float
+    scores: dict[str, float]
+
+
+def load_examples(path: str | Path = EXAMPLES_PATH) -> list[tuple[str, str]]:
+    """Return ``(utterance, agent_name)`` pairs, descriptions included."""
+    examples = [(service.description, service.agent_name) for service in SERVICES]
+    path = Path(path)
+    if path.exists():
+        with path.open("r", encoding="utf-8") as fh:
+            for agent_name, utterances in json.load(fh).items():
+                examples.extend((utterance, agent_name) for utterance in utterances)
+    return examples
+
+
+class IntentRouter:
+    """Naive Bayes plus keyword cues over the five librarian services."""
+
+    def __init__(
+        self,
+        examples: Iterable[tuple[str, str]],
+        *,
+        threshold: float = DEFAULT_THRESHOLD,
+        alpha: float = 1.0,
+    ) -> None:
+        self.threshold = threshold
+        counts = {service.agent_name: Counter() for service in SERVICES}
+        for text, agent_name in examples:
+            counts[agent_name].update(tokenize(text))
+        self.vocabulary = frozenset(token for counter in counts.values() for token in counter)
+        size = len(self.vocabulary)
+        self._log_likelihood: dict[str, dict[str, float]] = {}
+        self._log_unseen: dict[str, float] = {}
+        for agent_name, counter in counts.items():
+            total = sum(counter.values()) + alpha * size
+            self._log_likelihood[agent_name] = {
+                token: math.log((count + alpha) / total) for token, count in counter.items()
+            }
+            self._log_unseen[agent_name] = math.log(alpha / total)
+
+    def route(self, text: str) -> RoutingDecision:
+        tokens = [token for token in tokenize(text) if token in self.vocabulary]
+        cues = cue_scores(text)
+        logits = {}
+        for service in SERVICES:
+            likelihood = self._log_likelihood[service.agent_name]
+            unseen = self._log_unseen[service.agent_name]
+            logits[service.agent_name] = (
+                sum(likelihood.get(token, unseen) for token in tokens)
+                + CUE_WEIGHT * cues[service.key]
+            )
+        top = max(logits.values())
+        weights = {name: math.exp(logit - top) for name, logit in logits.items()}
+        total = sum(weights.values())
+        scores = {name: weight / total for name, weight in weights.items()}
+        best = max(scores, key=scores.get)
+        confident = scores[best] >= self.threshold and (tokens or cues[_AGENT_TO_KEY[best]])
+        return RoutingDecision(best if confident else None, scores[best], scores)
+
+
+_router: IntentRouter | None = None
+
+
+def get_router() -> IntentRouter:
+    """Return the shared router (threshold from `LIBRARY_PRE_ROUTER_THRESHOLD`)."""
+    global _router
+    if _router is None:
+        threshold = float(os.getenv("LIBRARY_PRE_ROUTER_THRESHOLD", DEFAULT_THRESHOLD))
+        _router = IntentRouter(load_examples(), threshold=threshold)
+    return _router
+
+
+def set_router(router: IntentRouter | None) -> None:
+    global _router
+    _router = router
+
+
+def _latest_user_text(llm_request: LlmRequest) -> str | None:
+    if not llm_request.contents:
+        return None
+    content = llm_request.contents[-1]
+    if content.role != "user" or not content.parts:
+        return None
+    if any(part.function_response for part in content.parts):
+        return None  # the model is mid tool-call loop, not reading a new message
+    text = " ".join(part.text for part in content.parts if part.text)
+    return text or None
+
+
+def pre_route(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> LlmResponse | None:
+    """``before_model_callback``: transfer directly when routing is obvious."""
+    text = _latest_user_text(llm_request)
+    if text is None:
+        return None
+    decision = get_router().route(text)
+    if decision.agent_name is None:
+        return None
+    return LlmResponse(
+        content=types.Content(
+            role="model",
+            parts=[
+                types.Part(
+                    function_call=types.FunctionCall(
+                        name="transfer_to_agent",
+                        args={"agent_name": decision.agent_name},
+                    )
+                )
+            ],
+        )
+    )
+
+
+def make_slot_filler(
+    tool_keys: Iterable[str] | Callable[[Any, str], Iterable[str]],
+) -> Callable[[CallbackContext, LlmRequest], None]:
+    """Return a ``before_model_callback`` that fills slots for ``tool_keys``.
+
+    ``tool_keys`` is fixed for a subagent; the root agent passes a function of
+    ``(state, text)`` that picks the tools the conversation is about.
+    """
+    fixed = None if callable(tool_keys) else tuple(tool_keys)
+
+    def fill_slots(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+        text = _latest_user_text(llm_request)
+        state = callback_context.state
+        keys = fixed if fixed is not None else tuple(tool_keys(state, text or ""))
+        if not keys:
+            return None
+        if text is not None:
+            upsert_slots(state, keys, text)
+        # Repeated on every model call so tool-call follow-ups still see it.
+        note = describe_pending_slots(state, keys)
+        if note:
+            llm_request.append_instructions([note])
+        return None
+
+    return fill_slots
@@ -0,0 +1,117 @@
+"""Pre-rendered prompt bundle for a faster cold start.
+
+``python -m library_agent.build_prompt_bundle`` renders every instruction the
+agents can ask for (subagent and root instructions, their collection and
+confirmation blocks, the state overviews) into ``config/prompt_bundle.json``.
+The bundle records a SHA-256 over the question bank and the modules that
+shape the text. Before writing it, the build checks that every question
+``id`` names a real field path on its request model.
+
+At import, ``library_agent.agent`` calls ``load``, which reads the bundle
+and seeds the question-bank registry with its renders when the hash still
+matches. A missing or stale bundle is ignored and everything renders live
+as before. Later bank edits are picked up by the registry's hot reload
+either way.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from library_agent.tools.question_bank import (
+    QUESTIONS_DIR,
+    QuestionBankRegistry,
+    _load_bank,
+    get_registry,
+    set_registry,
+)
+from library_agent.tools.requirements_helper import _strip_optional, model_schema
+from library_agent.tools.tools import TOOL_SECTIONS, ConversationState
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+BUNDLE_PATH = PACKAGE_DIR / "config" / "prompt_bundle.json"
+BUNDLE_FORMAT = 1
+# Modules whose code ends up in rendered text; editing one invalidates the bundle.
+_SOURCE_GLOBS = (
+    "agent.py",
+    "routing.py",
+    "subagents/*.py",
+    "tools/question_bank.py",
+    "tools/requirements_helper.py",
+    "tools/tools.py",
+)
+
+
+def _input_files() -> list[Path]:
+    files = sorted(QUESTIONS_DIR.glob("*.json"))
+    for pattern in _SOURCE_GLOBS:
+        files.extend(sorted(PACKAGE_DIR.glob(pattern)))
+    return files
+
+
+def inputs_hash() -> str:
+    """SHA-256 over the question bank and the prompt-shaping sources."""
+    digest = hashlib.sha256()
+    for path in _input_files():
+        digest.update(path.name.encode("utf-8") + b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def check_question_paths(bank: dict[str, Any] | None = None) -> list[str]:
+    """Return one message per collection question ``id`` with no matching field."""
+    bank = _load_bank() if bank is None else bank
+    errors: list[str] = []
+    for tool_key, section in TOOL_SECTIONS.items():
+        model, _ = _strip_optional(ConversationState.model_fields[section].annotation)
+        paths = model_schema(model).paths
+        for question in bank[tool_key].get("collection", {}).get("questions", []):
+            if question["id"] not in paths:
+                errors.append(
+                    f"{tool_key}: question id '{question['id']}' is not a field of "
+                    f"{model.__name__}"
+                )
+    return errors
+
+
+def _freeze(value: Any) -> Any:
+    return tuple(_freeze(item) for item in value) if isinstance(value, list) else value
+
+
+def build(path: str | Path = BUNDLE_PATH) -> int:
+    """Render every prompt into a bundle at ``path``; return the render count."""
+    from library_agent import agent
+
+    errors = check_question_paths()
+    if errors:
+        raise ValueError("Question bank does not match the request models:\n" + "\n".join(errors))
+    previous = get_registry()
+    registry = QuestionBankRegistry(previous.directory, poll_interval=float("inf"))
+    set_registry(registry)
+    try:
+        agent.render_prompts()
+        renders = registry.rendered()
+    finally:
+        set_registry(previous)
+    entries = [[list(key), value] for key, value in renders.items() if isinstance(value, str)]
+    payload = {"format": BUNDLE_FORMAT, "hash": inputs_hash(), "renders": entries}
+    path = Path(path)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporary, path)
+    return len(entries)
+
+
+def load(registry: QuestionBankRegistry | None = None, path: str | Path = BUNDLE_PATH) -> bool:
+    """Seed ``registry`` from the bundle; return ``False`` if it is missing or stale."""
+    try:
+        payload = json.loads(Path(path).read_bytes())
+    except (OSError, ValueError):
+        return False
+    if payload.get("format") != BUNDLE_FORMAT or payload.get("hash") != inputs_hash():
+        return False
+    renders = {_freeze(key): value for key, value in payload["renders"]}
+    return (registry or get_registry()).preload(renders)
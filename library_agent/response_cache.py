@@ -0,0 +1,200 @@
+"""Response cache for model calls, keyed on the normalized prompt.
+
+Many conversations open the same way, and the root agent would otherwise pay
+a model round trip to produce the same routing reply each time.
+``CachingLlm`` wraps a model client. It serves byte-identical responses for
+requests whose normalized form was seen within the TTL. The store is the
+same bounded TTL/LRU ``DedupCache`` the order tool uses, optionally backed by
+SQLite so the cache survives restarts.
+
+The key is ``canonical_request`` with timestamps masked, with the state
+tool's responses reduced to their canonical form (empty values dropped,
+whitespace collapsed). The session state only reaches the model through
+those responses and the instructions, so two sessions whose
+`LIBRARY_STATE_KEY` differs only cosmetically share an entry. Generated ids
+are not masked. A confirmation for one order must never be served for
+another.
+
+Nothing with side effects is cached:
+
+- responses that call a tool in ``SIDE_EFFECT_TOOLS``
+- the model call that answers such a tool's result
+- responses that quote a generated id or a timestamp
+
+Set ``LIBRARY_RESPONSE_CACHE=1`` to wrap every client in the shared model
+pool. ``LIBRARY_RESPONSE_CACHE_TTL``, ``LIBRARY_RESPONSE_CACHE_SIZE`` and
+``LIBRARY_RESPONSE_CACHE_DB`` tune it.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import PrivateAttr
+
+from library_agent.llm_fingerprint import canonical_request, digest, has_volatile, mask_timestamps
+from library_agent.tools.dedup import DedupCache
+from library_agent.tools.tools import (
+    add_household_member,
+    issue_library_card,
+    order_book,
+    request_library_event,
+    save_conversation_state,
+)
+
+DEFAULT_TTL_SECONDS = 3600.0
+DEFAULT_MAX_ENTRIES = 4096
+# Tools whose calls change something outside the model's reply.
+SIDE_EFFECT_TOOLS = frozenset(
+    tool.name
+    for tool in (
+        order_book,
+        issue_library_card,
+        add_household_member,
+        request_library_event,
+        save_conversation_state,
+    )
+)
+STATE_TOOL = save_conversation_state.name
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def canonical_state(value: Any) -> Any:
+    """``value`` without empty fields and with whitespace collapsed."""
+    if isinstance(value, str):
+        return _WHITESPACE_RE.sub(" ", value.strip())
+    if isinstance(value, dict):
+        items = ((key, canonical_state(item)) for key, item in value.items())
+        return {key: item for key, item in items if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [canonical_state(item) for item in value]
+    return value
+
+
+def _function_responses(content: dict[str, Any]) -> list[dict[str, Any]]:
+    parts = content.get("parts", ())
+    return [part["function_response"] for part in parts if "function_response" in part]
+
+
+def cache_key(llm_request: LlmRequest) -> str:
+    """Hex digest of the normalized prompt and the state it shows the model."""
+    canonical = canonical_request(llm_request, mask=mask_timestamps)
+    for content in canonical["contents"]:
+        for response in _function_responses(content):
+            if response.get("name") == STATE_TOOL:
+                response["response"] = canonical_state(response.get("response"))
+    return digest(canonical).hex()
+
+
+def _answers_side_effect(llm_request: LlmRequest) -> bool:
+    if not llm_request.contents:
+        return False
+    parts = llm_request.contents[-1].parts or ()
+    return any(
+        part.function_response and part.function_response.name in SIDE_EFFECT_TOOLS
+        for part in parts
+    )
+
+
+def _cacheable(responses: list[LlmResponse]) -> bool:
+    if not responses:
+        return False
+    for response in responses:
+        if response.error_code or response.interrupted or response.content is None:
+            return False
+        for part in response.content.parts or ():
+            if part.function_call and part.function_call.name in SIDE_EFFECT_TOOLS:
+                return False
+            if part.text and has_volatile(part.text):
+                return False
+    return True
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    skipped: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CachingLlm(BaseLlm):
+    """Model wrapper that answers repeated prompts from a ``DedupCache``."""
+
+    inner: BaseLlm
+    # Calls that bypassed the cache because they answer a side-effecting tool.
+    skipped: int = 0
+
+    _cache: DedupCache = PrivateAttr()
+
+    def __init__(self, *, cache: DedupCache, **data) -> None:
+        if "model" not in data and data.get("inner") is not None:
+            data["model"] = data["inner"].model
+        super().__init__(**data)
+        self._cache = cache
+
+    @property
+    def stats(self) -> CacheStats:
+        """Counters of the shared cache, plus this client's skipped calls."""
+        return CacheStats(self._cache.hits, self._cache.misses, self.skipped)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if _answers_side_effect(llm_request):
+            self.skipped += 1
+            async for response in self.inner.generate_content_async(llm_request, stream):
+                yield response
+            return
+        key = f"{int(stream)}:{cache_key(llm_request)}"
+        cached = self._cache.get(key)
+        if cached is not None:
+            for item in json.loads(cached):
+                yield LlmResponse.model_validate(item)
+            return
+        responses = []
+        async for response in self.inner.generate_content_async(llm_request, stream):
+            responses.append(response)
+            yield response
+        if _cacheable(responses):
+            dumped = [response.model_dump(mode="json", exclude_none=True) for response in responses]
+            self._cache.put(key, json.dumps(dumped, separators=(",", ":")))
+
+
+_response_cache: DedupCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> DedupCache:
+    """Return the process-wide cache, configured from the environment."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = DedupCache(
+                    name="response_cache",
+                    ttl_seconds=float(
+                        os.getenv("LIBRARY_RESPONSE_CACHE_TTL", DEFAULT_TTL_SECONDS)
+                    ),
+                    max_entries=int(
+                        os.getenv("LIBRARY_RESPONSE_CACHE_SIZE", DEFAULT_MAX_ENTRIES)
+                    ),
+                    path=os.getenv("LIBRARY_RESPONSE_CACHE_DB"),
+                )
+    return _response_cache
+
+
+def set_response_cache(cache: DedupCache | None) -> None:
+    global _response_cache
+    _response_cache = cache
@@ -0,0 +1,137 @@
+"""Service catalog and intent detection for the root concierge.
+
+Each ``Service`` ties a librarian subagent to its `ConversationState`
+section, its question-bank tool key and the question/confirmation blocks
+the root agent needs while collecting data for it. ``resolve_intents``
+decides which services a conversation is about, so the root instruction
+can carry only their blocks.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping
+
+from library_agent.subagents import (
+    book_order,
+    book_recommendation,
+    card_services,
+    household_link,
+    programming,
+)
+from library_agent.tools.tools import load_conversation_state
+
+
+@dataclass(frozen=True)
+class Service:
+    key: str
+    agent_name: str
+    description: str
+    state_field: str
+    tool_key: str
+    # Renderers, so edits to the question bank show up without a restart.
+    requirements: Callable[[], str]
+    confirmation: Callable[[], str]
+
+
+def _service(key: str, state_field: str, tool_key: str, module: Any) -> Service:
+    return Service(
+        key=key,
+        agent_name=module.AGENT_NAME,
+        description=module.DESCRIPTION,
+        state_field=state_field,
+        tool_key=tool_key,
+        requirements=module.root_requirements_section,
+        confirmation=module.root_confirmation_section,
+    )
+
+
+SERVICES: tuple[Service, ...] = (
+    _service("recommendation", "recommendation", "recommend_books", book_recommendation),
+    _service("book_order", "book_order", "order_book", book_order),
+    _service("card_request", "card_request", "issue_library_card", card_services),
+    _service("household_request", "household_request", "add_household_member", household_link),
+    _service("event_request", "event_request", "request_library_event", programming),
+)
+SERVICES_BY_KEY = {service.key: service for service in SERVICES}
+
+# Weighted cues per service; the best-scoring services win. Specific phrases
+# outweigh generic verbs ("reserve a study room" is an event, not a hold).
+_CUES: dict[str, tuple[tuple[re.Pattern[str], float], ...]] = {
+    key: tuple((re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in cues)
+    for key, cues in {
+        "recommendation": (
+            (r"\brecommend\w*|\bsuggest\w*|\bsimilar to\b|\bread next\b", 2.0),
+            (r"\b(something|books?|titles?) (good |comforting |new )?to read\b", 2.0),
+            (r"\bi (love|like|enjoy)\b|\bin the mood\b|\bgenres?\b", 1.0),
+            (r"\b(?:mysteries|fantasy|romance|thrillers?|sci-?fi|memoirs?)\b", 0.5),
+        ),
+        "book_order": (
+            (r"\b(order|purchase|buy|place a hold|put .* on hold)\b", 2.0),
+            (r"\b(hardcover|paperback|audiobook|e-?book|copy of)\b", 1.0),
+            (r"\b(reserve|hold|vendor)\b", 0.5),
+        ),
+        "card_request": (
+            (r"\b(new|family|replacement|first) (library )?card\b", 2.0),
+            (r"\b(sign(ing)? up|register|apply) for\b|\bget a (library )?card\b", 2.0),
+            (r"\blost (my )?card\b", 1.5),
+        ),
+        "household_request": (
+            (r"\badd (my )?(\w+ )?(sister|brother|son|daughter|spouse|partner|wife|husband|child|kid|mom|dad|mother|father|grand\w+|roommate|member)\b", 3.0),
+            (r"\b(link|attach|add) \w+( \w+)? to (my |our |the )?(card|account)\b", 2.5),
+            (r"\bhousehold (member|add|link)", 1.5),
+        ),
+        "event_request": (
+            (r"\b(study|meeting|community) room\b|\bbook club\b|\bstory ?time\b", 3.0),
+            (r"\b(event|program|workshop|reading|class|space|venue)s?\b", 1.0),
+            (r"\b(host|book|reserve) (a|the|our)\b", 0.5),
+        ),
+    }.items()
+}
+
+
+def cue_scores(text: str) -> dict[str, float]:
+    """Return the summed cue weights matched by ``text`` for every service."""
+    return {
+        key: sum(weight for pattern, weight in cues if pattern.search(text))
+        for key, cues in _CUES.items()
+    }
+
+
+def detect_intents(text: str) -> tuple[str, ...]:
+    """Return the best-matching service keys for ``text`` (empty if none)."""
+    scores = cue_scores(text)
+    best = max(scores.values())
+    if best <= 0:
+        return ()
+    return tuple(key for key in SERVICES_BY_KEY if scores[key] == best)
+
+
+def intents_from_state(state: Mapping[str, Any]) -> tuple[str, ...]:
+    """Return the services whose `ConversationState` section has data."""
+    conversation = load_conversation_state(state)
+    return tuple(
+        service.key for service in SERVICES if conversation.get(service.state_field)
+    )
+
+
+def resolve_intents(
+    state: Mapping[str, Any], user_texts: Iterable[str]
+) -> tuple[str, ...]:
+    """Pick the services a conversation is about.
+
+    The newest user message that mentions a service wins (patrons switch
+    topics); otherwise the sections already saved in state decide.
+    """
+    texts = list(user_texts)
+    latest = detect_intents(texts[-1]) if texts else ()
+    if latest:
+        return latest
+    saved = intents_from_state(state)
+    if saved:
+        return saved
+    for text in reversed(texts[:-1]):
+        earlier = detect_intents(text)
+        if earlier:
+            return earlier
+    return ()
@@ -0,0 +1,143 @@
+"""Local stand-in model that replays scripted responses with simulated latency.
+
+``ScriptedLlm`` is a ``BaseLlm``, so it plugs into any subagent's
+``create_agent(model)``. To run ``root_agent`` on it, install a model pool
+that hands it out for every model name before importing
+``library_agent.agent``::
+
+    set_model_pool(ModelPool(lambda _name: llm))
+
+A script maps an agent name to its steps. Each step is one model response:
+a text reply or a single function call (``transfer_to_agent`` included).
+Steps play in order, one per model call. The position is the number of
+responses that agent already has in the request history, so one model can
+serve any number of concurrent sessions without a per-session cursor. Once
+an agent's steps run out it answers with ``default_text``.
+
+Each call sleeps for a sample from its latency model. That sleep is added to
+the ``model_time`` accumulator, so a load test can separate model time from
+framework overhead.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import math
+import random
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable, Mapping, Sequence
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import PrivateAttr
+
+# Label ADK puts on every request with the calling agent's name.
+AGENT_LABEL = "adk_agent_name"
+
+Args = Mapping[str, Any] | Callable[[LlmRequest], Mapping[str, Any]]
+
+
+@dataclass(frozen=True)
+class Step:
+    """One scripted model response: ``text`` or a call to ``tool``."""
+
+    text: str | None = None
+    tool: str | None = None
+    args: Args | None = None
+
+    def __post_init__(self) -> None:
+        if (self.text is None) == (self.tool is None):
+            raise ValueError("A step needs exactly one of text or tool")
+
+    def content(self, llm_request: LlmRequest) -> types.Content:
+        if self.tool is None:
+            return types.Content(role="model", parts=[types.Part(text=self.text)])
+        args = self.args(llm_request) if callable(self.args) else self.args
+        call = types.FunctionCall(name=self.tool, args=dict(args or {}))
+        return types.Content(role="model", parts=[types.Part(function_call=call)])
+
+
+def transfer(agent_name: str) -> Step:
+    return Step(tool="transfer_to_agent", args={"agent_name": agent_name})
+
+
+@dataclass(frozen=True)
+class Latency:
+    """Per-call latency in seconds: ``constant``, ``uniform`` or ``lognormal``.
+
+    ``lognormal`` takes the median and the sigma of the underlying normal,
+    which gives the long right tail real model latencies have.
+    """
+
+    kind: str = "constant"
+    a: float = 0.0
+    b: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "constant":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        raise ValueError(f"Unknown latency kind '{self.kind}'")
+
+    @classmethod
+    def parse(cls, spec: str) -> Latency:
+        """Parse ``"0.2"``, ``"uniform:0.1,0.4"`` or ``"lognormal:0.8,0.5"``."""
+        kind, _, params = spec.rpartition(":")
+        values = [float(value) for value in params.split(",")]
+        latency = cls(kind or "constant", *values)
+        latency.sample(random.Random(0))  # reject unknown kinds up front
+        return latency
+
+
+# Seconds spent in simulated model calls; the load test sets a fresh list per turn.
+model_time: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar(
+    "model_time", default=None
+)
+
+
+def _responses_so_far(llm_request: LlmRequest) -> int:
+    # ADK keeps the calling agent's own turns as "model" content and rewrites
+    # other agents' turns as user-side context, so this counts only ours.
+    return sum(1 for content in llm_request.contents if content.role == "model")
+
+
+class ScriptedLlm(BaseLlm):
+    """``BaseLlm`` that replays ``script`` after sampling ``latency``."""
+
+    model: str = "scripted"
+    script: Mapping[str, Sequence[Step]] = {}
+    latency: Latency = Latency()
+    default_text: str = "Is there anything else I can help you with?"
+    seed: int | None = None
+    calls: int = 0
+
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, _context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    def respond(self, llm_request: LlmRequest) -> types.Content:
+        """Return the scripted response for ``llm_request`` without waiting."""
+        agent_name = (llm_request.config.labels or {}).get(AGENT_LABEL, "")
+        steps = self.script.get(agent_name, ())
+        position = _responses_so_far(llm_request)
+        if position < len(steps):
+            return steps[position].content(llm_request)
+        return Step(text=self.default_text).content(llm_request)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        delay = self.latency.sample(self._rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        spent = model_time.get()
+        if spent is not None:
+            spent.append(delay)
+        yield LlmResponse(content=self.respond(llm_request))
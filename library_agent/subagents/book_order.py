@@ -1,49 +1,83 @@
 """Book order agent configuration."""
 from google.adk import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 
 from library_agent.tools.question_bank import (
     format_confirmation_checklist,
     format_question_collection,
+    get_registry,
 )
-from library_agent.tools.tools import order_book, save_conversation_state
-
-COLLECTION_SECTION = format_question_collection(
-    "order_book",
-    heading="Collect details to populate BookOrderRequest:",
-)
-ROOT_REQUIREMENTS_SECTION = format_question_collection(
-    "order_book",
-    heading="- Book orders (BookOrderRequest):",
-    heading_indent="   ",
-    bullet_indent="     ",
-)
-CONFIRMATION_SECTION = format_confirmation_checklist(
-    "order_book",
-    heading="Before using `order_book`, confirm:",
-)
-ROOT_CONFIRMATION_SECTION = format_confirmation_checklist(
-    "order_book",
-    heading="   Book order confirmation checklist:",
-    bullet_indent="     ",
-    closing_line="   Require a clear yes before submitting.",
+from library_agent.tools.tools import (
+    order_book,
+    list_missing_fields,
+    save_conversation_state,
 )
+
+
+def collection_section() -> str:
+    return format_question_collection(
+        "order_book",
+        heading="Collect details to populate BookOrderRequest:",
+    )
+
+
+def root_requirements_section() -> str:
+    return format_question_collection(
+        "order_book",
+        heading="- Book orders (BookOrderRequest):",
+        heading_indent="   ",
+        bullet_indent="     ",
+    )
+
+
+def confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "order_book",
+        heading="Before using `order_book`, confirm:",
+    )
+
+
+def root_confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "order_book",
+        heading="   Book order confirmation checklist:",
+        bullet_indent="     ",
+        closing_line="   Require a clear yes before submitting.",
+    )
+
+
 STATE_SAVE_INSTRUCTION = (
     "When book-order inputs are confirmed, call `save_conversation_state` with "
     "`book_order` filled out."
 )
+MISSING_FIELDS_INSTRUCTION = (
+    "Call `list_missing_fields` with section `book_order` to see which required "
+    "details are still missing, and ask only for those."
+)
+AGENT_NAME = "book_order_agent"
+DESCRIPTION = "Places holds or purchase requests for titles the library will provide."
 
 
-def create_agent(model) -> Agent:
-    return Agent(
-        name="book_order_agent",
-        model=model,
-        description="Places holds or purchase requests for titles the library will provide.",
-        instruction=f"""
+def instruction(_context: ReadonlyContext | None = None) -> str:
+    """Instruction provider; re-rendered only when the question bank changes."""
+    return get_registry().memo(
+        ("instruction", AGENT_NAME),
+        lambda _bank: f"""
 Use `order_book` to log a request for a specific title/format.
-{COLLECTION_SECTION}
+{collection_section()}
 {STATE_SAVE_INSTRUCTION}
-{CONFIRMATION_SECTION}
+{MISSING_FIELDS_INSTRUCTION}
+{confirmation_section()}
 Confirm availability expectations (could be hold or purchase) and share the request_id plus next notification steps.
 """,
-        tools=[order_book, save_conversation_state],
+    )
+
+
+def create_agent(model) -> Agent:
+    return Agent(
+        name=AGENT_NAME,
+        model=model,
+        description=DESCRIPTION,
+        instruction=instruction,
+        tools=[order_book, save_conversation_state, list_missing_fields],
     )
@@ -1,51 +1,85 @@
 """Book recommendation specialist agent."""
 from google.adk import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 
 from library_agent.tools.question_bank import (
     format_confirmation_checklist,
     format_question_collection,
+    get_registry,
 )
-from library_agent.tools.tools import recommend_books, save_conversation_state
-
-COLLECTION_SECTION = format_question_collection(
-    "recommend_books",
-    heading="Collect details to populate BookRecommendationRequest:",
-)
-ROOT_REQUIREMENTS_SECTION = format_question_collection(
-    "recommend_books",
-    heading="- Recommendations (BookRecommendationRequest):",
-    heading_indent="   ",
-    bullet_indent="     ",
-)
-CONFIRMATION_SECTION = format_confirmation_checklist(
-    "recommend_books",
-    heading="Before using `recommend_books`, confirm:",
-)
-ROOT_CONFIRMATION_SECTION = format_confirmation_checklist(
-    "recommend_books",
-    heading="   Recommendations confirmation checklist:",
-    bullet_indent="     ",
-    closing_line="   Require the patron to affirm accuracy before routing.",
+from library_agent.tools.tools import (
+    recommend_books,
+    list_missing_fields,
+    save_conversation_state,
 )
+
+
+def collection_section() -> str:
+    return format_question_collection(
+        "recommend_books",
+        heading="Collect details to populate BookRecommendationRequest:",
+    )
+
+
+def root_requirements_section() -> str:
+    return format_question_collection(
+        "recommend_books",
+        heading="- Recommendations (BookRecommendationRequest):",
+        heading_indent="   ",
+        bullet_indent="     ",
+    )
+
+
+def confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "recommend_books",
+        heading="Before using `recommend_books`, confirm:",
+    )
+
+
+def root_confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "recommend_books",
+        heading="   Recommendations confirmation checklist:",
+        bullet_indent="     ",
+        closing_line="   Require the patron to affirm accuracy before routing.",
+    )
+
+
 STATE_SAVE_INSTRUCTION = (
     "After the patron approves the plan, call `save_conversation_state` with "
     "the `recommendation` field set to the BookRecommendationRequest payload, "
     "so peers can reuse it."
 )
+MISSING_FIELDS_INSTRUCTION = (
+    "Call `list_missing_fields` with section `recommendation` to see which required "
+    "details are still missing, and ask only for those."
+)
+AGENT_NAME = "book_recommendation_agent"
+DESCRIPTION = "Curates personalized reading lists for patrons."
 
 
-def create_agent(model) -> Agent:
-    return Agent(
-        name="book_recommendation_agent",
-        model=model,
-        description="Curates personalized reading lists for patrons.",
-        instruction=f"""
+def instruction(_context: ReadonlyContext | None = None) -> str:
+    """Instruction provider; re-rendered only when the question bank changes."""
+    return get_registry().memo(
+        ("instruction", AGENT_NAME),
+        lambda _bank: f"""
 Primary action: call `recommend_books` once per patron request.
-{COLLECTION_SECTION}
+{collection_section()}
 {STATE_SAVE_INSTRUCTION}
-{CONFIRMATION_SECTION}
+{MISSING_FIELDS_INSTRUCTION}
+{confirmation_section()}
 Map conversation data into the BookRecommendationRequest schema before invoking the tool.
 After receiving results, explain the suggestions, cite any follow-up actions (holds, waitlists), and invite feedback.
 """,
-        tools=[recommend_books, save_conversation_state],
+    )
+
+
+def create_agent(model) -> Agent:
+    return Agent(
+        name=AGENT_NAME,
+        model=model,
+        description=DESCRIPTION,
+        instruction=instruction,
+        tools=[recommend_books, save_conversation_state, list_missing_fields],
     )
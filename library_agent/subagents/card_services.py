@@ -1,49 +1,86 @@
 """Card services agent configuration."""
 from google.adk import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 
+from library_agent.agent_registry import get_model_pool
 from library_agent.tools.question_bank import (
     format_confirmation_checklist,
     format_question_collection,
+    get_registry,
 )
-from library_agent.tools.tools import issue_library_card, save_conversation_state
-
-COLLECTION_SECTION = format_question_collection(
-    "issue_library_card",
-    heading="Collect details to populate CardRequest:",
-)
-ROOT_REQUIREMENTS_SECTION = format_question_collection(
-    "issue_library_card",
-    heading="- New cards (CardRequest):",
-    heading_indent="   ",
-    bullet_indent="     ",
-)
-CONFIRMATION_SECTION = format_confirmation_checklist(
-    "issue_library_card",
-    heading="Before using `issue_library_card`, confirm:",
-)
-ROOT_CONFIRMATION_SECTION = format_confirmation_checklist(
-    "issue_library_card",
-    heading="   Card enrollment confirmation checklist:",
-    bullet_indent="     ",
-    closing_line="   Make sure they explicitly approve issuing the card.",
+from library_agent.tools.tools import (
+    issue_library_card,
+    list_missing_fields,
+    save_conversation_state,
 )
+
+
+def collection_section() -> str:
+    return format_question_collection(
+        "issue_library_card",
+        heading="Collect details to populate CardRequest:",
+    )
+
+
+def root_requirements_section() -> str:
+    return format_question_collection(
+        "issue_library_card",
+        heading="- New cards (CardRequest):",
+        heading_indent="   ",
+        bullet_indent="     ",
+    )
+
+
+def confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "issue_library_card",
+        heading="Before using `issue_library_card`, confirm:",
+    )
+
+
+def root_confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "issue_library_card",
+        heading="   Card enrollment confirmation checklist:",
+        bullet_indent="     ",
+        closing_line="   Make sure they explicitly approve issuing the card.",
+    )
+
+
 STATE_SAVE_INSTRUCTION = (
     "Persist card-enrollment details via `save_conversation_state` by passing "
     "a `card_request` object once confirmed."
 )
+MISSING_FIELDS_INSTRUCTION = (
+    "Call `list_missing_fields` with section `card_request` to see which required "
+    "details are still missing, and ask only for those."
+)
+AGENT_NAME = "card_services_agent"
+MODEL = "gemini-2.5-flash"
+DESCRIPTION = "Issues new library cards for individuals or households."
 
 
-def create_agent(_default_model) -> Agent:
-    return Agent(
-        name="card_services_agent",
-        model="gemini-2.5-flash",
-        description="Issues new library cards for individuals or households.",
-        instruction=f"""
+def instruction(_context: ReadonlyContext | None = None) -> str:
+    """Instruction provider; re-rendered only when the question bank changes."""
+    return get_registry().memo(
+        ("instruction", AGENT_NAME),
+        lambda _bank: f"""
 Use `issue_library_card` whenever a patron needs a new card.
-{COLLECTION_SECTION}
+If its status is `household_full`, relay its `message` and offer to issue fewer household cards.
+{collection_section()}
 {STATE_SAVE_INSTRUCTION}
-{CONFIRMATION_SECTION}
+{MISSING_FIELDS_INSTRUCTION}
+{confirmation_section()}
 Remind patrons that temporary PINs expire in 72 hours and explain pickup/verification requirements.
 """,
-        tools=[issue_library_card, save_conversation_state],
+    )
+
+
+def create_agent(_default_model) -> Agent:
+    return Agent(
+        name=AGENT_NAME,
+        model=get_model_pool().get(MODEL),
+        description=DESCRIPTION,
+        instruction=instruction,
+        tools=[issue_library_card, save_conversation_state, list_missing_fields],
     )
@@ -1,49 +1,84 @@
 """Household link agent configuration."""
 from google.adk import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 
 from library_agent.tools.question_bank import (
     format_confirmation_checklist,
     format_question_collection,
+    get_registry,
 )
-from library_agent.tools.tools import add_household_member, save_conversation_state
-
-COLLECTION_SECTION = format_question_collection(
-    "add_household_member",
-    heading="Collect details to populate HouseholdAddRequest:",
-)
-ROOT_REQUIREMENTS_SECTION = format_question_collection(
-    "add_household_member",
-    heading="- Household additions (HouseholdAddRequest):",
-    heading_indent="   ",
-    bullet_indent="     ",
-)
-CONFIRMATION_SECTION = format_confirmation_checklist(
-    "add_household_member",
-    heading="Before using `add_household_member`, confirm:",
-)
-ROOT_CONFIRMATION_SECTION = format_confirmation_checklist(
-    "add_household_member",
-    heading="   Household addition confirmation checklist:",
-    bullet_indent="     ",
-    closing_line="   Confirm the primary cardholder authorizes the change.",
+from library_agent.tools.tools import (
+    add_household_member,
+    list_missing_fields,
+    save_conversation_state,
 )
+
+
+def collection_section() -> str:
+    return format_question_collection(
+        "add_household_member",
+        heading="Collect details to populate HouseholdAddRequest:",
+    )
+
+
+def root_requirements_section() -> str:
+    return format_question_collection(
+        "add_household_member",
+        heading="- Household additions (HouseholdAddRequest):",
+        heading_indent="   ",
+        bullet_indent="     ",
+    )
+
+
+def confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "add_household_member",
+        heading="Before using `add_household_member`, confirm:",
+    )
+
+
+def root_confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "add_household_member",
+        heading="   Household addition confirmation checklist:",
+        bullet_indent="     ",
+        closing_line="   Confirm the primary cardholder authorizes the change.",
+    )
+
+
 STATE_SAVE_INSTRUCTION = (
     "Store household-linking info with `save_conversation_state` under the "
     "`household_request` field after approval."
 )
+MISSING_FIELDS_INSTRUCTION = (
+    "Call `list_missing_fields` with section `household_request` to see which required "
+    "details are still missing, and ask only for those."
+)
+AGENT_NAME = "household_link_agent"
+DESCRIPTION = "Adds an additional reader to an existing library account."
 
 
-def create_agent(model) -> Agent:
-    return Agent(
-        name="household_link_agent",
-        model=model,
-        description="Adds an additional reader to an existing library account.",
-        instruction=f"""
+def instruction(_context: ReadonlyContext | None = None) -> str:
+    """Instruction provider; re-rendered only when the question bank changes."""
+    return get_registry().memo(
+        ("instruction", AGENT_NAME),
+        lambda _bank: f"""
 Call `add_household_member` to attach someone to an existing library card.
-{COLLECTION_SECTION}
+If its status is `already_linked` or `household_full`, relay its `message` instead of a confirmation.
+{collection_section()}
 {STATE_SAVE_INSTRUCTION}
-{CONFIRMATION_SECTION}
+{MISSING_FIELDS_INSTRUCTION}
+{confirmation_section()}
 Confirm that the primary cardholder approves the addition and summarize any pending ID checks.
 """,
-        tools=[add_household_member, save_conversation_state],
+    )
+
+
+def create_agent(model) -> Agent:
+    return Agent(
+        name=AGENT_NAME,
+        model=model,
+        description=DESCRIPTION,
+        instruction=instruction,
+        tools=[add_household_member, save_conversation_state, list_missing_fields],
     )
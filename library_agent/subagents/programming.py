@@ -1,49 +1,85 @@
 """Programming/event request agent configuration."""
 from google.adk import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 
 from library_agent.tools.question_bank import (
     format_confirmation_checklist,
     format_question_collection,
+    get_registry,
 )
-from library_agent.tools.tools import request_library_event, save_conversation_state
-
-COLLECTION_SECTION = format_question_collection(
-    "request_library_event",
-    heading="Collect details to populate EventRequest:",
-)
-ROOT_REQUIREMENTS_SECTION = format_question_collection(
-    "request_library_event",
-    heading="- Event or space requests (EventRequest):",
-    heading_indent="   ",
-    bullet_indent="     ",
-)
-CONFIRMATION_SECTION = format_confirmation_checklist(
-    "request_library_event",
-    heading="Before using `request_library_event`, confirm:",
-)
-ROOT_CONFIRMATION_SECTION = format_confirmation_checklist(
-    "request_library_event",
-    heading="   Event or space confirmation checklist:",
-    bullet_indent="     ",
-    closing_line="   Get an explicit go/no-go before forwarding to programming.",
+from library_agent.tools.tools import (
+    request_library_event,
+    list_missing_fields,
+    save_conversation_state,
 )
+
+
+def collection_section() -> str:
+    return format_question_collection(
+        "request_library_event",
+        heading="Collect details to populate EventRequest:",
+    )
+
+
+def root_requirements_section() -> str:
+    return format_question_collection(
+        "request_library_event",
+        heading="- Event or space requests (EventRequest):",
+        heading_indent="   ",
+        bullet_indent="     ",
+    )
+
+
+def confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "request_library_event",
+        heading="Before using `request_library_event`, confirm:",
+    )
+
+
+def root_confirmation_section() -> str:
+    return format_confirmation_checklist(
+        "request_library_event",
+        heading="   Event or space confirmation checklist:",
+        bullet_indent="     ",
+        closing_line="   Get an explicit go/no-go before forwarding to programming.",
+    )
+
+
 STATE_SAVE_INSTRUCTION = (
     "Write the confirmed programming inputs by calling `save_conversation_state` "
     "with `event_request`."
 )
+MISSING_FIELDS_INSTRUCTION = (
+    "Call `list_missing_fields` with section `event_request` to see which required "
+    "details are still missing, and ask only for those."
+)
+AGENT_NAME = "events_agent"
+DESCRIPTION = "Handles library-hosted program and space requests."
 
 
-def create_agent(model) -> Agent:
-    return Agent(
-        name="events_agent",
-        model=model,
-        description="Handles library-hosted program and space requests.",
-        instruction=f"""
+def instruction(_context: ReadonlyContext | None = None) -> str:
+    """Instruction provider; re-rendered only when the question bank changes."""
+    return get_registry().memo(
+        ("instruction", AGENT_NAME),
+        lambda _bank: f"""
 Use `request_library_event` for book clubs, readings, study rooms, or community events.
-{COLLECTION_SECTION}
+{collection_section()}
 {STATE_SAVE_INSTRUCTION}
-{CONFIRMATION_SECTION}
+{MISSING_FIELDS_INSTRUCTION}
+{confirmation_section()}
 Return the tool's status and outline what follow-up the programming team will send.
+If its status is `over_capacity`, relay its `message` and offer to split the event.
+If a "received" response carries a `message`, relay it and ask for a future date.
 """,
-        tools=[request_library_event, save_conversation_state],
+    )
+
+
+def create_agent(model) -> Agent:
+    return Agent(
+        name=AGENT_NAME,
+        model=model,
+        description=DESCRIPTION,
+        instruction=instruction,
+        tools=[request_library_event, save_conversation_state, list_missing_fields],
     )
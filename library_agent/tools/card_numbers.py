@@ -0,0 +1,191 @@
+"""Library card numbers leased in blocks, with Luhn check digits.
+
+A card number is ``CARD-`` followed by 14 digits: the patron-barcode type
+digit ``2``, a 12-digit serial and a Luhn check digit, so a mistyped digit
+or a swap of neighbouring digits is caught before any lookup. Serials come
+from a ``BlockSource`` in blocks of ``block_size``. Each allocator only goes
+back to the source when its block runs out, so issuing a card is usually
+just an increment under a local lock.
+
+``SQLiteBlockSource`` keeps the next free serial in a one-row table and
+leases under ``BEGIN IMMEDIATE``, so every process sharing the database gets
+disjoint blocks. Without a database, ``WorkerBlockSource`` splits the serial
+space by the worker id ``ids.py`` leases to the process; see its docstring.
+``MemoryBlockSource`` is for a single process (and tests).
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Protocol
+
+from library_agent.tools.ids import EPOCH_MS, MAX_WORKER_ID, get_allocator, worker_lock_dir
+
+PREFIX = "CARD-"
+TYPE_DIGIT = "2"
+SERIAL_DIGITS = 12
+MAX_SERIAL = 10**SERIAL_DIGITS - 1
+DEFAULT_BLOCK_SIZE = 1000
+# Serials owned by each worker id: 976,562,500, about 31 years of seconds.
+WORKER_SPAN = (MAX_SERIAL + 1) // (MAX_WORKER_ID + 1)
+
+
+def luhn_check_digit(digits: str) -> str:
+    """Return the Luhn digit that makes ``digits + check`` valid."""
+    total = 0
+    for position, char in enumerate(reversed(digits)):
+        value = ord(char) - 48
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str(-total % 10)
+
+
+def format_card_number(serial: int) -> str:
+    if not 0 <= serial <= MAX_SERIAL:
+        raise ValueError(f"Card serial out of range: {serial}")
+    body = f"{TYPE_DIGIT}{serial:0{SERIAL_DIGITS}d}"
+    return f"{PREFIX}{body}{luhn_check_digit(body)}"
+
+
+def is_valid_card_number(card_number: str) -> bool:
+    digits = card_number.removeprefix(PREFIX)
+    if len(digits) != SERIAL_DIGITS + 2 or not digits.isdigit():
+        return False
+    return luhn_check_digit(digits[:-1]) == digits[-1]
+
+
+class BlockSource(Protocol):
+    def lease(self, size: int) -> range:
+        """Reserve ``size`` consecutive serials no other caller will receive."""
+        ...
+
+
+class MemoryBlockSource:
+    """Process-local block source."""
+
+    def __init__(self, start: int = 1) -> None:
+        self._next = start
+        self._lock = threading.Lock()
+
+    def lease(self, size: int) -> range:
+        with self._lock:
+            start, self._next = self._next, self._next + size
+        return range(start, start + size)
+
+
+class WorkerBlockSource:
+    """Block source partitioned by the worker id leased in ``ids.py``.
+
+    Worker ``w`` owns serials ``w * WORKER_SPAN`` up to the next worker's
+    range, and processes on a host never hold the same worker id at once.
+    Within its range a block never starts below the seconds elapsed since
+    ``EPOCH_MS``, and the end of the last block is kept in a mark file next
+    to the worker lock files, so a process that later leases the same id
+    continues after it. If the mark file is lost, the clock floor still
+    keeps the ranges apart unless a worker issued more than one card per
+    second since its last lease.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(
+        self, lock_dir: str | Path | None = None, *, clock: Callable[[], float] = time.time
+    ) -> None:
+        self._lock_dir = lock_dir
+        self._clock = clock
+
+    def _mark_path(self, worker_id: int) -> Path:
+        return worker_lock_dir(self._lock_dir) / f"card-serials-{worker_id}.mark"
+
+    def lease(self, size: int) -> range:
+        # Read per lease: a forked child leases a new worker id.
+        worker_id = get_allocator().worker_id
+        path = self._mark_path(worker_id)
+        with self._lock:
+            try:
+                mark = int(path.read_text(encoding="ascii"))
+            except (OSError, ValueError):
+                mark = 0
+            start = max(mark, int(self._clock() - EPOCH_MS / 1000))
+            if start + size > WORKER_SPAN:
+                raise RuntimeError(f"Card serials for worker {worker_id} are exhausted")
+            temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            temporary.write_text(str(start + size), encoding="ascii")
+            os.replace(temporary, path)
+        base = worker_id * WORKER_SPAN
+        return range(base + start, base + start + size)
+
+
+class SQLiteBlockSource:
+    """Block source shared by every process using the same database file."""
+
+    def __init__(self, path: str | Path, *, name: str = "library_cards", start: int = 1) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS card_number_blocks ("
+            "name TEXT PRIMARY KEY, next_serial INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "INSERT OR IGNORE INTO card_number_blocks (name, next_serial) VALUES (?, ?)",
+            (name, start),
+        )
+
+    def lease(self, size: int) -> range:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                (start,) = self._db.execute(
+                    "SELECT next_serial FROM card_number_blocks WHERE name = ?", (self.name,)
+                ).fetchone()
+                self._db.execute(
+                    "UPDATE card_number_blocks SET next_serial = ? WHERE name = ?",
+                    (start + size, self.name),
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return range(start, start + size)
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class CardNumberAllocator:
+    """Hands out card numbers from blocks leased off a ``BlockSource``."""
+
+    def __init__(self, source: BlockSource, *, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
+        self.source = source
+        self.block_size = block_size
+        self.leases = 0
+        self._block = range(0)
+        self._position = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def allocate(self, count: int = 1) -> list[str]:
+        """Return ``count`` unused card numbers."""
+        serials: list[int] = []
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked child must not finish the parent's block.
+                self._block, self._position, self._pid = range(0), 0, os.getpid()
+            while len(serials) < count:
+                if self._position == len(self._block):
+                    self._block = self.source.lease(max(self.block_size, count - len(serials)))
+                    self._position = 0
+                    self.leases += 1
+                take = min(count - len(serials), len(self._block) - self._position)
+                serials.extend(self._block[self._position : self._position + take])
+                self._position += take
+        return [format_card_number(serial) for serial in serials]
@@ -0,0 +1,325 @@
+"""Local catalog search backing `recommend_books_action`.
+
+A catalog file (JSON lines, JSON array or CSV with ``title``, ``author``,
+``genres``, ``subjects`` and ``blurb`` columns) is tokenized into a BM25
+inverted index stored as CSR-style NumPy arrays. Each posting list is kept in
+impact order (highest BM25 weight first, catalog order on ties), so a query
+only accumulates the head of every list into a score vector before taking the
+top-k with ``argpartition``. Query cost is bounded by the number of query terms
+rather than by catalog size, at the price of ignoring the low-impact tail of
+very common terms.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import re
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+
+GENRE_WEIGHT = 2.0
+GENRE_WORD_WEIGHT = 0.5
+MOOD_WEIGHT = 1.0
+READ_GENRE_WEIGHT = 0.75
+READ_SUBJECT_WEIGHT = 0.5
+MAX_POSTINGS_PER_TERM = 5000
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+_LIST_SPLIT_RE = re.compile(r"[|;]")
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    title: str
+    author: str = ""
+    genres: tuple[str, ...] = ()
+    subjects: tuple[str, ...] = ()
+    blurb: str = ""
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _words(text: str) -> list[str]:
+    return [_stem(word) for word in _TOKEN_RE.findall(text.lower())]
+
+
+def _tag(text: str) -> str:
+    return " ".join(_words(text))
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(_TOKEN_RE.findall(title.lower()))
+
+
+def _split_list(value: Any) -> tuple[str, ...]:
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = _LIST_SPLIT_RE.split(value)
+    return tuple(item.strip() for item in value if item and item.strip())
+
+
+def _entry_from_record(record: dict[str, Any]) -> CatalogEntry:
+    return CatalogEntry(
+        title=str(record["title"]).strip(),
+        author=str(record.get("author") or "").strip(),
+        genres=_split_list(record.get("genres")),
+        subjects=_split_list(record.get("subjects")),
+        blurb=str(record.get("blurb") or ""),
+    )
+
+
+def load_catalog(path: str | Path) -> list[CatalogEntry]:
+    """Read catalog entries from a ``.jsonl``, ``.json`` or ``.csv`` file."""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Catalog file not found: {path}")
+    with path.open("r", encoding="utf-8", newline="") as fh:
+        if path.suffix == ".csv":
+            records: Iterable[dict[str, Any]] = csv.DictReader(fh)
+        elif path.suffix == ".jsonl":
+            records = (json.loads(line) for line in fh if line.strip())
+        else:
+            records = json.load(fh)
+        return [_entry_from_record(record) for record in records]
+
+
+def _document_terms(entry: CatalogEntry) -> list[str]:
+    terms = [f"g:{_tag(genre)}" for genre in entry.genres]
+    terms.extend(f"s:{_tag(subject)}" for subject in entry.subjects)
+    for text in (entry.title, entry.author, entry.blurb, *entry.genres, *entry.subjects):
+        terms.extend(_words(text))
+    return terms
+
+
+class CatalogIndex:
+    """BM25 inverted index over a catalog held in NumPy arrays."""
+
+    def __init__(
+        self,
+        titles: Sequence[str],
+        authors: Sequence[str],
+        vocabulary: dict[str, int],
+        term_ptr: np.ndarray,
+        doc_ids: np.ndarray,
+        weights: np.ndarray,
+        tag_ptr: np.ndarray,
+        tag_terms: np.ndarray,
+    ) -> None:
+        self.titles = list(titles)
+        self.authors = list(authors)
+        self.vocabulary = vocabulary
+        self.term_ptr = term_ptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.tag_ptr = tag_ptr
+        self.tag_terms = tag_terms
+        self._genre_terms = {
+            term_id for term, term_id in vocabulary.items() if term.startswith("g:")
+        }
+        self._title_index: dict[str, int] = {}
+        for doc_id, title in enumerate(self.titles):
+            self._title_index.setdefault(normalize_title(title), doc_id)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @classmethod
+    def build(
+        cls, entries: Sequence[CatalogEntry], *, k1: float = 1.2, b: float = 0.75
+    ) -> "CatalogIndex":
+        vocabulary: dict[str, int] = {}
+        term_col = array("i")
+        doc_col = array("i")
+        tf_col = array("f")
+        tag_terms = array("i")
+        tag_ptr = array("q", [0])
+        lengths = np.zeros(len(entries), dtype=np.float32)
+        for doc_id, entry in enumerate(entries):
+            counts: dict[str, int] = {}
+            for term in _document_terms(entry):
+                counts[term] = counts.get(term, 0) + 1
+            lengths[doc_id] = sum(counts.values())
+            for term, count in counts.items():
+                term_id = vocabulary.setdefault(term, len(vocabulary))
+                term_col.append(term_id)
+                doc_col.append(doc_id)
+                tf_col.append(count)
+                if term[:2] in ("g:", "s:"):
+                    tag_terms.append(term_id)
+            tag_ptr.append(len(tag_terms))
+
+        terms = np.frombuffer(term_col, dtype=np.int32)
+        docs = np.frombuffer(doc_col, dtype=np.int32)
+        tf = np.frombuffer(tf_col, dtype=np.float32)
+        doc_freq = np.bincount(terms, minlength=len(vocabulary)).astype(np.float32)
+        term_ptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        term_ptr[1:] = np.cumsum(doc_freq, dtype=np.int64)
+        n_docs = max(len(entries), 1)
+        idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        avg_length = float(lengths.mean()) if len(entries) else 1.0
+        norm = k1 * (1.0 - b + b * lengths[docs] / max(avg_length, 1.0))
+        weights = (idf[terms] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+        # Group postings by term, highest impact first, catalog order on ties.
+        order = np.lexsort((docs, -weights, terms))
+        docs, weights = docs[order], weights[order]
+
+        return cls(
+            [entry.title for entry in entries],
+            [entry.author for entry in entries],
+            vocabulary,
+            term_ptr,
+            docs,
+            weights,
+            np.frombuffer(tag_ptr, dtype=np.int64).copy(),
+            np.frombuffer(tag_terms, dtype=np.int32).copy(),
+        )
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "CatalogIndex":
+        """Load a saved ``.npz`` index or build one from a catalog file."""
+        path = Path(path)
+        if path.suffix == ".npz":
+            return cls.load(path)
+        return cls.build(load_catalog(path))
+
+    def save(self, path: str | Path) -> None:
+        meta = json.dumps(
+            {
+                "titles": self.titles,
+                "authors": self.authors,
+                "vocabulary": self.vocabulary,
+            }
+        ).encode("utf-8")
+        np.savez(
+            path,
+            meta=np.frombuffer(meta, dtype=np.uint8),
+            term_ptr=self.term_ptr,
+            doc_ids=self.doc_ids,
+            weights=self.weights,
+            tag_ptr=self.tag_ptr,
+            tag_terms=self.tag_terms,
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CatalogIndex":
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            return cls(
+                meta["titles"],
+                meta["authors"],
+                meta["vocabulary"],
+                data["term_ptr"],
+                data["doc_ids"],
+                data["weights"],
+                data["tag_ptr"],
+                data["tag_terms"],
+            )
+
+    def find_title(self, title: str) -> int | None:
+        return self._title_index.get(normalize_title(title))
+
+    def display(self, doc_id: int) -> str:
+        author = self.authors[doc_id]
+        title = self.titles[doc_id]
+        return f"{title} by {author}" if author else title
+
+    def query_weights(
+        self,
+        favorite_genres: Iterable[str] = (),
+        mood: str | None = None,
+        seed_doc_ids: Iterable[int] = (),
+    ) -> dict[int, float]:
+        """Return weights keyed by term id for a recommendation request."""
+        weights: dict[int, float] = {}
+
+        def add(term: str, weight: float) -> None:
+            term_id = self.vocabulary.get(term)
+            if term_id is not None:
+                weights[term_id] = weights.get(term_id, 0.0) + weight
+
+        for genre in favorite_genres:
+            add(f"g:{_tag(genre)}", GENRE_WEIGHT)
+            for word in _words(genre):
+                add(word, GENRE_WORD_WEIGHT)
+        if mood:
+            for word in _words(mood):
+                add(word, MOOD_WEIGHT)
+        for doc_id in seed_doc_ids:
+            start, end = self.tag_ptr[doc_id], self.tag_ptr[doc_id + 1]
+            for term_id in self.tag_terms[start:end].tolist():
+                weight = (
+                    READ_GENRE_WEIGHT
+                    if term_id in self._genre_terms
+                    else READ_SUBJECT_WEIGHT
+                )
+                weights[term_id] = weights.get(term_id, 0.0) + weight
+        return weights
+
+    def score(
+        self, weights: dict[int, float], *, max_postings: int = MAX_POSTINGS_PER_TERM
+    ) -> np.ndarray:
+        """Accumulate the first ``max_postings`` of each term's impact list."""
+        scores = np.zeros(len(self.titles), dtype=np.float32)
+        for term_id, weight in weights.items():
+            start = self.term_ptr[term_id]
+            end = min(self.term_ptr[term_id + 1], start + max_postings)
+            # Postings hold each document once, so fancy-index += is safe.
+            scores[self.doc_ids[start:end]] += np.float32(weight) * self.weights[start:end]
+        return scores
+
+    def top_k(
+        self, scores: np.ndarray, k: int, exclude: Iterable[int] = ()
+    ) -> list[int]:
+        """Return ``k`` doc ids by descending score.
+
+        Ties break on catalog order, and when fewer than ``k`` titles match
+        the remainder is filled from the top of the catalog.
+        """
+        excluded = set(exclude)
+        if excluded:
+            scores[list(excluded)] = 0.0
+        # Most titles score zero, and argpartition degrades on long runs of
+        # ties, so select among the matched titles only. BM25 weights are
+        # positive; the boolean mask is much cheaper than a float nonzero.
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > k:
+            # argpartition picks an arbitrary subset of the titles tied at
+            # the k-th score, so keep every title at or above that score and
+            # let the sort below cut on catalog order.
+            kth = np.argpartition(-scores[matched], k - 1)[k - 1]
+            matched = matched[scores[matched] >= scores[matched[kth]]]
+        ranked = matched[np.lexsort((matched, -scores[matched]))][:k].tolist()
+        chosen = set(ranked)
+        doc_id = 0
+        while len(ranked) < k and doc_id < len(self.titles):
+            if doc_id not in chosen and doc_id not in excluded:
+                ranked.append(doc_id)
+            doc_id += 1
+        return ranked
+
+    def recommend(
+        self,
+        favorite_genres: Iterable[str] = (),
+        mood: str | None = None,
+        recent_reads: Iterable[str] = (),
+        k: int = 5,
+    ) -> list[int]:
+        """Return doc ids for the request, excluding titles already read."""
+        read = [
+            doc_id
+            for doc_id in (self.find_title(title) for title in recent_reads)
+            if doc_id is not None
+        ]
+        weights = self.query_weights(favorite_genres, mood, read)
+        return self.top_k(self.score(weights), k, exclude=read)
@@ -0,0 +1,298 @@
+"""Item-to-item "patrons who read this also read" index.
+
+``build_index`` turns a circulation CSV (one ``patron,title`` checkout per
+row) into a sparse co-occurrence matrix, keeps the top-N neighbors of every
+title and writes them to a flat binary file. ``CoReadIndex.open`` only maps
+that file; title lookups go through an open-addressing hash table stored in
+the file, so each seed title costs one probe plus one row slice no matter how
+large the index is, and pages are faulted in on demand.
+
+Build from the command line::
+
+    python -m library_agent.tools.co_read history.csv co_read.idx --top-n 50
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import mmap
+import struct
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from library_agent.tools.catalog import normalize_title
+
+MAGIC = b"LCRI"
+VERSION = 1
+# magic, version, n_titles, top_n, table_size, then the byte offsets of the
+# neighbor, score, hash, slot-id, title-offset and title-blob sections.
+_HEADER = struct.Struct("<4sIIII6Q")
+DEFAULT_TOP_N = 50
+MAX_BASKET = 200
+
+
+def _title_hash(title: str) -> int:
+    digest = hashlib.blake2b(normalize_title(title).encode("utf-8"), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+def read_baskets(
+    path: str | Path,
+    *,
+    patron_column: str = "patron",
+    title_column: str = "title",
+) -> tuple[list[str], list[list[int]]]:
+    """Return the distinct titles and each patron's checked-out title ids."""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Circulation history not found: {path}")
+    title_ids: dict[str, int] = {}
+    titles: list[str] = []
+    baskets: dict[str, dict[int, None]] = defaultdict(dict)
+    with path.open("r", encoding="utf-8", newline="") as fh:
+        for row in csv.DictReader(fh):
+            title = row[title_column].strip()
+            key = normalize_title(title)
+            if not key:
+                continue
+            title_id = title_ids.get(key)
+            if title_id is None:
+                title_id = title_ids[key] = len(titles)
+                titles.append(title)
+            baskets[row[patron_column]][title_id] = None
+    return titles, [list(basket) for basket in baskets.values()]
+
+
+def co_occurrence(
+    n_titles: int, baskets: Iterable[list[int]], *, max_basket: int = MAX_BASKET
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return ``(rows, cols, scores)`` of the symmetric co-read matrix.
+
+    Scores are cosine-normalized co-read counts, so popular titles do not
+    become everyone's neighbor. Only the latest ``max_basket`` checkouts per
+    patron count, bounding the quadratic pair expansion.
+    """
+    pair_keys: list[np.ndarray] = []
+    popularity = np.zeros(n_titles, dtype=np.float64)
+    for basket in baskets:
+        items = np.asarray(basket[-max_basket:], dtype=np.int64)
+        popularity[items] += 1
+        if len(items) < 2:
+            continue
+        left, right = np.triu_indices(len(items), 1)
+        a, b = items[left], items[right]
+        pair_keys.append(np.concatenate((a * n_titles + b, b * n_titles + a)))
+    if not pair_keys:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+    keys, counts = np.unique(np.concatenate(pair_keys), return_counts=True)
+    rows, cols = keys // n_titles, keys % n_titles
+    scores = counts / np.sqrt(popularity[rows] * popularity[cols])
+    return rows, cols, scores.astype(np.float32)
+
+
+def top_neighbors(
+    n_titles: int,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    scores: np.ndarray,
+    top_n: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(neighbors, scores)`` matrices holding each row's best ``top_n``."""
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    row_start = np.searchsorted(rows, np.arange(n_titles))
+    rank = np.arange(len(rows)) - row_start[rows]
+    keep = rank < top_n
+    neighbors = np.full((n_titles, top_n), -1, dtype=np.int32)
+    neighbor_scores = np.zeros((n_titles, top_n), dtype=np.float32)
+    neighbors[rows[keep], rank[keep]] = cols[keep]
+    neighbor_scores[rows[keep], rank[keep]] = scores[keep]
+    return neighbors, neighbor_scores
+
+
+def write_index(
+    path: str | Path,
+    titles: list[str],
+    neighbors: np.ndarray,
+    scores: np.ndarray,
+) -> None:
+    n_titles, top_n = neighbors.shape
+    table_size = 1 << max(3, (2 * n_titles - 1).bit_length())
+    slot_hashes = np.zeros(table_size, dtype=np.uint64)
+    slot_ids = np.full(table_size, -1, dtype=np.int32)
+    mask = table_size - 1
+    for title_id, title in enumerate(titles):
+        digest = _title_hash(title)
+        slot = digest & mask
+        while slot_ids[slot] != -1:
+            slot = (slot + 1) & mask
+        slot_hashes[slot] = digest
+        slot_ids[slot] = title_id
+
+    encoded = [title.encode("utf-8") for title in titles]
+    title_offsets = np.zeros(n_titles + 1, dtype=np.uint64)
+    title_offsets[1:] = np.cumsum([len(item) for item in encoded], dtype=np.uint64)
+    sections = [
+        np.ascontiguousarray(neighbors, dtype=np.int32).tobytes(),
+        np.ascontiguousarray(scores, dtype=np.float32).tobytes(),
+        slot_hashes.tobytes(),
+        slot_ids.tobytes(),
+        title_offsets.tobytes(),
+        b"".join(encoded),
+    ]
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        position += -position % 8
+        offsets.append(position)
+        position += len(section)
+
+    with open(path, "wb") as fh:
+        fh.write(
+            _HEADER.pack(MAGIC, VERSION, n_titles, top_n, table_size, *offsets)
+        )
+        for offset, section in zip(offsets, sections):
+            fh.write(b"\0" * (offset - fh.tell()))
+            fh.write(section)
+
+
+def build_index(
+    history_path: str | Path,
+    index_path: str | Path,
+    *,
+    top_n: int = DEFAULT_TOP_N,
+    max_basket: int = MAX_BASKET,
+) -> int:
+    """Build a co-read index file from circulation history; return its size."""
+    titles, baskets = read_baskets(history_path)
+    rows, cols, scores = co_occurrence(len(titles), baskets, max_basket=max_basket)
+    neighbors, neighbor_scores = top_neighbors(len(titles), rows, cols, scores, top_n)
+    write_index(index_path, titles, neighbors, neighbor_scores)
+    return len(titles)
+
+
+class CoReadIndex:
+    """Read-only view over a memory-mapped co-read index file."""
+
+    def __init__(self, buffer: mmap.mmap) -> None:
+        self._buffer = buffer
+        (
+            magic,
+            version,
+            self.n_titles,
+            self.top_n,
+            table_size,
+            neighbors_at,
+            scores_at,
+            hashes_at,
+            slots_at,
+            title_offsets_at,
+            self._titles_at,
+        ) = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a co-read index file (bad magic or version)")
+        shape = (self.n_titles, self.top_n)
+        count = self.n_titles * self.top_n
+        self._neighbors = np.frombuffer(
+            buffer, np.int32, count, neighbors_at
+        ).reshape(shape)
+        self._scores = np.frombuffer(buffer, np.float32, count, scores_at).reshape(
+            shape
+        )
+        self._slot_hashes = np.frombuffer(buffer, np.uint64, table_size, hashes_at)
+        self._slot_ids = np.frombuffer(buffer, np.int32, table_size, slots_at)
+        self._title_offsets = np.frombuffer(
+            buffer, np.uint64, self.n_titles + 1, title_offsets_at
+        )
+        self._mask = table_size - 1
+
+    @classmethod
+    def open(cls, path: str | Path) -> "CoReadIndex":
+        with open(path, "rb") as fh:
+            buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def __len__(self) -> int:
+        return self.n_titles
+
+    def title(self, title_id: int) -> str:
+        start = int(self._title_offsets[title_id]) + self._titles_at
+        end = int(self._title_offsets[title_id + 1]) + self._titles_at
+        return self._buffer[start:end].decode("utf-8")
+
+    def find(self, title: str) -> int | None:
+        digest = _title_hash(title)
+        key = normalize_title(title)
+        slot = digest & self._mask
+        while True:
+            title_id = int(self._slot_ids[slot])
+            if title_id == -1:
+                return None
+            if int(self._slot_hashes[slot]) == digest and normalize_title(
+                self.title(title_id)
+            ) == key:
+                return title_id
+            slot = (slot + 1) & self._mask
+
+    def neighbors(self, title: str) -> list[tuple[int, float]]:
+        """Return ``(title_id, score)`` pairs co-read with ``title``."""
+        title_id = self.find(title)
+        if title_id is None:
+            return []
+        row = self._neighbors[title_id]
+        count = int(np.count_nonzero(row >= 0))
+        return list(zip(row[:count].tolist(), self._scores[title_id, :count].tolist()))
+
+    def recommend(
+        self, seeds: Iterable[str], k: int = 5, *, diversity: float = 0.5
+    ) -> list[str]:
+        """Rerank the seeds' neighbors, penalizing picks similar to earlier ones.
+
+        Candidates are scored by summed similarity to the seeds, then chosen
+        greedily (maximal marginal relevance): once a title is picked, every
+        remaining candidate loses ``diversity`` times its similarity to it.
+        """
+        seed_ids = {self.find(seed) for seed in seeds} - {None}
+        candidates: dict[int, float] = {}
+        for seed_id in seed_ids:
+            row = self._neighbors[seed_id]
+            for neighbor, score in zip(row.tolist(), self._scores[seed_id].tolist()):
+                if neighbor < 0:
+                    break
+                if neighbor not in seed_ids:
+                    candidates[neighbor] = candidates.get(neighbor, 0.0) + score
+
+        picks: list[str] = []
+        while candidates and len(picks) < k:
+            best = max(candidates, key=lambda title_id: (candidates[title_id], -title_id))
+            del candidates[best]
+            picks.append(self.title(best))
+            row = self._neighbors[best]
+            for neighbor, score in zip(row.tolist(), self._scores[best].tolist()):
+                if neighbor < 0:
+                    break
+                if neighbor in candidates:
+                    candidates[neighbor] -= diversity * score
+        return picks
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build a co-read index file.")
+    parser.add_argument("history", help="CSV with patron,title checkout rows")
+    parser.add_argument("output", help="Index file to write")
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N)
+    parser.add_argument("--max-basket", type=int, default=MAX_BASKET)
+    args = parser.parse_args(argv)
+    count = build_index(
+        args.history, args.output, top_n=args.top_n, max_basket=args.max_basket
+    )
+    print(f"Indexed {count} titles into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Request-hash dedup cache so retried tool calls replay their first result.
+
+Requests are canonicalized (defaults filled in, keys sorted, text trimmed,
+whitespace collapsed and case-folded) and hashed with SHA-256. Responses are
+kept as JSON in a bounded LRU with a TTL, optionally backed by SQLite so a
+restarted worker still recognizes duplicates. Concurrent identical requests
+are coalesced: the first caller computes, the rest wait for its result.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+MetricsHook = Callable[[str, float], None]
+
+DEFAULT_TTL_SECONDS = 600.0
+DEFAULT_MAX_ENTRIES = 10_000
+_PURGE_EVERY = 256
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, str):
+        return _WHITESPACE_RE.sub(" ", value.strip()).casefold()
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def request_fingerprint(request: BaseModel) -> str:
+    """Return a stable SHA-256 hex digest of the canonicalized request."""
+    payload = _canonical(request.model_dump(mode="json"))
+    text = json.dumps(
+        [type(request).__name__, payload], sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class _InFlight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: str | None = None
+        self.error: BaseException | None = None
+
+
+class DedupCache:
+    """Bounded TTL/LRU map from request fingerprints to JSON responses."""
+
+    def __init__(
+        self,
+        *,
+        name: str = "dedup",
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        path: str | Path | None = None,
+        metrics: MetricsHook | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.metrics = metrics
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._in_flight: dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db: sqlite3.Connection | None = None
+        if path is not None:
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS dedup_entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: str, now: float) -> str | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT value, expires_at FROM dedup_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        self._remember(key, row[0], row[1])
+        return row[0]
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _store(self, key: str, value: str, now: float) -> None:
+        expires_at = now + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO dedup_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, expires_at),
+        )
+        self._writes += 1
+        if self._writes % _PURGE_EVERY == 0:
+            self._db.execute("DELETE FROM dedup_entries WHERE expires_at <= ?", (now,))
+        self._db.commit()
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.metrics is not None:
+            self.metrics(f"{self.name}.{'hit' if hit else 'miss'}", 1.0)
+            self.metrics(f"{self.name}.hit_rate", self.hit_rate)
+
+    def get(self, key: str) -> str | None:
+        """Return the live value for ``key``, counting a hit or a miss."""
+        with self._lock:
+            value = self._lookup(key, self._clock())
+            self._record(hit=value is not None)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        """Store ``value`` for callers that decide per result whether to cache."""
+        with self._lock:
+            self._store(key, value, self._clock())
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> tuple[str, bool]:
+        """Return ``(value, hit)``; run ``compute`` at most once per live key."""
+        with self._lock:
+            value = self._lookup(key, self._clock())
+            if value is not None:
+                self._record(hit=True)
+                return value, True
+            waiting = self._in_flight.get(key)
+            if waiting is None:
+                flight = self._in_flight[key] = _InFlight()
+                self._record(hit=False)
+        if waiting is not None:
+            waiting.done.wait()
+            if waiting.error is not None:
+                raise waiting.error
+            with self._lock:
+                self._record(hit=True)
+            return waiting.value, True
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        else:
+            flight.value = value
+            with self._lock:
+                self._store(key, value, self._clock())
+            return value, False
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
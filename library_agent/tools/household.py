@@ -0,0 +1,304 @@
+"""Household membership index behind `add_household_member_action`.
+
+Cards and members are nodes with dense integer ids. A union-find forest
+(``array("i")`` parents and sizes, union by size, path halving) answers
+"which household is this card in" and "how many members" in near-constant
+time. Adjacency lists remember the links themselves, so a household's
+members can be listed.
+
+Snapshots store the arrays as-is: parents are fully compressed on save and
+the adjacency is flattened to CSR, so loading millions of links is a few
+``array.fromfile`` calls plus one dict build for the keys. Links added after a
+load go to a small per-node overlay on top of the CSR rows.
+
+``HouseholdStore`` keeps a snapshot durable between saves. Each new link is
+appended to a journal next to the snapshot, as one ``O_APPEND`` write, and
+loading replays the journal over the snapshot. ``compact`` folds the journal
+into a fresh snapshot under an exclusive ``flock``. It rebuilds from the
+files rather than from memory, so links journaled by other processes
+survive. Other processes' links only become visible after a reload, though,
+so the member cap is enforced per process.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import struct
+import threading
+from array import array
+from pathlib import Path
+from typing import Iterable
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+MAGIC = b"LHHI"
+VERSION = 1
+# magic, version, nodes, adjacency entries
+_HEADER = struct.Struct("<4sIQQ")
+DEFAULT_MAX_MEMBERS = 8
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _squash(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text.strip())
+
+
+class HouseholdFullError(ValueError):
+    """Raised when a link would push a household past its member cap."""
+
+
+def card_key(card_number: str) -> str:
+    """Return the node key for a card number, whitespace collapsed."""
+    return _squash(card_number)
+
+
+def member_key(
+    primary_card_number: str,
+    name: str,
+    *,
+    card_number: str | None = None,
+    contact_email: str | None = None,
+) -> str:
+    """Return the node key for a household member.
+
+    Card numbers and emails identify a person everywhere; a bare name only
+    identifies them within the household of ``primary_card_number``.
+    """
+    if card_number:
+        return card_key(card_number)
+    if contact_email:
+        return "email:" + _squash(contact_email).casefold()
+    return f"name:{card_key(primary_card_number)}/{_squash(name).casefold()}"
+
+
+class HouseholdIndex:
+    """Union-find plus adjacency over card numbers and member keys."""
+
+    def __init__(self, *, max_members: int = DEFAULT_MAX_MEMBERS) -> None:
+        self.max_members = max_members
+        self._keys: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._parent = array("i")
+        self._size = array("i")
+        self._ptr = array("q", [0])
+        self._neighbors = array("i")
+        self._extra: dict[int, list[int]] = {}
+        self._links = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def links(self) -> int:
+        return self._links
+
+    def _node(self, key: str) -> int:
+        node = self._ids.get(key)
+        if node is None:
+            if "\n" in key:
+                raise ValueError(f"Household keys cannot contain newlines: {key!r}")
+            node = self._ids[key] = len(self._keys)
+            self._keys.append(key)
+            self._parent.append(node)
+            self._size.append(1)
+        return node
+
+    def _find(self, node: int) -> int:
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _adjacent(self, node: int) -> list[int]:
+        adjacent = []
+        if node + 1 < len(self._ptr):
+            adjacent.extend(self._neighbors[self._ptr[node] : self._ptr[node + 1]])
+        adjacent.extend(self._extra.get(node, ()))
+        return adjacent
+
+    def household_of(self, key: str) -> int | None:
+        """Return an id shared by every node in ``key``'s household."""
+        node = self._ids.get(key)
+        if node is None:
+            return None
+        with self._lock:
+            return self._find(node)
+
+    def size(self, key: str) -> int:
+        """Return the number of people in ``key``'s household (0 if unknown)."""
+        root = self.household_of(key)
+        return 0 if root is None else self._size[root]
+
+    def is_linked(self, key: str) -> bool:
+        """Return whether ``key`` already shares a household with anyone."""
+        return self.size(key) > 1
+
+    def same_household(self, first: str, second: str) -> bool:
+        root = self.household_of(first)
+        return root is not None and root == self.household_of(second)
+
+    def members(self, key: str) -> list[str]:
+        """Return every key in ``key``'s household, ``key`` first."""
+        start = self._ids.get(key)
+        if start is None:
+            return []
+        with self._lock:
+            seen = {start}
+            order = [start]
+            for node in order:
+                for neighbor in self._adjacent(node):
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        order.append(neighbor)
+        return [self._keys[node] for node in order]
+
+    def link(self, primary: str, member: str) -> bool:
+        """Link ``member`` into ``primary``'s household.
+
+        Returns ``False`` when they already share a household. Raises
+        ``HouseholdFullError`` when the merged household would exceed
+        ``max_members``.
+        """
+        with self._lock:
+            first, second = self._node(primary), self._node(member)
+            root_a, root_b = self._find(first), self._find(second)
+            if root_a == root_b:
+                return False
+            merged = self._size[root_a] + self._size[root_b]
+            if merged > self.max_members:
+                raise HouseholdFullError(
+                    f"Household of {primary} would have {merged} members; "
+                    f"the limit is {self.max_members}"
+                )
+            if self._size[root_a] < self._size[root_b]:
+                root_a, root_b = root_b, root_a
+            self._parent[root_b] = root_a
+            self._size[root_a] = merged
+            self._extra.setdefault(first, []).append(second)
+            self._extra.setdefault(second, []).append(first)
+            self._links += 1
+            return True
+
+    @classmethod
+    def from_links(
+        cls, links: Iterable[tuple[str, str]], *, max_members: int = DEFAULT_MAX_MEMBERS
+    ) -> "HouseholdIndex":
+        index = cls(max_members=max_members)
+        for primary, member in links:
+            index.link(primary, member)
+        return index
+
+    def save(self, path: str | Path) -> None:
+        """Write a snapshot atomically (temp file plus rename)."""
+        with self._lock:
+            count = len(self._keys)
+            parent = array("i", (self._find(node) for node in range(count)))
+            ptr = array("q", [0])
+            neighbors = array("i")
+            for node in range(count):
+                neighbors.extend(self._adjacent(node))
+                ptr.append(len(neighbors))
+            blob = "\n".join(self._keys).encode("utf-8")
+            sizes = array("i", self._size)
+        path = Path(path)
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with temporary.open("wb") as fh:
+            fh.write(_HEADER.pack(MAGIC, VERSION, count, len(neighbors)))
+            for section in (parent, sizes, ptr, neighbors):
+                section.tofile(fh)
+            fh.write(blob)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(
+        cls, path: str | Path, *, max_members: int = DEFAULT_MAX_MEMBERS
+    ) -> "HouseholdIndex":
+        index = cls(max_members=max_members)
+        with Path(path).open("rb") as fh:
+            magic, version, count, entries = _HEADER.unpack(fh.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a household snapshot (bad magic or version): {path}")
+            index._parent.fromfile(fh, count)
+            index._size.fromfile(fh, count)
+            index._ptr = array("q")
+            index._ptr.fromfile(fh, count + 1)
+            index._neighbors.fromfile(fh, entries)
+            blob = fh.read().decode("utf-8")
+        index._keys = blob.split("\n") if count else []
+        index._ids = dict(zip(index._keys, range(count)))
+        index._links = entries // 2
+        return index
+
+
+class HouseholdStore:
+    """Snapshot at ``path`` plus an append-only link journal at ``path.log``."""
+
+    def __init__(self, path: str | Path, *, max_members: int = DEFAULT_MAX_MEMBERS) -> None:
+        self.path = Path(path)
+        self.journal = self.path.with_name(self.path.name + ".log")
+        self.max_members = max_members
+
+    def _replay(self) -> HouseholdIndex:
+        if self.path.exists():
+            index = HouseholdIndex.load(self.path, max_members=self.max_members)
+        else:
+            index = HouseholdIndex(max_members=self.max_members)
+        if self.journal.exists():
+            with self.journal.open("r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        primary, member = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    try:
+                        index.link(primary, member)
+                    except HouseholdFullError:
+                        pass  # two processes filled the same household concurrently
+        return index
+
+    def load(self) -> HouseholdIndex:
+        with self._locked():
+            return self._replay()
+
+    def append(self, primary: str, member: str) -> None:
+        """Journal one link; call after ``HouseholdIndex.link`` returned ``True``."""
+        line = json.dumps([primary, member], ensure_ascii=False) + "\n"
+        # Shared: appends run side by side, but never while a compaction runs.
+        with self._locked(shared=True):
+            fd = os.open(self.journal, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+
+    def compact(self) -> None:
+        """Fold the journal into the snapshot and empty it."""
+        with self._locked():
+            self._replay().save(self.path)
+            self.journal.unlink(missing_ok=True)
+
+    def _locked(self, *, shared: bool = False) -> _FileLock:
+        return _FileLock(self.path.with_name(self.path.name + ".lock"), shared=shared)
+
+
+class _FileLock:
+    def __init__(self, path: Path, *, shared: bool = False) -> None:
+        self.path = path
+        self.shared = shared
+        self._fd: int | None = None
+
+    def __enter__(self) -> None:
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+
+    def __exit__(self, *exc: object) -> None:
+        if self._fd is not None:
+            os.close(self._fd)  # closing releases the flock
+            self._fd = None
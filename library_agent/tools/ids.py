@@ -0,0 +1,213 @@
+"""Snowflake-style identifiers for orders, cards, household links and events.
+
+Each 64-bit id packs a 41-bit millisecond timestamp, a 10-bit worker id and a
+12-bit sequence. The allocator draws from a single ``itertools.count`` whose
+``next()`` is atomic under the GIL, so the hot path takes no lock: the
+counter's high bits advance the timestamp and its low 12 bits are the
+sequence. Ids are therefore unique and strictly increasing per allocator
+even when thousands are drawn in one millisecond. When the counter-derived
+clock falls more than ``REANCHOR_LAG_MS`` behind wall time, the allocator
+re-anchors on a fresh counter under a lock, which happens at most about once
+per second.
+
+Each allocator leases a worker id through ``flock`` on a per-id lock file, so
+processes on one host never share one, however they were started (forked,
+spawned or launched by a server with several workers). Forked children lease
+a new slot automatically. Across hosts, set ``LIBRARY_WORKER_ID`` to a
+per-host base: the host's processes take the first free ids from that base
+upward, so bases must be at least as far apart as the process count per
+host. Without it, the search starts from the process id.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+EPOCH_MS = 1_767_225_600_000  # 2026-01-01T00:00:00Z
+TIMESTAMP_BITS = 41
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+REANCHOR_LAG_MS = 1000
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_CROCKFORD_INDEX = {char: value for value, char in enumerate(_CROCKFORD)}
+ENCODED_LENGTH = 13
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def encode_id(value: int) -> str:
+    """Fixed-width Crockford base32, so string order matches numeric order."""
+    chars = []
+    for _ in range(ENCODED_LENGTH):
+        chars.append(_CROCKFORD[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def decode_id(text: str) -> int:
+    value = 0
+    for char in text.rsplit("-", 1)[-1].upper():
+        value = (value << 5) | _CROCKFORD_INDEX[char]
+    return value
+
+
+def split_id(value: int) -> tuple[datetime, int, int]:
+    """Return ``(timestamp, worker_id, sequence)`` packed into ``value``."""
+    millis = (value >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
+    worker = (value >> SEQUENCE_BITS) & MAX_WORKER_ID
+    return (
+        datetime.fromtimestamp(millis / 1000, tz=timezone.utc),
+        worker,
+        value & SEQUENCE_MASK,
+    )
+
+
+class WorkerLease:
+    """Exclusive hold on a worker id for the lifetime of the process."""
+
+    def __init__(self, worker_id: int, fd: int | None = None) -> None:
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker id must be in 0..{MAX_WORKER_ID}, got {worker_id}")
+        self.worker_id = worker_id
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def worker_lock_dir(lock_dir: str | Path | None = None) -> Path:
+    """Directory of the per-id lock files, created on first use."""
+    directory = Path(
+        lock_dir
+        or os.getenv("LIBRARY_WORKER_LOCK_DIR")
+        or Path(tempfile.gettempdir()) / "library_agent_workers"
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def claim_worker_id(
+    lock_dir: str | Path | None = None, *, use_env: bool = True
+) -> WorkerLease:
+    """Lease the first free worker id from ``LIBRARY_WORKER_ID`` upward.
+
+    Without the env value, the search starts at the process id and wraps.
+    """
+    configured = os.getenv("LIBRARY_WORKER_ID") if use_env else None
+    if configured:
+        base = WorkerLease(int(configured)).worker_id  # validates the range
+        candidates = range(base, MAX_WORKER_ID + 1)
+    else:
+        start = os.getpid() & MAX_WORKER_ID
+        candidates = [(start + offset) & MAX_WORKER_ID for offset in range(MAX_WORKER_ID + 1)]
+    if fcntl is None:  # pragma: no cover - non-POSIX platforms
+        return WorkerLease(candidates[0])
+    directory = worker_lock_dir(lock_dir)
+    for worker_id in candidates:
+        fd = os.open(directory / f"worker-{worker_id}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            continue
+        return WorkerLease(worker_id, fd)
+    raise RuntimeError(f"No free worker id from {candidates[0]} upward under {directory}")
+
+
+class _Epoch:
+    __slots__ = ("base_ms", "counter")
+
+    def __init__(self, base_ms: int) -> None:
+        self.base_ms = base_ms
+        self.counter = itertools.count()
+
+
+class IdAllocator:
+    """Lock-free (under the GIL) monotonic Snowflake id source."""
+
+    def __init__(self, worker_id: int | None = None) -> None:
+        self._lease = WorkerLease(worker_id) if worker_id is not None else claim_worker_id()
+        self._worker_bits = self._lease.worker_id << SEQUENCE_BITS
+        self._epoch = _Epoch(_now_ms())
+        self._reanchor_lock = threading.Lock()
+
+    @property
+    def worker_id(self) -> int:
+        return self._lease.worker_id
+
+    def next_int(self) -> int:
+        epoch = self._epoch
+        sequence = next(epoch.counter)
+        millis = epoch.base_ms + (sequence >> SEQUENCE_BITS)
+        if millis + REANCHOR_LAG_MS < _now_ms():
+            self._reanchor(epoch)
+        return (
+            ((millis - EPOCH_MS) << (WORKER_BITS + SEQUENCE_BITS))
+            | self._worker_bits
+            | (sequence & SEQUENCE_MASK)
+        )
+
+    def next_id(self, prefix: str) -> str:
+        return f"{prefix}-{encode_id(self.next_int())}"
+
+    def _reanchor(self, stale: _Epoch) -> None:
+        with self._reanchor_lock:
+            if self._epoch is not stale:
+                return
+            # Threads still holding the stale epoch advance its clock by at
+            # most a few ms, far short of the lag that triggered this.
+            self._epoch = _Epoch(_now_ms())
+
+    def _reset_after_fork(self) -> None:
+        self._lease.release()
+        # The parent still holds its slot, so the child leases the next free one.
+        self._lease = claim_worker_id()
+        self._worker_bits = self._lease.worker_id << SEQUENCE_BITS
+        self._epoch = _Epoch(_now_ms())
+        self._reanchor_lock = threading.Lock()
+
+
+_default_allocator: IdAllocator | None = None
+_default_lock = threading.Lock()
+
+
+def get_allocator() -> IdAllocator:
+    global _default_allocator
+    if _default_allocator is None:
+        with _default_lock:
+            if _default_allocator is None:
+                _default_allocator = IdAllocator()
+    return _default_allocator
+
+
+def new_id(prefix: str) -> str:
+    """Return a new process-unique, time-ordered id such as ``ORD-0P3...``."""
+    return get_allocator().next_id(prefix)
+
+
+def _after_fork_in_child() -> None:
+    global _default_lock
+    _default_lock = threading.Lock()
+    if _default_allocator is not None:
+        _default_allocator._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
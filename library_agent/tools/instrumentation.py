@@ -0,0 +1,470 @@
+"""Per-tool latency and payload metrics for the agent tools.
+
+When ``ToolMetrics`` is installed with ``set_tool_metrics``, every
+``ValidatedFunctionTool`` call records, per tool:
+
+- the call count and the number of failed calls
+- end-to-end latency
+- the part of that latency spent converting arguments into their request
+  models (validation), with the rest counted as logic. Parameters passed
+  through as ``raw_args`` are validated by the action, so that time is logic.
+- the JSON size of the arguments and of the result
+- the size of the `LIBRARY_STATE_KEY` value after the call
+- for tools backed by a ``DedupCache`` registered with ``watch_cache`` (the
+  environment setup registers ``order_book``'s), its hits, misses and hit rate
+
+Distributions are kept in ``Histogram``, an HDR-style log-linear histogram
+that records in constant time with a bounded relative error.
+``ToolMetrics.flush`` sends a snapshot to each sink. Sinks log it
+(``LogSink``), write it as JSON (``JsonFileSink``) or serve it in the
+Prometheus text format on a local port (``PrometheusSink``). With no
+metrics installed, a tool call pays for one function call.
+
+``LIBRARY_TOOL_METRICS`` installs metrics at import time. It takes a
+comma-separated list of sinks: ``log``, ``json:<path>`` and
+``prometheus[:<port>]``. Snapshots are flushed every
+``LIBRARY_TOOL_METRICS_FLUSH_SECONDS`` (60 by default) and at exit.
+"""
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from library_agent.tools.dedup import DedupCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRECISION_BITS = 5
+DEFAULT_FLUSH_SECONDS = 60.0
+DEFAULT_PROMETHEUS_PORT = 9464
+QUANTILES = (0.5, 0.9, 0.99)
+
+Snapshot = dict[str, dict[str, Any]]
+
+
+class Histogram:
+    """Log-linear histogram of non-negative integers, HDR style.
+
+    Values below ``2**precision_bits`` get their own bucket. Larger values
+    share a bucket with others that have the same top ``precision_bits``
+    bits, so a reported value is within ``2**-(precision_bits - 1)`` of the
+    true one (about 6% at the default). The counts are one flat list that
+    covers every 64-bit value, so recording is a shift and an increment.
+    """
+
+    __slots__ = ("precision_bits", "count", "total", "min", "max", "_half", "_counts")
+
+    def __init__(self, precision_bits: int = DEFAULT_PRECISION_BITS) -> None:
+        self.precision_bits = precision_bits
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self._half = 1 << (precision_bits - 1)
+        self._counts = [0] * ((66 - precision_bits) * self._half)
+
+    def _upper_bound(self, index: int) -> int:
+        shift = index // self._half - 1
+        if shift <= 0:
+            return index
+        return ((index - shift * self._half + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        shift = value.bit_length() - self.precision_bits
+        # Bucket ``shift * half + top bits``: contiguous with the exact buckets below.
+        self._counts[value if shift <= 0 else shift * self._half + (value >> shift)] += 1
+        if value > self.max:
+            self.max = value
+        if value < self.min or self.count == 0:
+            self.min = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q: float) -> int:
+        """Highest value equivalent to the ``q``-th percentile (``q`` in 0-100)."""
+        if self.count == 0:
+            return 0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def summary(self, scale: float = 1.0) -> dict[str, float]:
+        """Count, sum, extremes and ``QUANTILES``, with values multiplied by ``scale``."""
+        summary = {
+            "count": self.count,
+            "sum": self.total * scale,
+            "min": self.min * scale,
+            "max": self.max * scale,
+        }
+        for quantile in QUANTILES:
+            summary[f"p{quantile * 100:g}"] = self.percentile(quantile * 100) * scale
+        return summary
+
+
+class ToolStats:
+    """Everything recorded for one tool."""
+
+    __slots__ = (
+        "calls",
+        "errors",
+        "latency_ns",
+        "validation_ns",
+        "logic_ns",
+        "request_bytes",
+        "response_bytes",
+        "state_bytes",
+    )
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.latency_ns = Histogram()
+        self.validation_ns = Histogram()
+        self.logic_ns = Histogram()
+        self.request_bytes = Histogram()
+        self.response_bytes = Histogram()
+        self.state_bytes = Histogram()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_seconds": self.latency_ns.summary(1e-9),
+            "validation_seconds": self.validation_ns.summary(1e-9),
+            "logic_seconds": self.logic_ns.summary(1e-9),
+            "request_bytes": self.request_bytes.summary(),
+            "response_bytes": self.response_bytes.summary(),
+            "state_bytes": self.state_bytes.summary(),
+        }
+
+
+def payload_bytes(value: Any) -> int:
+    """Size of ``value`` as the JSON a model or session store would see."""
+    if value is None:
+        return 0
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json(exclude_none=True))
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return len(json.dumps(value, separators=(",", ":"), default=_json_default))
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+
+class MetricsSink:
+    """Destination for snapshots. ``start`` is given a live snapshot source."""
+
+    def start(self, source: Callable[[], Snapshot]) -> None:
+        pass
+
+    def export(self, snapshot: Snapshot) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class LogSink(MetricsSink):
+    """Log one line per tool."""
+
+    def __init__(self, log: logging.Logger = logger, level: int = logging.INFO) -> None:
+        self.log = log
+        self.level = level
+
+    def export(self, snapshot: Snapshot) -> None:
+        for tool, stats in sorted(snapshot.items()):
+            latency = stats["latency_seconds"]
+            self.log.log(
+                self.level,
+                "tool %s calls=%d errors=%d p50=%.1fus p99=%.1fus validation_p50=%.1fus "
+                "request_p50=%dB response_p50=%dB state_max=%dB",
+                tool,
+                stats["calls"],
+                stats["errors"],
+                latency["p50"] * 1e6,
+                latency["p99"] * 1e6,
+                stats["validation_seconds"]["p50"] * 1e6,
+                stats["request_bytes"]["p50"],
+                stats["response_bytes"]["p50"],
+                stats["state_bytes"]["max"],
+            )
+            cache = stats.get("cache")
+            if cache is not None:
+                self.log.log(
+                    self.level,
+                    "tool %s cache hits=%d misses=%d hit_rate=%.3f",
+                    tool,
+                    cache["hits"],
+                    cache["misses"],
+                    cache["hit_rate"],
+                )
+
+
+class JsonFileSink(MetricsSink):
+    """Replace ``path`` with the latest snapshot; readers never see a partial file."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def export(self, snapshot: Snapshot) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump({"generated_at": time.time(), "tools": snapshot}, fh, indent=2)
+        os.replace(tmp, self.path)
+
+
+def render_prometheus(snapshot: Snapshot, prefix: str = "library_tool") -> str:
+    """Prometheus text exposition of ``snapshot``; histograms become summaries."""
+    lines: list[str] = []
+    for counter in ("calls", "errors"):
+        name = f"{prefix}_{counter}_total"
+        lines += [f"# TYPE {name} counter"]
+        lines += [f'{name}{{tool="{tool}"}} {stats[counter]}' for tool, stats in snapshot.items()]
+    caches = {tool: stats["cache"] for tool, stats in snapshot.items() if "cache" in stats}
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("hit_rate", "gauge")):
+        if not caches:
+            break
+        name = f"{prefix}_cache_{field}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {name} {kind}")
+        lines += [f'{name}{{tool="{tool}"}} {cache[field]:.9g}' for tool, cache in caches.items()]
+    metrics = sorted(
+        {key for stats in snapshot.values() for key in stats} - {"calls", "errors", "cache"}
+    )
+    for metric in metrics:
+        name = f"{prefix}_{metric}"
+        lines.append(f"# TYPE {name} summary")
+        for tool, stats in snapshot.items():
+            summary = stats[metric]
+            for quantile in QUANTILES:
+                value = summary[f"p{quantile * 100:g}"]
+                lines.append(f'{name}{{tool="{tool}",quantile="{quantile:g}"}} {value:.9g}')
+            lines.append(f'{name}_sum{{tool="{tool}"}} {summary["sum"]:.9g}')
+            lines.append(f'{name}_count{{tool="{tool}"}} {summary["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusSink(MetricsSink):
+    """Serve the live snapshot at ``http://host:port/metrics``."""
+
+    def __init__(self, port: int = DEFAULT_PROMETHEUS_PORT, host: str = "127.0.0.1") -> None:
+        self.host = host
+        self.port = port
+        self._server: ThreadingHTTPServer | None = None
+
+    def start(self, source: Callable[[], Snapshot]) -> None:
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server naming
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = render_prometheus(source()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class ToolMetrics:
+    """Thread-safe per-tool ``ToolStats`` and the sinks they flush to."""
+
+    def __init__(
+        self,
+        sinks: Iterable[MetricsSink] = (),
+        *,
+        state_key: str | None = None,
+        flush_seconds: float | None = None,
+    ) -> None:
+        if state_key is None:
+            from library_agent.tools.tools import LIBRARY_STATE_KEY as state_key
+        self.state_key = state_key
+        self.sinks = list(sinks)
+        self._stats: dict[str, ToolStats] = {}
+        self._caches: dict[str, Callable[[], DedupCache]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        for sink in self.sinks:
+            sink.start(self.snapshot)
+        if flush_seconds:
+            threading.Thread(target=self._flush_every, args=(flush_seconds,), daemon=True).start()
+
+    def observe(
+        self,
+        tool: str,
+        *,
+        latency_ns: int,
+        validation_ns: int,
+        request_bytes: int,
+        response_bytes: int,
+        state_bytes: int,
+        error: bool = False,
+    ) -> None:
+        with self._lock:
+            stats = self._stats.get(tool)
+            if stats is None:
+                stats = self._stats[tool] = ToolStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.latency_ns.record(latency_ns)
+            stats.validation_ns.record(validation_ns)
+            stats.logic_ns.record(latency_ns - validation_ns)
+            stats.request_bytes.record(request_bytes)
+            stats.response_bytes.record(response_bytes)
+            stats.state_bytes.record(state_bytes)
+
+    def stats(self, tool: str) -> ToolStats | None:
+        return self._stats.get(tool)
+
+    def watch_cache(self, tool: str, cache: Callable[[], DedupCache]) -> None:
+        """Report the hit rate of the cache ``cache()`` returns alongside ``tool``.
+
+        ``cache`` is a getter, so a cache swapped in later is still the one read.
+        """
+        with self._lock:
+            self._caches[tool] = cache
+
+    def snapshot(self) -> Snapshot:
+        with self._lock:
+            snapshot = {tool: stats.snapshot() for tool, stats in self._stats.items()}
+            for tool, get_cache in self._caches.items():
+                cache = get_cache()
+                entry = snapshot.setdefault(tool, ToolStats().snapshot())
+                entry["cache"] = {
+                    "hits": cache.hits,
+                    "misses": cache.misses,
+                    "hit_rate": cache.hit_rate,
+                }
+            return dict(sorted(snapshot.items()))
+
+    def flush(self) -> None:
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            try:
+                sink.export(snapshot)
+            except Exception:  # a broken sink must not break the agent
+                logger.exception("Tool metrics sink %r failed", sink)
+
+    def _flush_every(self, seconds: float) -> None:
+        while not self._stop.wait(seconds):
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+
+
+# Nanoseconds spent converting arguments, appended by the tool under measurement.
+validation_time: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar(
+    "validation_time", default=None
+)
+
+
+async def measure_call(
+    metrics: ToolMetrics,
+    tool: str,
+    args: dict[str, Any],
+    tool_context: Any,
+    call: Callable[..., Any],
+) -> Any:
+    """Await ``call(args=..., tool_context=...)`` and record it under ``tool``."""
+    spent: list[int] = []
+    token = validation_time.set(spent)
+    error = True
+    start = time.perf_counter_ns()
+    try:
+        result = await call(args=args, tool_context=tool_context)
+        error = isinstance(result, dict) and "error" in result
+        return result
+    finally:
+        latency = time.perf_counter_ns() - start
+        validation_time.reset(token)
+        state = getattr(tool_context, "state", None)
+        metrics.observe(
+            tool,
+            latency_ns=latency,
+            validation_ns=min(sum(spent), latency),
+            request_bytes=payload_bytes(args),
+            response_bytes=0 if error else payload_bytes(result),
+            state_bytes=payload_bytes(state.get(metrics.state_key)) if state is not None else 0,
+            error=error,
+        )
+
+
+def sinks_from_spec(spec: str) -> list[MetricsSink]:
+    """Parse ``"log,json:/tmp/tools.json,prometheus:9464"`` into sinks."""
+    sinks: list[MetricsSink] = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        kind, _, arg = item.partition(":")
+        if kind == "log":
+            sinks.append(LogSink())
+        elif kind == "json" and arg:
+            sinks.append(JsonFileSink(arg))
+        elif kind == "prometheus":
+            sinks.append(PrometheusSink(int(arg) if arg else DEFAULT_PROMETHEUS_PORT))
+        else:
+            raise ValueError(f"Unknown tool metrics sink '{item}'")
+    return sinks
+
+
+_tool_metrics: ToolMetrics | None = None
+
+
+def get_tool_metrics() -> ToolMetrics | None:
+    return _tool_metrics
+
+
+def set_tool_metrics(metrics: ToolMetrics | None) -> None:
+    """Install (or remove, with ``None``) the metrics every tool call reports to."""
+    global _tool_metrics
+    _tool_metrics = metrics
+
+
+def metrics_from_env() -> ToolMetrics | None:
+    """Metrics configured by `LIBRARY_TOOL_METRICS`, or ``None`` when it is unset."""
+    spec = os.getenv("LIBRARY_TOOL_METRICS")
+    if not spec:
+        return None
+    metrics = ToolMetrics(
+        sinks_from_spec(spec),
+        flush_seconds=float(
+            os.getenv("LIBRARY_TOOL_METRICS_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS)
+        ),
+    )
+    atexit.register(metrics.close)
+    return metrics
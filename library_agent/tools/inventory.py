@@ -0,0 +1,201 @@
+"""Copy counts and holds queues behind `order_book_action`.
+
+Every title/format pair (a SKU) gets a dense integer id, and its available
+copies per branch live in one flat ``array("H")`` at
+``sku_id * len(branches) + branch``. Two bytes per SKU and branch keeps
+millions of copies in a few MB. Each SKU has a FIFO holds queue. A hold that
+finds no free copy is backordered from the patron's preferred vendor and
+waits in that queue; copies checked in or received later go to the oldest
+waiting hold. Hold status is kept in a dict, so lookups stay O(1) however
+many holds are open.
+
+Titles outside the catalog still get a SKU so they can be backordered, but
+only ``max_unknown`` of them; past that, holds on new unknown titles come
+back "requested" and are left to staff, so arbitrary titles cannot grow the
+table without bound.
+"""
+from __future__ import annotations
+
+import csv
+import re
+import threading
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal, Sequence
+
+MAX_COPIES = 0xFFFF
+DEFAULT_MAX_UNKNOWN = 10_000
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _sku_key(title: str, format: str) -> tuple[str, str]:
+    return _WHITESPACE_RE.sub(" ", title.strip()).casefold(), format.casefold()
+
+
+@dataclass(frozen=True)
+class Hold:
+    hold_id: str
+    status: Literal["reserved", "backordered", "requested"]
+    title: str
+    format: str
+    branch: str | None = None
+    vendor: str | None = None
+
+
+class Inventory:
+    """Thread-safe copy counts per branch with FIFO holds per title/format."""
+
+    def __init__(
+        self, branches: Sequence[str], *, max_unknown: int = DEFAULT_MAX_UNKNOWN
+    ) -> None:
+        if not branches:
+            raise ValueError("Inventory needs at least one branch")
+        self.branches = tuple(branches)
+        self._branch_index = {branch: index for index, branch in enumerate(self.branches)}
+        self._width = len(self.branches)
+        self._copies = array("H")
+        self._empty_row = array("H", bytes(2 * self._width))
+        self._skus: dict[tuple[str, str], int] = {}
+        # SKUs created by a hold rather than by shelving copies.
+        self._unknown: set[int] = set()
+        self.max_unknown = max_unknown
+        self._queues: dict[int, deque[str]] = {}
+        self._holds: dict[str, Hold] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "Inventory":
+        """Load ``title,format,branch,copies`` rows from a CSV file."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Inventory file not found: {path}")
+        with path.open("r", encoding="utf-8", newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        branches = list(dict.fromkeys(row["branch"].strip() for row in rows))
+        inventory = cls(branches)
+        for row in rows:
+            inventory.add_copies(
+                row["title"], row["format"], row["branch"].strip(), int(row["copies"])
+            )
+        return inventory
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the copy-count array."""
+        return self._copies.buffer_info()[1] * self._copies.itemsize
+
+    def __len__(self) -> int:
+        return len(self._skus)
+
+    def _sku(self, title: str, format: str, *, create: bool) -> int | None:
+        key = _sku_key(title, format)
+        sku = self._skus.get(key)
+        if sku is None and create:
+            sku = self._skus[key] = len(self._skus)
+            self._copies.extend(self._empty_row)
+        return sku
+
+    def _take_copy(self, sku: int) -> str | None:
+        base = sku * self._width
+        for offset in range(self._width):
+            if self._copies[base + offset]:
+                self._copies[base + offset] -= 1
+                return self.branches[offset]
+        return None
+
+    def _waiting(self, sku: int) -> deque[str] | None:
+        queue = self._queues.get(sku)
+        # Holds released while waiting are dropped lazily from the front.
+        while queue and queue[0] not in self._holds:
+            queue.popleft()
+        return queue
+
+    def _fill_queue(self, sku: int) -> list[Hold]:
+        queue = self._waiting(sku)
+        filled: list[Hold] = []
+        while queue:
+            hold = self._holds[queue[0]]
+            branch = self._take_copy(sku)
+            if branch is None:
+                break
+            queue.popleft()
+            hold = self._holds[hold.hold_id] = Hold(
+                hold.hold_id, "reserved", hold.title, hold.format, branch, hold.vendor
+            )
+            filled.append(hold)
+            self._waiting(sku)
+        return filled
+
+    def add_copies(self, title: str, format: str, branch: str, count: int = 1) -> list[Hold]:
+        """Shelve ``count`` copies at ``branch``; return holds they filled."""
+        offset = self._branch_index.get(branch)
+        if offset is None:
+            raise KeyError(f"Unknown branch: {branch}")
+        with self._lock:
+            sku = self._sku(title, format, create=True)
+            self._unknown.discard(sku)
+            index = sku * self._width + offset
+            total = self._copies[index] + count
+            if not 0 <= total <= MAX_COPIES:
+                raise ValueError(f"Copy count for {title!r} at {branch} out of range: {total}")
+            self._copies[index] = total
+            return self._fill_queue(sku)
+
+    def available(self, title: str, format: str, branch: str | None = None) -> int:
+        sku = self._sku(title, format, create=False)
+        if sku is None:
+            return 0
+        base = sku * self._width
+        if branch is not None:
+            return self._copies[base + self._branch_index[branch]]
+        return sum(self._copies[base : base + self._width])
+
+    def reserve(
+        self, hold_id: str, title: str, format: str, *, vendor: str | None = None
+    ) -> Hold:
+        """Reserve a free copy, or backorder from ``vendor`` and queue the hold.
+
+        Once ``max_unknown`` titles outside the catalog have been backordered,
+        a hold on another one is returned "requested" and not tracked.
+        """
+        with self._lock:
+            sku = self._sku(title, format, create=False)
+            if sku is None:
+                if len(self._unknown) >= self.max_unknown:
+                    return Hold(hold_id, "requested", title, format, None, vendor)
+                sku = self._sku(title, format, create=True)
+                self._unknown.add(sku)
+            queue = self._waiting(sku)
+            # Earlier holds are first in line for any copy on the shelf.
+            branch = None if queue else self._take_copy(sku)
+            if branch is not None:
+                hold = Hold(hold_id, "reserved", title, format, branch, vendor)
+            else:
+                hold = Hold(hold_id, "backordered", title, format, None, vendor)
+                self._queues.setdefault(sku, deque()).append(hold_id)
+            self._holds[hold_id] = hold
+            return hold
+
+    def release(self, hold_id: str) -> list[Hold]:
+        """Cancel a hold; a reserved copy goes to the next hold in line."""
+        with self._lock:
+            hold = self._holds.pop(hold_id, None)
+            if hold is None or hold.status != "reserved":
+                return []
+            sku = self._sku(hold.title, hold.format, create=False)
+            index = sku * self._width + self._branch_index[hold.branch]
+            # Copies shelved since the reserve may have filled the count.
+            self._copies[index] = min(self._copies[index] + 1, MAX_COPIES)
+            return self._fill_queue(sku)
+
+    def status(self, hold_id: str) -> Hold | None:
+        return self._holds.get(hold_id)
+
+    def queue_length(self, title: str, format: str) -> int:
+        sku = self._sku(title, format, create=False)
+        queue = self._queues.get(sku) if sku is not None else None
+        if not queue:
+            return 0
+        return sum(1 for hold_id in queue if hold_id in self._holds)
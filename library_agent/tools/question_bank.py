@@ -1,29 +1,180 @@
-"""Render conversational instructions from a JSON question bank."""
+"""Render conversational instructions from a JSON question bank.
+
+``QuestionBankRegistry`` owns the parsed bank. It re-stats the JSON files at
+most once per ``poll_interval`` and, when an mtime or size changed, parses
+the whole directory into a new snapshot with a higher ``version`` before
+swapping it in, so readers never see a half-loaded bank (a file that fails to
+parse keeps the previous snapshot). Rendered checklists and anything else
+derived from the bank are memoized per snapshot with ``memo``, so each
+render runs once per bank version however many agents ask for it, and
+``preload`` seeds the first version's renders from a prompt bundle.
+
+``required_questions`` also compiles each required question's dotted ``id``
+(``shipping_address.postal_code``, ``household_members[].name``) into a path
+reader, so ``missing_required`` can diff a stored state section against the
+bank in one pass.
+"""
 from __future__ import annotations
 
 import json
-from functools import lru_cache
+import os
+import threading
+import time
+import warnings
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Hashable, Iterable, Mapping, TypeVar
+
+from library_agent.tools.requirements_helper import compile_path
 
 QUESTIONS_DIR = Path(__file__).resolve().parents[1] / "config" / "questions"
+DEFAULT_POLL_INTERVAL = 1.0
 
+T = TypeVar("T")
 
-@lru_cache(maxsize=1)
-def _load_bank() -> dict[str, Any]:
-    if not QUESTIONS_DIR.exists():
-        raise FileNotFoundError(f"Question bank directory not found: {QUESTIONS_DIR}")
+
+def _read_bank(directory: Path) -> dict[str, Any]:
+    if not directory.exists():
+        raise FileNotFoundError(f"Question bank directory not found: {directory}")
     bank: dict[str, Any] = {}
-    for path in sorted(QUESTIONS_DIR.glob("*.json")):
+    for path in sorted(directory.glob("*.json")):
         with path.open("r", encoding="utf-8") as fh:
             bank[path.stem] = json.load(fh)
     if not bank:
-        raise FileNotFoundError(f"No question files found in {QUESTIONS_DIR}")
+        raise FileNotFoundError(f"No question files found in {directory}")
     return bank
 
 
-def _get_tool_entry(tool_key: str) -> dict[str, Any]:
-    bank = _load_bank()
+@dataclass
+class _Snapshot:
+    version: int
+    signature: tuple[tuple[str, int, int], ...]
+    bank: dict[str, Any]
+    renders: dict[Hashable, Any] = field(default_factory=dict)
+
+
+class QuestionBankRegistry:
+    """The question bank plus renders derived from it, reloaded on file changes."""
+
+    def __init__(
+        self, directory: str | Path = QUESTIONS_DIR, *, poll_interval: float = DEFAULT_POLL_INTERVAL
+    ) -> None:
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._snapshot: _Snapshot | None = None
+        self._checked_at = float("-inf")
+        self._seed: dict[Hashable, Any] = {}
+
+    def _signature(self) -> tuple[tuple[str, int, int], ...]:
+        try:
+            entries = [
+                (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith(".json")
+            ]
+        except FileNotFoundError:
+            return ()
+        return tuple(sorted(entries))
+
+    def _current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < self.poll_interval:
+            return snapshot
+        with self._lock:
+            self._checked_at = now
+            signature = self._signature()
+            snapshot = self._snapshot
+            if snapshot is None or signature != snapshot.signature:
+                snapshot = self._load(signature, snapshot)
+            return snapshot
+
+    def _load(
+        self, signature: tuple[tuple[str, int, int], ...], previous: _Snapshot | None
+    ) -> _Snapshot:
+        try:
+            bank = _read_bank(self.directory)
+        except (OSError, ValueError) as exc:
+            if previous is None:
+                raise
+            # Most likely caught mid-write; keep serving the last good bank.
+            warnings.warn(f"Keeping question bank v{previous.version}: {exc}", stacklevel=3)
+            return previous
+        if previous is None:
+            self._snapshot = _Snapshot(1, signature, bank, dict(self._seed))
+        else:
+            self._snapshot = _Snapshot(previous.version + 1, signature, bank)
+        self._seed = {}
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._current().version
+
+    @property
+    def bank(self) -> dict[str, Any]:
+        return self._current().bank
+
+    def reload(self) -> int:
+        """Re-stat the files now, ignoring ``poll_interval``; return the version."""
+        self._checked_at = float("-inf")
+        return self.version
+
+    def preload(self, renders: Mapping[Hashable, Any]) -> bool:
+        """Seed the first snapshot's renders (from a prompt bundle).
+
+        The caller vouches that ``renders`` match the bank on disk. Returns
+        ``False`` once a snapshot exists, since it may already differ.
+        """
+        with self._lock:
+            if self._snapshot is not None:
+                return False
+            self._seed = dict(renders)
+            return True
+
+    def rendered(self) -> dict[Hashable, Any]:
+        """Return a copy of everything memoized for the current bank version."""
+        return dict(self._current().renders)
+
+    def memo(self, key: Hashable, render: Callable[[dict[str, Any]], T]) -> T:
+        """Return ``render(bank)`` computed once per bank version for ``key``."""
+        snapshot = self._current()
+        try:
+            return snapshot.renders[key]
+        except KeyError:
+            value = snapshot.renders[key] = render(snapshot.bank)
+            return value
+
+
+_registry: QuestionBankRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> QuestionBankRegistry:
+    """Return the shared registry (poll interval from `LIBRARY_QUESTION_BANK_POLL_SECONDS`)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                interval = float(
+                    os.getenv("LIBRARY_QUESTION_BANK_POLL_SECONDS", DEFAULT_POLL_INTERVAL)
+                )
+                _registry = QuestionBankRegistry(poll_interval=interval)
+    return _registry
+
+
+def set_registry(registry: QuestionBankRegistry | None) -> None:
+    global _registry
+    _registry = registry
+
+
+def _load_bank() -> dict[str, Any]:
+    return get_registry().bank
+
+
+def _get_tool_entry(tool_key: str, bank: dict[str, Any] | None = None) -> dict[str, Any]:
+    bank = _load_bank() if bank is None else bank
     try:
         return bank[tool_key]
     except KeyError as exc:  # pragma: no cover - defensive; enforced by tests
@@ -76,7 +227,17 @@ def format_question_collection(
     bullet_indent: str = "",
 ) -> str:
     """Return a formatted requirements block for the tool's question list."""
-    entry = _get_tool_entry(tool_key)
+    return get_registry().memo(
+        ("collection", tool_key, heading, heading_indent, bullet_indent),
+        lambda bank: _render_collection(
+            _get_tool_entry(tool_key, bank), heading, heading_indent, bullet_indent
+        ),
+    )
+
+
+def _render_collection(
+    entry: dict[str, Any], heading: str | None, heading_indent: str, bullet_indent: str
+) -> str:
     collection = entry.get("collection", {})
     questions_block = dict(collection)
     questions_block["bullet_indent"] = bullet_indent
@@ -98,7 +259,21 @@ def format_confirmation_checklist(
     closing_line: str | None = None,
 ) -> str:
     """Return confirmation text derived from the JSON bank."""
-    entry = _get_tool_entry(tool_key)
+    return get_registry().memo(
+        ("confirmation", tool_key, heading, heading_indent, bullet_indent, closing_line),
+        lambda bank: _render_confirmation(
+            _get_tool_entry(tool_key, bank), heading, heading_indent, bullet_indent, closing_line
+        ),
+    )
+
+
+def _render_confirmation(
+    entry: dict[str, Any],
+    heading: str | None,
+    heading_indent: str,
+    bullet_indent: str,
+    closing_line: str | None,
+) -> str:
     confirmation = entry.get("confirmation", {})
     heading_text = heading or confirmation.get("default_heading")
     closing = confirmation.get("default_closing_line")
@@ -116,3 +291,56 @@ def format_confirmation_checklist(
     if closing:
         lines.append(f"{heading_indent}{closing}")
     return "\n".join(lines)
+
+
+PathReader = Callable[[Any], list[tuple[str, Any]]]
+
+
+@dataclass(frozen=True)
+class RequiredQuestion:
+    id: str
+    prompt: str
+    read: PathReader
+
+
+def required_questions(tool_key: str) -> tuple[RequiredQuestion, ...]:
+    """Return the tool's required collection questions with compiled readers."""
+    return get_registry().memo(
+        ("required", tool_key), lambda bank: _compile_required(_get_tool_entry(tool_key, bank))
+    )
+
+
+def _compile_required(entry: dict[str, Any]) -> tuple[RequiredQuestion, ...]:
+    questions = entry.get("collection", {}).get("questions", [])
+    return tuple(
+        RequiredQuestion(
+            id=question["id"],
+            prompt=question.get("prompt", ""),
+            read=compile_path(question["id"]).read,
+        )
+        for question in questions
+        if question.get("required")
+    )
+
+
+def _is_blank(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip()
+    if isinstance(value, (list, dict)):
+        return not value
+    return False
+
+
+def missing_required(
+    tool_key: str, section: Mapping[str, Any] | None
+) -> list[tuple[str, RequiredQuestion]]:
+    """Return ``(path, question)`` for each required answer absent from ``section``."""
+    section = section or {}
+    return [
+        (path, question)
+        for question in required_questions(tool_key)
+        for path, value in question.read(section)
+        if _is_blank(value)
+    ]
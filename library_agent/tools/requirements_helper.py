@@ -1,10 +1,17 @@
-"""Helpers for deriving conversational requirements from Pydantic models."""
+"""Helpers for deriving conversational requirements from Pydantic models.
+
+Walking a model is done once per class: ``model_schema`` caches the
+flattened ``RequirementLine`` tuple together with a compiled ``FieldPath``
+per line, and prompt rendering, state merging and missing-field checks all
+read from that cache.
+"""
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 import inspect
 from types import UnionType
-from typing import Any, Iterable, Literal, Union, get_args, get_origin
+from typing import Any, Iterable, Literal, Mapping, Union, get_args, get_origin
 
 from pydantic import BaseModel
 from pydantic.fields import PydanticUndefined
@@ -103,9 +110,83 @@ def _describe_model_fields(
     return lines
 
 
+def _top_level(path: str) -> str:
+    return path.split(".", 1)[0].removesuffix("[]")
+
+
+@dataclass(frozen=True)
+class FieldPath:
+    """Compiled accessor for a dotted path into model-shaped dicts.
+
+    ``[]`` segments stand for every item of a list, so ``read`` may return
+    several concrete paths (``household_members[1].name``) or none.
+    """
+
+    path: str
+    keys: tuple[str, ...]
+    item: FieldPath | None = None
+
+    def _lookup(self, document: Any) -> Any:
+        for key in self.keys:
+            if not isinstance(document, Mapping):
+                return None
+            document = document.get(key)
+        return document
+
+    def get(self, document: Any) -> Any:
+        """Return the value at the path, or ``None``; list paths return a list."""
+        value = self._lookup(document)
+        if self.item is None:
+            return value
+        if not isinstance(value, list):
+            return []
+        return [self.item.get(item) for item in value]
+
+    def read(self, document: Any) -> list[tuple[str, Any]]:
+        """Return ``(concrete_path, value)`` pairs, one per list item reached."""
+        value = self._lookup(document)
+        if self.item is None:
+            return [(self.path, value)]
+        if not isinstance(value, list):
+            return []
+        head = ".".join(self.keys)
+        return [
+            (f"{head}[{index}].{path}", found)
+            for index, item in enumerate(value)
+            for path, found in self.item.read(item)
+        ]
+
+
+@lru_cache(maxsize=None)
+def compile_path(path: str) -> FieldPath:
+    """Return the ``FieldPath`` for a dotted path such as ``patron.name``."""
+    head, is_list, rest = path.partition("[].")
+    return FieldPath(path, tuple(head.split(".")), compile_path(rest) if is_list else None)
+
+
+@dataclass(frozen=True)
+class ModelSchema:
+    model: type[BaseModel]
+    lines: tuple[RequirementLine, ...]
+    paths: dict[str, FieldPath]
+    top_level: frozenset[str]
+
+
+@lru_cache(maxsize=None)
+def model_schema(model: type[BaseModel]) -> ModelSchema:
+    """Return the flattened requirements of ``model``, walked once per class."""
+    lines = tuple(_describe_model_fields(model))
+    return ModelSchema(
+        model=model,
+        lines=lines,
+        paths={line.path: compile_path(line.path) for line in lines},
+        top_level=frozenset(model.model_fields),
+    )
+
+
 def iter_model_requirements(model: type[BaseModel]) -> Iterable[RequirementLine]:
     """Yield requirement lines for the given model."""
-    return _describe_model_fields(model)
+    return model_schema(model).lines
 
 
 def format_requirement_section(
@@ -114,9 +195,37 @@ def format_requirement_section(
     heading: str | None = None,
     heading_indent: str = "",
     bullet_indent: str = "",
+    sections: Iterable[str] | None = None,
+) -> str:
+    """Format a textual requirements block for prompts.
+
+    With ``sections``, nested lines are listed only under those top-level
+    fields; every other top-level field keeps its single summary line.
+    """
+    return _format_requirement_section(
+        model,
+        heading,
+        heading_indent,
+        bullet_indent,
+        None if sections is None else frozenset(sections),
+    )
+
+
+@lru_cache(maxsize=256)
+def _format_requirement_section(
+    model: type[BaseModel],
+    heading: str | None,
+    heading_indent: str,
+    bullet_indent: str,
+    sections: frozenset[str] | None,
 ) -> str:
-    """Format a textual requirements block for prompts."""
-    lines = list(iter_model_requirements(model))
+    lines: Iterable[RequirementLine] = model_schema(model).lines
+    if sections is not None:
+        lines = [
+            line
+            for line in lines
+            if _top_level(line.path) == line.path or _top_level(line.path) in sections
+        ]
     formatted: list[str] = []
     if heading:
         formatted.append(f"{heading_indent}{heading}")
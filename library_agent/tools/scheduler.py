@@ -0,0 +1,274 @@
+"""Room and program-slot scheduling for `request_event_action`.
+
+Every room keeps its bookings as parallel sorted arrays of start/end times.
+Bookings in a room never overlap, so one ``bisect`` finds the neighbors of a
+requested slot and the overlap check is O(log n). Rooms are ordered by
+capacity and tried smallest-first, so a request lands in the tightest room
+that fits. Requests no room can take join a waitlist indexed by start time;
+cancelling a booking only revisits the waitlisted requests overlapping the
+freed slot and promotes those that now fit, highest priority first.
+
+Requests larger than the biggest room, or starting in the past, are rejected
+up front rather than waitlisted, since they could never be usefully
+promoted. Bookings
+and waitlist entries whose slot has ended are swept out by ``book`` about
+once a minute, so the tables only hold upcoming events.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Literal
+
+DEFAULT_DURATION = timedelta(hours=1)
+# Seconds between sweeps for ended bookings; ``book`` checks at most this often.
+_EXPIRE_EVERY = 60.0
+
+
+@dataclass(frozen=True)
+class Room:
+    name: str
+    capacity: int
+
+
+@dataclass(frozen=True)
+class Booking:
+    request_id: str
+    status: Literal["scheduled", "waitlisted", "over_capacity", "past"]
+    start: datetime
+    end: datetime
+    room: str | None = None
+
+
+@dataclass
+class _RoomSchedule:
+    room: Room
+    starts: list[float] = field(default_factory=list)
+    ends: list[float] = field(default_factory=list)
+    request_ids: list[str] = field(default_factory=list)
+
+    def fits(self, start: float, end: float) -> bool:
+        index = bisect_right(self.starts, start)
+        if index and self.ends[index - 1] > start:
+            return False
+        return index == len(self.starts) or self.starts[index] >= end
+
+    def insert(self, start: float, end: float, request_id: str) -> None:
+        index = bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.request_ids.insert(index, request_id)
+
+    def expire(self, now: float) -> list[str]:
+        """Drop bookings that ended by ``now``; return their request ids.
+
+        Bookings never overlap, so ``ends`` is sorted along with ``starts``.
+        """
+        count = bisect_right(self.ends, now)
+        expired = self.request_ids[:count]
+        del self.starts[:count], self.ends[:count], self.request_ids[:count]
+        return expired
+
+    def remove(self, start: float, request_id: str) -> None:
+        index = bisect_left(self.starts, start)
+        while self.request_ids[index] != request_id:
+            index += 1
+        del self.starts[index], self.ends[index], self.request_ids[index]
+
+
+@dataclass(frozen=True)
+class _WaitlistEntry:
+    priority: int
+    sequence: int
+    request_id: str
+    start: float
+    end: float
+    attendees: int
+
+
+def parse_event_time(value: str | None) -> datetime | None:
+    """Parse an ISO 8601 date/time; return ``None`` for freeform windows."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class EventScheduler:
+    """Capacity-aware room booking with an auto-promoting waitlist."""
+
+    def __init__(
+        self,
+        rooms: Iterable[Room],
+        *,
+        default_duration: timedelta = DEFAULT_DURATION,
+        durations: dict[str, timedelta] | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._rooms = sorted(
+            (_RoomSchedule(room) for room in rooms),
+            key=lambda schedule: (schedule.room.capacity, schedule.room.name),
+        )
+        self._capacities = [schedule.room.capacity for schedule in self._rooms]
+        self._by_name = {schedule.room.name: schedule for schedule in self._rooms}
+        self.default_duration = default_duration
+        self.durations = {key.casefold(): value for key, value in (durations or {}).items()}
+        self._bookings: dict[str, Booking] = {}
+        # Waitlisted entries sorted by (start, sequence), plus the longest
+        # waitlisted span so overlap scans know how far back to look.
+        self._waitlist_keys: list[tuple[float, int]] = []
+        self._waitlist: dict[int, _WaitlistEntry] = {}
+        self._waiting: dict[str, int] = {}
+        self._longest_wait = 0.0
+        self._sequence = itertools.count()
+        self._clock = clock
+        self._expired_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def max_capacity(self) -> int:
+        return self._capacities[-1] if self._capacities else 0
+
+    @classmethod
+    def from_file(
+        cls, path: str | Path, *, clock: Callable[[], float] = time.time
+    ) -> "EventScheduler":
+        """Load rooms (and optional per-event-type minutes) from JSON."""
+        with Path(path).open("r", encoding="utf-8") as fh:
+            config = json.load(fh)
+        return cls(
+            [Room(room["name"], int(room["capacity"])) for room in config["rooms"]],
+            default_duration=timedelta(
+                minutes=config.get("default_duration_minutes", 60)
+            ),
+            durations={
+                event_type: timedelta(minutes=minutes)
+                for event_type, minutes in config.get("duration_minutes", {}).items()
+            },
+            clock=clock,
+        )
+
+    def duration_for(self, event_type: str) -> timedelta:
+        return self.durations.get(event_type.casefold(), self.default_duration)
+
+    def _place(self, request_id: str, start: float, end: float, attendees: int) -> str | None:
+        for schedule in self._rooms[bisect_left(self._capacities, attendees) :]:
+            if schedule.fits(start, end):
+                schedule.insert(start, end, request_id)
+                return schedule.room.name
+        return None
+
+    def book(
+        self,
+        request_id: str,
+        start: datetime,
+        *,
+        attendees: int = 1,
+        duration: timedelta | None = None,
+        priority: int = 0,
+    ) -> Booking:
+        """Book the smallest free room that fits, or waitlist the request.
+
+        Lower ``priority`` values are promoted first; ties go first-come,
+        first-served. Requests no room is big enough for come back
+        "over_capacity", and requests starting before now come back "past";
+        neither is kept.
+        """
+        end = start + (duration or self.default_duration)
+        if attendees > self.max_capacity:
+            return Booking(request_id, "over_capacity", start, end)
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        now = self._clock()
+        if start_ts < now:
+            return Booking(request_id, "past", start, end)
+        with self._lock:
+            self._expire(now)
+            room = self._place(request_id, start_ts, end_ts, attendees)
+            if room is not None:
+                booking = Booking(request_id, "scheduled", start, end, room)
+            else:
+                booking = Booking(request_id, "waitlisted", start, end)
+                sequence = next(self._sequence)
+                self._waitlist[sequence] = _WaitlistEntry(
+                    priority, sequence, request_id, start_ts, end_ts, attendees
+                )
+                insort(self._waitlist_keys, (start_ts, sequence))
+                self._waiting[request_id] = sequence
+                self._longest_wait = max(self._longest_wait, end_ts - start_ts)
+            self._bookings[request_id] = booking
+            return booking
+
+    def cancel(self, request_id: str) -> list[Booking]:
+        """Cancel a booking or waitlist entry; return any promoted bookings."""
+        with self._lock:
+            booking = self._bookings.pop(request_id, None)
+            if booking is None:
+                return []
+            if booking.status == "waitlisted":
+                self._unwait(self._waitlist[self._waiting[request_id]])
+                return []
+            self._by_name[booking.room].remove(booking.start.timestamp(), request_id)
+            return self._promote(booking.start.timestamp(), booking.end.timestamp())
+
+    def _expire(self, now: float) -> None:
+        if now - self._expired_at < _EXPIRE_EVERY:
+            return
+        self._expired_at = now
+        for schedule in self._rooms:
+            for request_id in schedule.expire(now):
+                del self._bookings[request_id]
+        # Only entries starting before ``now`` can have ended by then.
+        high = bisect_left(self._waitlist_keys, (now, -1))
+        for _, sequence in self._waitlist_keys[:high]:
+            entry = self._waitlist[sequence]
+            if entry.end <= now:
+                self._unwait(entry)
+                del self._bookings[entry.request_id]
+
+    def _unwait(self, entry: _WaitlistEntry) -> None:
+        del self._waitlist[entry.sequence], self._waiting[entry.request_id]
+        index = bisect_left(self._waitlist_keys, (entry.start, entry.sequence))
+        del self._waitlist_keys[index]
+
+    def _promote(self, freed_start: float, freed_end: float) -> list[Booking]:
+        low = bisect_left(self._waitlist_keys, (freed_start - self._longest_wait, -1))
+        high = bisect_left(self._waitlist_keys, (freed_end, -1))
+        candidates = [
+            (entry.priority, entry.sequence, entry)
+            for entry in (
+                self._waitlist[sequence]
+                for _, sequence in self._waitlist_keys[low:high]
+            )
+            if entry.end > freed_start
+        ]
+        heapq.heapify(candidates)
+        promoted: list[Booking] = []
+        while candidates:
+            entry = heapq.heappop(candidates)[2]
+            room = self._place(entry.request_id, entry.start, entry.end, entry.attendees)
+            if room is None:
+                continue
+            self._unwait(entry)
+            waiting = self._bookings[entry.request_id]
+            booking = Booking(entry.request_id, "scheduled", waiting.start, waiting.end, room)
+            self._bookings[entry.request_id] = booking
+            promoted.append(booking)
+        return promoted
+
+    def status(self, request_id: str) -> Booking | None:
+        return self._bookings.get(request_id)
+
+    def waitlist_length(self) -> int:
+        return len(self._waiting)
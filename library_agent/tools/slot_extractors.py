@@ -0,0 +1,333 @@
+"""Local extractors and validators compiled from the question bank.
+
+Every question in ``config/questions/*.json`` carries a ``validation`` text
+such as "email address" or "one of hardcover|paperback|ebook|audiobook".
+``compile_rule`` turns each distinct text into a validator built from
+precompiled regexes and enum sets, and the values that can be recognised
+without understanding the sentence (emails, card numbers, state codes, ZIP
+and postal codes, formats, ISO dates, head counts) also get an extractor.
+
+``upsert_slots`` runs the extractors for a tool over a patron message and
+stores what it finds under ``pending_slots`` in `LIBRARY_STATE_KEY`, keyed by
+state section and question ``id``. Pending values never overwrite a saved
+field; the agent confirms them and saves the section as usual, which clears
+that section's pending values.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Mapping
+
+from library_agent.tools.question_bank import _get_tool_entry, get_registry
+from library_agent.tools.requirements_helper import FieldPath, compile_path
+from library_agent.tools.tools import (
+    LIBRARY_STATE_KEY,
+    PENDING_SLOTS_KEY,
+    TOOL_SECTIONS,
+    get_state_codec,
+    load_conversation_state,
+)
+
+_US_STATES = (
+    "AL AK AZ AR CA CO CT DE DC FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS "
+    "MO MT NE NV NH NJ NM NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA WV WI "
+    "WY AS GU MP PR VI"
+)
+_CA_PROVINCES = "AB BC MB NB NL NS NT NU ON PE QC SK YT"
+STATE_CODES = frozenset((_US_STATES + " " + _CA_PROVINCES).split())
+
+_POSTAL = r"\d{5}(?:-\d{4})?|[A-Za-z]\d[A-Za-z] ?\d[A-Za-z]\d"
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+_POSTAL_RE = re.compile(rf"(?:{_POSTAL})")
+# "Springfield, IL 62704" / "Ottawa ON K1A 0B6": a state code right before a postal code.
+_ADDRESS_TAIL_RE = re.compile(rf"\b([A-Z]{{2}})[ ,]+({_POSTAL})\b")
+_POSTAL_CUE_RE = re.compile(
+    rf"\b(?:zip|postal)(?: ?code)?(?: is|:)?\s+({_POSTAL})\b", re.IGNORECASE
+)
+_CARD_ID_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9-]{2,31}")
+_CARD_RE = re.compile(
+    r"\b(CARD-[A-Za-z0-9]{3,20})\b"
+    r"|\bcard (?:number|no\.?|#|id)\s*(?:is|:|=)?\s*#?([A-Za-z0-9-]*\d[A-Za-z0-9-]*)",
+    re.IGNORECASE,
+)
+_ISO_DATE_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+_HEADCOUNT_RE = re.compile(
+    r"\b(?:(\d{1,4}) (?:people|persons|attendees|guests|participants|patrons|kids|"
+    r"children|adults|students)|(?:party|group) of (\d{1,4}))\b",
+    re.IGNORECASE,
+)
+_ENUM_RE = re.compile(r"one of (.+)", re.IGNORECASE)
+_CARD_FIELDS = frozenset({"card_number", "primary_card_number"})
+
+Validator = Callable[[Any], Any]
+Extractor = Callable[[str], list[Any]]
+
+
+@dataclass(frozen=True)
+class SlotRule:
+    """Validator for one ``validation`` text, plus an extractor if it has one."""
+
+    validation: str
+    validate: Validator
+    extract: Extractor | None = None
+
+
+@dataclass(frozen=True)
+class SlotExtractor:
+    question_id: str
+    path: FieldPath | None  # None for list items such as household_members[]
+    required: bool
+    rule: SlotRule
+    extract: Extractor | None
+
+
+def _text(value: Any) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("expected a non-empty string")
+    return value.strip()
+
+
+def _validate_email(value: Any) -> str:
+    text = _text(value)
+    if not _EMAIL_RE.fullmatch(text):
+        raise ValueError(f"not an email address: {text!r}")
+    return text
+
+
+def _validate_card_id(value: Any) -> str:
+    text = _text(value)
+    if not _CARD_ID_RE.fullmatch(text):
+        raise ValueError(f"not a card id: {text!r}")
+    return text.upper()
+
+
+def _validate_state(value: Any) -> str:
+    text = _text(value).upper()
+    if text not in STATE_CODES:
+        raise ValueError(f"not a state or province abbreviation: {text!r}")
+    return text
+
+
+def _validate_postal(value: Any) -> str:
+    text = _text(value).upper()
+    if not _POSTAL_RE.fullmatch(text):
+        raise ValueError(f"not a ZIP or postal code: {text!r}")
+    return text
+
+
+def _validate_iso_date(value: Any) -> str:
+    text = _text(value)
+    try:
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise ValueError(f"not an ISO 8601 date: {text!r}") from None
+
+
+def _validate_positive_int(value: Any) -> int:
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"expected an integer >= 1, got {value!r}")
+    return value
+
+
+def _validate_list(value: Any) -> list[str]:
+    items = value.split(",") if isinstance(value, str) else value
+    if not isinstance(items, list):
+        raise ValueError("expected a list of strings")
+    cleaned = [item.strip() for item in items if isinstance(item, str) and item.strip()]
+    if not cleaned:
+        raise ValueError("expected at least one non-empty entry")
+    return cleaned
+
+
+def _extract_emails(text: str) -> list[str]:
+    return _EMAIL_RE.findall(text)
+
+
+def _extract_cards(text: str) -> list[str]:
+    return [(cue or bare).upper() for bare, cue in _CARD_RE.findall(text)]
+
+
+def _extract_states(text: str) -> list[str]:
+    return [state for state, _ in _ADDRESS_TAIL_RE.findall(text) if state in STATE_CODES]
+
+
+def _extract_postal_codes(text: str) -> list[str]:
+    found = [
+        (match.start(2), match.group(2).upper())
+        for match in _ADDRESS_TAIL_RE.finditer(text)
+        if match.group(1) in STATE_CODES
+    ]
+    found += [(match.start(1), match.group(1).upper()) for match in _POSTAL_CUE_RE.finditer(text)]
+    return list(dict.fromkeys(code for _, code in sorted(found)))
+
+
+def _extract_iso_dates(text: str) -> list[str]:
+    dates = []
+    for match in _ISO_DATE_RE.findall(text):
+        try:
+            dates.append(date.fromisoformat(match).isoformat())
+        except ValueError:
+            continue
+    return dates
+
+
+def _extract_headcounts(text: str) -> list[int]:
+    counts = (int(first or second) for first, second in _HEADCOUNT_RE.findall(text))
+    return [count for count in counts if count >= 1]
+
+
+def _enum_rule(validation: str, options: Iterable[str]) -> SlotRule:
+    choices = frozenset(option.strip().lower() for option in options if option.strip())
+    pattern = re.compile(
+        r"\b(" + "|".join(sorted(map(re.escape, choices), key=len, reverse=True)) + r")s?\b"
+    )
+
+    def validate(value: Any) -> str:
+        text = _text(value).lower().replace("-", "")
+        if text not in choices:
+            raise ValueError(f"expected one of {sorted(choices)}, got {value!r}")
+        return text
+
+    def extract(text: str) -> list[str]:
+        # Only an unambiguous mention counts ("ebook or audiobook?" is a question).
+        found = set(pattern.findall(text.lower().replace("-", "")))
+        return list(found) if len(found) == 1 else []
+
+    return SlotRule(validation, validate, extract)
+
+
+_RULES: dict[str, tuple[Validator, Extractor | None]] = {
+    "email address": (_validate_email, _extract_emails),
+    "numeric or alphanumeric card id": (_validate_card_id, _extract_cards),
+    "alphanumeric": (_validate_card_id, None),
+    "state abbreviation": (_validate_state, _extract_states),
+    "zip or postal code": (_validate_postal, _extract_postal_codes),
+    "iso 8601 date": (_validate_iso_date, _extract_iso_dates),
+    "iso 8601 date or freeform window": (_text, _extract_iso_dates),
+    "integer >=1": (_validate_positive_int, _extract_headcounts),
+    "list of genres": (_validate_list, None),
+    "list of titles": (_validate_list, None),
+}
+
+
+@lru_cache(maxsize=None)
+def compile_rule(validation: str | None) -> SlotRule:
+    """Return the rule for a ``validation`` text; unknown texts only require a value."""
+    text = (validation or "").strip()
+    enum = _ENUM_RE.fullmatch(text)
+    if enum:
+        return _enum_rule(text, enum.group(1).split("|"))
+    validate, extract = _RULES.get(text.lower(), (_text, None))
+    return SlotRule(text, validate, extract)
+
+
+def _compile_question(question: Mapping[str, Any]) -> SlotExtractor:
+    question_id = question["id"]
+    rule = compile_rule(question.get("validation"))
+    path = None if "[]" in question_id else compile_path(question_id)
+    extract = rule.extract
+    if path is not None and path.keys[-1] in _CARD_FIELDS:
+        # The bank spells card numbers several ways; they all look the same in text.
+        extract = _extract_cards
+    return SlotExtractor(question_id, path, bool(question.get("required")), rule, extract)
+
+
+def compile_tool(tool_key: str) -> tuple[SlotExtractor, ...]:
+    """Compile every question of ``tool_key``'s collection, once per bank version."""
+
+    def compile_entry(bank: dict[str, Any]) -> tuple[SlotExtractor, ...]:
+        questions = _get_tool_entry(tool_key, bank).get("collection", {}).get("questions", [])
+        return tuple(_compile_question(question) for question in questions)
+
+    return get_registry().memo(("slots", tool_key), compile_entry)
+
+
+def validate_slot(tool_key: str, question_id: str, value: Any) -> Any:
+    """Return ``value`` normalised for the question; raise ``ValueError`` if invalid."""
+    for extractor in compile_tool(tool_key):
+        if extractor.question_id == question_id:
+            try:
+                return extractor.rule.validate(value)
+            except ValueError as exc:
+                raise ValueError(f"{tool_key}.{question_id}: {exc}") from None
+    raise KeyError(f"Unknown question '{question_id}' for tool '{tool_key}'")
+
+
+def extract_slots(
+    tool_key: str, text: str, *, saved: Mapping[str, Any] | None = None
+) -> dict[str, Any]:
+    """Return ``{question_id: value}`` found in ``text`` for ``tool_key``.
+
+    Questions sharing an extractor take its matches in bank order, so the
+    first address in a message fills ``shipping_address`` before
+    ``preferred_vendor_address``. Paths already set in ``saved`` (the stored
+    section) are left alone.
+    """
+    matches: dict[Extractor, list[Any]] = {}
+    taken: dict[Extractor, int] = {}
+    slots: dict[str, Any] = {}
+    for extractor in compile_tool(tool_key):
+        extract = extractor.extract
+        if extract is None or extractor.path is None:
+            continue
+        if extract not in matches:
+            matches[extract] = extract(text)
+        position = taken.get(extract, 0)
+        if position >= len(matches[extract]):
+            continue
+        taken[extract] = position + 1
+        if extractor.path.get(saved) is not None:
+            continue
+        slots[extractor.question_id] = matches[extract][position]
+    return slots
+
+
+def upsert_slots(
+    state: Any, tool_keys: Iterable[str], text: str
+) -> dict[str, dict[str, Any]]:
+    """Extract slots from ``text`` into ``pending_slots``; return the new values.
+
+    ``state`` is the session state (or a ``CallbackContext.state``); it is only
+    written when a pending value changes.
+    """
+    conversation = load_conversation_state(state)
+    pending = {
+        section: dict(values)
+        for section, values in (conversation.get(PENDING_SLOTS_KEY) or {}).items()
+    }
+    changed: dict[str, dict[str, Any]] = {}
+    for tool_key in tool_keys:
+        section = TOOL_SECTIONS[tool_key]
+        found = extract_slots(tool_key, text, saved=conversation.get(section))
+        current = pending.setdefault(section, {})
+        updates = {key: value for key, value in found.items() if current.get(key) != value}
+        if updates:
+            current.update(updates)
+            changed[section] = updates
+    if changed:
+        conversation[PENDING_SLOTS_KEY] = {
+            section: values for section, values in pending.items() if values
+        }
+        state[LIBRARY_STATE_KEY] = get_state_codec().encode(conversation)
+    return changed
+
+
+def describe_pending_slots(state: Any, tool_keys: Iterable[str]) -> str | None:
+    """One instruction line listing pending values for ``tool_keys``' sections."""
+    pending = load_conversation_state(state).get(PENDING_SLOTS_KEY) or {}
+    items = [
+        f"{TOOL_SECTIONS[tool_key]}.{question_id}={value!r}"
+        for tool_key in tool_keys
+        for question_id, value in pending.get(TOOL_SECTIONS[tool_key], {}).items()
+    ]
+    if not items:
+        return None
+    return (
+        "Details already captured from the patron's messages (confirm them "
+        "instead of asking again): " + ", ".join(items)
+    )
@@ -0,0 +1,225 @@
+"""Codecs for the conversation state value kept under ``LIBRARY_STATE_KEY``.
+
+The plain codec stores the dict exactly as the state tool produced it. The
+compact codec swaps field names for short tags, interns ``Literal`` choices as
+small integers and can zlib-compress the result into an ASCII string so the
+value stays JSON-serializable for every session service. Both codecs decode
+either format, so switching codecs never strands existing sessions.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import zlib
+from typing import Any, Iterable, Protocol
+
+COMPACT_MARKER = "~c"
+ZLIB_PREFIX = "z1:"
+
+# Append-only: tags are persisted in sessions, never reuse or reorder them.
+FIELD_TAGS: dict[str, str] = {
+    "recommendation": "r",
+    "book_order": "o",
+    "card_request": "c",
+    "household_request": "h",
+    "event_request": "e",
+    "last_confirmation_note": "n",
+    "patron": "p",
+    "name": "nm",
+    "card_number": "cn",
+    "contact_email": "em",
+    "favorite_genres": "fg",
+    "mood": "md",
+    "recent_reads": "rr",
+    "title": "t",
+    "author": "a",
+    "format": "f",
+    "shipping_address": "sa",
+    "preferred_vendor": "pv",
+    "preferred_vendor_address": "va",
+    "needed_by": "nb",
+    "street_line1": "s1",
+    "street_line2": "s2",
+    "city": "ct",
+    "state_or_province": "sp",
+    "postal_code": "pc",
+    "country": "co",
+    "household_members": "hm",
+    "primary_card_number": "pn",
+    "new_member": "nw",
+    "relationship": "rl",
+    "event_type": "et",
+    "desired_date": "dd",
+    "attendees": "at",
+    "special_requirements": "sr",
+    "pending_slots": "ps",
+}
+_TAG_FIELDS = {tag: field for field, tag in FIELD_TAGS.items()}
+
+# Append-only, like FIELD_TAGS; mirrors the Literal choices on the models.
+INTERNED_VALUES: dict[str, tuple[str, ...]] = {
+    "format": ("hardcover", "paperback", "ebook", "audiobook"),
+}
+_INTERNED_INDEX = {
+    field: {value: index for index, value in enumerate(values)}
+    for field, values in INTERNED_VALUES.items()
+}
+
+# Sections dropped first when a state exceeds its byte budget.
+DEFAULT_DROP_ORDER: tuple[str, ...] = (
+    "pending_slots",
+    "last_confirmation_note",
+    "recommendation",
+    "event_request",
+    "household_request",
+    "card_request",
+    "book_order",
+)
+
+
+class StateCodec(Protocol):
+    name: str
+
+    def encode(self, state: dict[str, Any], *, recent: Iterable[str] = ()) -> Any:
+        ...
+
+    def decode(self, value: Any) -> dict[str, Any]:
+        ...
+
+
+def _tag(value: Any, field: str | None = None) -> Any:
+    if isinstance(value, dict):
+        return {FIELD_TAGS.get(key, key): _tag(item, key) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_tag(item) for item in value]
+    if field in _INTERNED_INDEX and isinstance(value, str):
+        return _INTERNED_INDEX[field].get(value, value)
+    return value
+
+
+def _untag(value: Any, field: str | None = None) -> Any:
+    if isinstance(value, dict):
+        result: dict[str, Any] = {}
+        for key, item in value.items():
+            name = _TAG_FIELDS.get(key, key)
+            result[name] = _untag(item, name)
+        return result
+    if isinstance(value, list):
+        return [_untag(item) for item in value]
+    if field in INTERNED_VALUES and isinstance(value, int):
+        return INTERNED_VALUES[field][value]
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def encoded_size(value: Any) -> int:
+    """Bytes the session service needs to persist ``value`` as JSON."""
+    return len(_dumps(value).encode("utf-8"))
+
+
+def decode_state(value: Any) -> dict[str, Any]:
+    """Decode a stored state value written by any codec."""
+    if not value:
+        return {}
+    if isinstance(value, str) and value.startswith(ZLIB_PREFIX):
+        raw = zlib.decompress(base64.b64decode(value[len(ZLIB_PREFIX):]))
+        value = json.loads(raw)
+    if isinstance(value, dict) and COMPACT_MARKER in value:
+        tagged = dict(value)
+        tagged.pop(COMPACT_MARKER)
+        return _untag(tagged)
+    if isinstance(value, dict):
+        return value
+    raise ValueError(f"Unrecognized conversation state encoding: {type(value).__name__}")
+
+
+class _BudgetedCodec:
+    name = "base"
+
+    def __init__(
+        self,
+        *,
+        budget_bytes: int | None = None,
+        drop_order: Iterable[str] = DEFAULT_DROP_ORDER,
+    ) -> None:
+        self.budget_bytes = budget_bytes
+        self.drop_order = tuple(drop_order)
+
+    def _encode_unbudgeted(self, state: dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+    def encode(self, state: dict[str, Any], *, recent: Iterable[str] = ()) -> Any:
+        """Encode ``state``, dropping stale sections to honour the budget.
+
+        Sections named in ``recent`` were just written and are never dropped,
+        so a state made only of recent sections may still exceed the budget.
+        """
+        encoded = self._encode_unbudgeted(state)
+        if self.budget_bytes is None or encoded_size(encoded) <= self.budget_bytes:
+            return encoded
+        keep = set(recent)
+        trimmed = dict(state)
+        for section in self.drop_order:
+            if section in keep or section not in trimmed:
+                continue
+            trimmed.pop(section)
+            encoded = self._encode_unbudgeted(trimmed)
+            if encoded_size(encoded) <= self.budget_bytes:
+                break
+        return encoded
+
+    def decode(self, value: Any) -> dict[str, Any]:
+        return decode_state(value)
+
+
+class PlainStateCodec(_BudgetedCodec):
+    """Store the state dict unchanged."""
+
+    name = "plain"
+
+    def _encode_unbudgeted(self, state: dict[str, Any]) -> Any:
+        return state
+
+
+class CompactStateCodec(_BudgetedCodec):
+    """Short field tags, interned enum values and optional zlib."""
+
+    name = "compact"
+
+    def __init__(
+        self,
+        *,
+        compress: bool = False,
+        level: int = 6,
+        budget_bytes: int | None = None,
+        drop_order: Iterable[str] = DEFAULT_DROP_ORDER,
+    ) -> None:
+        super().__init__(budget_bytes=budget_bytes, drop_order=drop_order)
+        self.compress = compress
+        self.level = level
+        if compress:
+            self.name = "compact+zlib"
+
+    def _encode_unbudgeted(self, state: dict[str, Any]) -> Any:
+        tagged = _tag(state)
+        tagged[COMPACT_MARKER] = 1
+        if not self.compress:
+            return tagged
+        packed = zlib.compress(_dumps(tagged).encode("utf-8"), self.level)
+        return ZLIB_PREFIX + base64.b64encode(packed).decode("ascii")
+
+
+def codec_from_name(name: str, *, budget_bytes: int | None = None) -> StateCodec:
+    """Build a codec from ``plain``, ``compact`` or ``compact+zlib``."""
+    if name == "plain":
+        return PlainStateCodec(budget_bytes=budget_bytes)
+    if name == "compact":
+        return CompactStateCodec(budget_bytes=budget_bytes)
+    if name == "compact+zlib":
+        return CompactStateCodec(compress=True, budget_bytes=budget_bytes)
+    raise ValueError(
+        f"Unknown state codec '{name}'. Available: compact, compact+zlib, plain"
+    )
@@ -0,0 +1,100 @@
+"""JSON-patch style deltas for the conversation state stored in session."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Literal
+
+from pydantic import BaseModel
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class PatchOp:
+    op: Literal["add", "replace", "remove"]
+    path: tuple[str, ...]
+    value: Any = None
+
+    @property
+    def pointer(self) -> str:
+        """RFC 6901 pointer for the operation path."""
+        escaped = (part.replace("~", "~0").replace("/", "~1") for part in self.path)
+        return "/" + "/".join(escaped)
+
+    @property
+    def dotted(self) -> str:
+        """Dotted path matching the question bank `id` convention."""
+        return ".".join(self.path)
+
+    @property
+    def section(self) -> str:
+        return self.path[0]
+
+
+def _as_plain(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(exclude_none=True)
+    return value
+
+
+def diff_update(
+    base: dict[str, Any], update: dict[str, Any], prefix: tuple[str, ...] = ()
+) -> list[PatchOp]:
+    """Return the operations needed to merge ``update`` into ``base``.
+
+    Mirrors the upsert semantics of the state tool: nested dicts merge key by
+    key, ``None`` clears a value and any other value (lists included) replaces
+    what is stored.
+    """
+    ops: list[PatchOp] = []
+    for key, value in update.items():
+        path = prefix + (key,)
+        current = base.get(key, _MISSING)
+        value = _as_plain(value)
+        if value is None:
+            if current is not _MISSING and current is not None:
+                ops.append(PatchOp("remove", path))
+            continue
+        if isinstance(value, dict) and isinstance(current, dict):
+            ops.extend(diff_update(current, value, path))
+            continue
+        if current is _MISSING or current is None:
+            ops.append(PatchOp("add", path, value))
+        elif current != value:
+            ops.append(PatchOp("replace", path, value))
+    return ops
+
+
+def apply_patch(document: dict[str, Any], ops: Iterable[PatchOp]) -> dict[str, Any]:
+    """Return a copy of ``document`` with ``ops`` applied.
+
+    Only containers along touched paths are copied; untouched sections are
+    shared with the input, which must therefore be treated as immutable.
+    """
+    result = dict(document)
+    copied: set[tuple[str, ...]] = {()}
+    for op in ops:
+        parent = result
+        for depth, key in enumerate(op.path[:-1], start=1):
+            child = parent.get(key)
+            prefix = op.path[:depth]
+            if not isinstance(child, dict):
+                child = {}
+                parent[key] = child
+                copied.add(prefix)
+            elif prefix not in copied:
+                child = dict(child)
+                parent[key] = child
+                copied.add(prefix)
+            parent = child
+        leaf = op.path[-1]
+        if op.op == "remove":
+            parent.pop(leaf, None)
+        else:
+            parent[leaf] = op.value
+    return result
+
+
+def touched_sections(ops: Iterable[PatchOp]) -> list[str]:
+    """Return top-level sections touched by ``ops`` in first-seen order."""
+    return list(dict.fromkeys(op.section for op in ops))
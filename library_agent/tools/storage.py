@@ -0,0 +1,284 @@
+"""SQLite persistence for orders, cards, household links and event requests.
+
+The database runs in WAL mode. Reads borrow a connection from a small pool;
+writes are handed to a single writer thread that drains whatever queued up
+while its previous commit was syncing (up to ``max_batch`` submissions,
+optionally lingering ``max_delay`` seconds for stragglers) and commits it as
+one transaction. Concurrent tool calls thus share one fsync instead of
+paying for their own, while each caller still returns only after its row is
+durable. Any error fails the affected callers' futures; the writer thread
+itself keeps running.
+"""
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+
+from pydantic import BaseModel
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_DELAY = 0.0
+
+
+@dataclass(frozen=True)
+class RecordTable:
+    name: str
+    key_column: str
+    columns: tuple[str, ...]
+
+
+# Columns after the key are pulled from the request (dotted paths) so common
+# lookups avoid JSON parsing; the full payloads are kept alongside.
+ORDERS = RecordTable(
+    "book_orders", "request_id", ("patron.name", "title", "format", "preferred_vendor")
+)
+CARDS = RecordTable("library_cards", "card_number", ("patron.name", "patron.contact_email"))
+HOUSEHOLD_LINKS = RecordTable(
+    "household_links", "confirmation_id", ("primary_card_number", "new_member.name")
+)
+EVENTS = RecordTable(
+    "event_requests", "event_request_id", ("event_type", "desired_date", "attendees")
+)
+TABLES = (ORDERS, CARDS, HOUSEHOLD_LINKS, EVENTS)
+
+
+def _column_name(path: str) -> str:
+    return path.replace(".", "_")
+
+
+def _schema(table: RecordTable) -> str:
+    extra = "".join(f", {_column_name(path)}" for path in table.columns)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table.name} ("
+        f"{table.key_column} TEXT PRIMARY KEY, created_at TEXT NOT NULL{extra}, "
+        "status TEXT, request_json TEXT NOT NULL, response_json TEXT NOT NULL)"
+    )
+
+
+def _extract(payload: dict[str, Any], path: str) -> Any:
+    value: Any = payload
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=FULL")
+    connection.execute("PRAGMA busy_timeout=5000")
+    return connection
+
+
+class ConnectionPool:
+    """Fixed-size pool of reader connections."""
+
+    def __init__(self, path: str, size: int = DEFAULT_POOL_SIZE) -> None:
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(_connect(path))
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Single writer thread that commits queued statements in batches."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ) -> None:
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.commits = 0
+        self.statements = 0
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._connection = _connect(path)
+        self._thread = threading.Thread(
+            target=self._run, name="library-storage-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, statements: Sequence[tuple[str, Sequence[Any]]]) -> Future:
+        """Queue statements that must commit (or fail) together."""
+        future: Future = Future()
+        self._queue.put((list(statements), future))
+        return future
+
+    def execute(self, sql: str, params: Sequence[Any]) -> None:
+        """Queue a statement and block until its batch has committed."""
+        self.submit([(sql, params)]).result()
+
+    def _drain(self, first: Any) -> list[Any]:
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                if self.max_delay > 0:
+                    item = self._queue.get(timeout=self.max_delay)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._drain(self._queue.get())
+            stop = batch[-1] is _STOP
+            work = [item for item in batch if item is not _STOP]
+            if work:
+                self._commit(work)
+            if stop:
+                self._connection.close()
+                return
+
+    def _commit(self, work: list[Any]) -> None:
+        try:
+            errors = self._commit_batch(work)
+        except Exception as exc:  # BEGIN, a savepoint or COMMIT itself failed
+            self._rollback()
+            errors = [exc] * len(work)
+        self.commits += 1
+        self.statements += sum(len(statements) for statements, _ in work)
+        for (_, future), error in zip(work, errors):
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    def _commit_batch(self, work: list[Any]) -> list[BaseException | None]:
+        errors: list[BaseException | None] = []
+        self._connection.execute("BEGIN")
+        for statements, _ in work:
+            # A failing submission only fails its own caller; savepoints keep
+            # the rest of the batch intact. Bad parameters raise more than
+            # sqlite3.Error (OverflowError for a huge int, for one).
+            self._connection.execute("SAVEPOINT submission")
+            try:
+                for sql, params in statements:
+                    self._connection.execute(sql, params)
+            except Exception as exc:
+                self._connection.execute("ROLLBACK TO submission")
+                errors.append(exc)
+            else:
+                errors.append(None)
+            self._connection.execute("RELEASE submission")
+        self._connection.execute("COMMIT")
+        return errors
+
+    def _rollback(self) -> None:
+        if self._connection.in_transaction:
+            try:
+                self._connection.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+
+class LibraryStore:
+    """Write-through store for the librarian tool requests and responses."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ) -> None:
+        self.path = str(path)
+        bootstrap = _connect(self.path)
+        for table in TABLES:
+            bootstrap.execute(_schema(table))
+        bootstrap.close()
+        self.pool = ConnectionPool(self.path, pool_size)
+        self.writer = GroupCommitWriter(
+            self.path, max_batch=max_batch, max_delay=max_delay
+        )
+
+    def _insert_sql(self, table: RecordTable) -> str:
+        columns = [
+            table.key_column,
+            "created_at",
+            *(_column_name(path) for path in table.columns),
+            "status",
+            "request_json",
+            "response_json",
+        ]
+        placeholders = ", ".join("?" for _ in columns)
+        return f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def _row(
+        self, table: RecordTable, request: BaseModel, response: BaseModel
+    ) -> list[Any]:
+        payload = request.model_dump(mode="json")
+        return [
+            getattr(response, table.key_column),
+            datetime.now(timezone.utc).isoformat(),
+            *(_extract(payload, path) for path in table.columns),
+            getattr(response, "status", None),
+            request.model_dump_json(),
+            response.model_dump_json(),
+        ]
+
+    def record(self, table: RecordTable, request: BaseModel, response: BaseModel) -> None:
+        """Durably record one request/response pair (group-committed)."""
+        self.writer.execute(self._insert_sql(table), self._row(table, request, response))
+
+    def record_many(
+        self, table: RecordTable, pairs: Sequence[tuple[BaseModel, BaseModel]]
+    ) -> None:
+        """Record several pairs atomically, in a single transaction."""
+        sql = self._insert_sql(table)
+        self.writer.submit(
+            [(sql, self._row(table, request, response)) for request, response in pairs]
+        ).result()
+
+    def fetch(self, table: RecordTable, key: str) -> tuple[str, str] | None:
+        """Return the stored ``(request_json, response_json)`` for ``key``."""
+        with self.pool.connection() as connection:
+            return connection.execute(
+                f"SELECT request_json, response_json FROM {table.name} "
+                f"WHERE {table.key_column} = ?",
+                (key,),
+            ).fetchone()
+
+    def count(self, table: RecordTable) -> int:
+        with self.pool.connection() as connection:
+            return connection.execute(f"SELECT COUNT(*) FROM {table.name}").fetchone()[0]
+
+    def close(self) -> None:
+        self.writer.close()
+        self.pool.close()
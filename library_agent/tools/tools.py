@@ -1,15 +1,46 @@
 """Mock tools for the librarian tools."""
 from __future__ import annotations
 
+import atexit
+import os
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import Any, Literal, Optional
+from typing import TYPE_CHECKING, Any, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 from google.adk.sessions.state import State
-from google.adk.tools import FunctionTool
 from google.adk.tools.tool_context import ToolContext
 
+from library_agent.tools.card_numbers import (
+    CardNumberAllocator,
+    SQLiteBlockSource,
+    WorkerBlockSource,
+)
+from library_agent.tools.dedup import DedupCache, request_fingerprint
+from library_agent.tools.household import (
+    DEFAULT_MAX_MEMBERS,
+    HouseholdFullError,
+    HouseholdIndex,
+    HouseholdStore,
+    card_key,
+    member_key,
+)
+from library_agent.tools.ids import new_id
+from library_agent.tools.instrumentation import metrics_from_env, set_tool_metrics
+from library_agent.tools.inventory import Inventory
+from library_agent.tools.question_bank import missing_required
+from library_agent.tools.requirements_helper import model_schema
+from library_agent.tools.scheduler import EventScheduler, parse_event_time
+from library_agent.tools.state_codec import StateCodec, codec_from_name
+from library_agent.tools.state_patch import apply_patch, diff_update, touched_sections
+from library_agent.tools.validation import ValidatedFunctionTool, adapter_for, coerce
+from library_agent.tools import storage
+
+if TYPE_CHECKING:
+    from library_agent.tools.catalog import CatalogIndex
+    from library_agent.tools.co_read import CoReadIndex
+
 
 class PatronDetails(BaseModel):
     name: str = Field(..., description="Full name of the patron")
@@ -88,7 +119,8 @@ class CardRequest(BaseModel):
     )
 
 
-class CardResponse(BaseModel):
+class HouseholdCard(BaseModel):
+    name: str
     card_number: str
     temporary_pin: str
     expires_at: str = Field(
@@ -96,6 +128,21 @@ class CardResponse(BaseModel):
     )
 
 
+class CardResponse(BaseModel):
+    status: Literal["issued", "household_full"] = "issued"
+    card_number: Optional[str] = None
+    temporary_pin: Optional[str] = None
+    expires_at: Optional[str] = Field(
+        default=None, description="ISO 8601 timestamp when the temporary PIN expires"
+    )
+    message: Optional[str] = Field(
+        default=None, description="Why no card was issued, to relay to the patron"
+    )
+    household_cards: list[HouseholdCard] = Field(
+        default_factory=list, description="Cards issued to household members"
+    )
+
+
 class EventRequest(BaseModel):
     patron: PatronDetails
     event_type: str = Field(
@@ -114,7 +161,8 @@ class EventRequest(BaseModel):
 
 class EventResponse(BaseModel):
     event_request_id: str
-    status: Literal["received", "scheduled", "waitlisted"]
+    status: Literal["received", "scheduled", "waitlisted", "over_capacity"]
+    message: Optional[str] = None
 
 
 class HouseholdAddRequest(BaseModel):
@@ -124,8 +172,11 @@ class HouseholdAddRequest(BaseModel):
 
 
 class HouseholdAddResponse(BaseModel):
-    confirmation_id: str
-    status: Literal["pending", "added"]
+    status: Literal["pending", "added", "already_linked", "household_full"]
+    confirmation_id: Optional[str] = None
+    message: Optional[str] = Field(
+        default=None, description="Why nothing was added, to relay to the patron"
+    )
 
 
 class ConversationState(BaseModel):
@@ -167,14 +218,287 @@ class ConversationStateUpdate(BaseModel):
 
 
 class ConversationStateResponse(BaseModel):
-    state: ConversationState
+    state: ConversationState = Field(
+        description=(
+            "Sections changed by this update, or the full state when called "
+            "without updates"
+        )
+    )
     applied_fields: list[str] = Field(
         default_factory=list,
         description="State sections touched by this update",
     )
+    applied_paths: list[str] = Field(
+        default_factory=list,
+        description="Dotted field paths whose stored values changed",
+    )
 
 
+class MissingField(BaseModel):
+    path: str = Field(description="Dotted field path, with list indexes filled in")
+    prompt: str = Field(description="Question to ask the patron")
+    pending_value: Any = Field(
+        default=None,
+        description="Value pulled from the patron's messages; confirm instead of asking",
+    )
+
+
+class MissingFieldsResponse(BaseModel):
+    section: str
+    missing: list[MissingField] = Field(
+        default_factory=list,
+        description="Required question-bank fields not yet saved for the section",
+    )
+    complete: bool
+
+
+SectionName = Literal[
+    "recommendation", "book_order", "card_request", "household_request", "event_request"
+]
+# Question-bank tool key -> `ConversationState` section it fills.
+TOOL_SECTIONS: dict[str, SectionName] = {
+    "recommend_books": "recommendation",
+    "order_book": "book_order",
+    "issue_library_card": "card_request",
+    "add_household_member": "household_request",
+    "request_library_event": "event_request",
+}
+_SECTION_TOOLS = {section: tool_key for tool_key, section in TOOL_SECTIONS.items()}
+
 LIBRARY_STATE_KEY = f"{State.APP_PREFIX}library_conversation_state"
+# Values the local slot extractors pulled from patron messages, by section.
+PENDING_SLOTS_KEY = "pending_slots"
+
+_budget_env = os.getenv("LIBRARY_STATE_BUDGET_BYTES")
+_state_codec: StateCodec = codec_from_name(
+    os.getenv("LIBRARY_STATE_CODEC", "plain"),
+    budget_bytes=int(_budget_env) if _budget_env else None,
+)
+
+
+def get_state_codec() -> StateCodec:
+    """Return the codec used for the `LIBRARY_STATE_KEY` session value."""
+    return _state_codec
+
+
+def set_state_codec(codec: StateCodec) -> None:
+    """Swap the codec; values written by any codec remain readable."""
+    global _state_codec
+    _state_codec = codec
+
+
+def load_conversation_state(state: State | dict[str, Any]) -> dict[str, Any]:
+    """Return the decoded conversation state dict stored in ``state``."""
+    return _state_codec.decode(state.get(LIBRARY_STATE_KEY))
+
+
+_catalog: CatalogIndex | None = None
+_catalog_loaded = False
+
+
+def get_catalog() -> CatalogIndex | None:
+    """Return the recommendation catalog, loading `LIBRARY_CATALOG_PATH` once."""
+    global _catalog, _catalog_loaded
+    if not _catalog_loaded:
+        catalog_path = os.getenv("LIBRARY_CATALOG_PATH")
+        if catalog_path:
+            # NumPy is only required once a catalog is configured.
+            from library_agent.tools.catalog import CatalogIndex
+
+            _catalog = CatalogIndex.from_file(catalog_path)
+        _catalog_loaded = True
+    return _catalog
+
+
+def set_catalog(catalog: CatalogIndex | None) -> None:
+    """Install (or clear, with ``None``) the recommendation catalog."""
+    global _catalog, _catalog_loaded
+    _catalog = catalog
+    _catalog_loaded = True
+
+
+_co_read: CoReadIndex | None = None
+_co_read_loaded = False
+
+
+def get_co_read_index() -> CoReadIndex | None:
+    """Return the co-read index, mapping `LIBRARY_CO_READ_INDEX` once."""
+    global _co_read, _co_read_loaded
+    if not _co_read_loaded:
+        index_path = os.getenv("LIBRARY_CO_READ_INDEX")
+        if index_path:
+            from library_agent.tools.co_read import CoReadIndex
+
+            _co_read = CoReadIndex.open(index_path)
+        _co_read_loaded = True
+    return _co_read
+
+
+def set_co_read_index(index: CoReadIndex | None) -> None:
+    """Install (or clear, with ``None``) the co-read index."""
+    global _co_read, _co_read_loaded
+    _co_read = index
+    _co_read_loaded = True
+
+
+_order_dedup = DedupCache(name="order_dedup", path=os.getenv("LIBRARY_DEDUP_DB"))
+
+
+def get_order_dedup() -> DedupCache:
+    """Return the cache that replays duplicate `order_book` calls."""
+    return _order_dedup
+
+
+def set_order_dedup(cache: DedupCache) -> None:
+    global _order_dedup
+    _order_dedup = cache
+
+
+_store: storage.LibraryStore | None = None
+_store_loaded = False
+
+
+def get_store() -> storage.LibraryStore | None:
+    """Return the SQLite store at `LIBRARY_DB_PATH`, opening it once."""
+    global _store, _store_loaded
+    if not _store_loaded:
+        db_path = os.getenv("LIBRARY_DB_PATH")
+        if db_path:
+            _store = storage.LibraryStore(db_path)
+        _store_loaded = True
+    return _store
+
+
+def set_store(store: storage.LibraryStore | None) -> None:
+    """Install (or clear, with ``None``) the write-through store."""
+    global _store, _store_loaded
+    _store = store
+    _store_loaded = True
+
+
+_inventory: Inventory | None = None
+_inventory_loaded = False
+
+
+def get_inventory() -> Inventory | None:
+    """Return the copy inventory loaded from `LIBRARY_INVENTORY_PATH`, if any."""
+    global _inventory, _inventory_loaded
+    if not _inventory_loaded:
+        inventory_path = os.getenv("LIBRARY_INVENTORY_PATH")
+        if inventory_path:
+            _inventory = Inventory.from_file(inventory_path)
+        _inventory_loaded = True
+    return _inventory
+
+
+def set_inventory(inventory: Inventory | None) -> None:
+    """Install (or clear, with ``None``) the copy inventory."""
+    global _inventory, _inventory_loaded
+    _inventory = inventory
+    _inventory_loaded = True
+
+
+_household_index: HouseholdIndex | None = None
+_household_store: HouseholdStore | None = None
+_household_lock = threading.Lock()
+
+
+def get_household_index() -> HouseholdIndex:
+    """Return the household index, restored from `LIBRARY_HOUSEHOLD_SNAPSHOT`.
+
+    With a snapshot path configured, every new link is journaled next to the
+    snapshot and the journal is folded into it at exit (see
+    ``HouseholdStore``). The member cap comes from
+    `LIBRARY_HOUSEHOLD_MAX_MEMBERS`.
+    """
+    global _household_index, _household_store
+    if _household_index is None:
+        with _household_lock:
+            if _household_index is None:
+                max_members = int(
+                    os.getenv("LIBRARY_HOUSEHOLD_MAX_MEMBERS", DEFAULT_MAX_MEMBERS)
+                )
+                snapshot = os.getenv("LIBRARY_HOUSEHOLD_SNAPSHOT")
+                if snapshot:
+                    store = HouseholdStore(snapshot, max_members=max_members)
+                    index = store.load()
+                    atexit.register(store.compact)
+                    _household_store = store
+                else:
+                    index = HouseholdIndex(max_members=max_members)
+                _household_index = index
+    return _household_index
+
+
+def set_household_index(
+    index: HouseholdIndex | None, store: HouseholdStore | None = None
+) -> None:
+    """Install an index (and the store journaling it); ``None`` rebuilds the default."""
+    global _household_index, _household_store
+    _household_index = index
+    _household_store = store
+
+
+def _link_household(primary: str, member: str) -> bool:
+    """Link ``member`` into ``primary``'s household and journal it when new."""
+    linked = get_household_index().link(primary, member)
+    if linked and _household_store is not None:
+        _household_store.append(primary, member)
+    return linked
+
+
+_scheduler: EventScheduler | None = None
+_scheduler_loaded = False
+
+
+def get_scheduler() -> EventScheduler | None:
+    """Return the room scheduler configured by `LIBRARY_EVENT_ROOMS`, if any."""
+    global _scheduler, _scheduler_loaded
+    if not _scheduler_loaded:
+        rooms_path = os.getenv("LIBRARY_EVENT_ROOMS")
+        if rooms_path:
+            _scheduler = EventScheduler.from_file(rooms_path)
+        _scheduler_loaded = True
+    return _scheduler
+
+
+def set_scheduler(scheduler: EventScheduler | None) -> None:
+    """Install (or clear, with ``None``) the event room scheduler."""
+    global _scheduler, _scheduler_loaded
+    _scheduler = scheduler
+    _scheduler_loaded = True
+
+
+def _persist(table: storage.RecordTable, request: BaseModel, response: BaseModel) -> None:
+    store = get_store()
+    if store is not None:
+        store.record(table, request, response)
+
+
+_card_allocator: CardNumberAllocator | None = None
+_card_allocator_lock = threading.Lock()
+
+
+def get_card_allocator() -> CardNumberAllocator:
+    """Return the card-number allocator, leasing blocks from `LIBRARY_DB_PATH`.
+
+    Without a database, blocks come from the serial range of the worker id
+    this process leased.
+    """
+    global _card_allocator
+    if _card_allocator is None:
+        with _card_allocator_lock:
+            if _card_allocator is None:
+                db_path = os.getenv("LIBRARY_DB_PATH")
+                source = SQLiteBlockSource(db_path) if db_path else WorkerBlockSource()
+                _card_allocator = CardNumberAllocator(source)
+    return _card_allocator
+
+
+def set_card_allocator(allocator: CardNumberAllocator | None) -> None:
+    """Install an allocator; ``None`` rebuilds the default on next use."""
+    global _card_allocator
+    _card_allocator = allocator
 
 
 # Mock implementations -----------------------------------------------------
@@ -189,10 +513,42 @@ def _utc_iso(dt: datetime) -> str:
     return dt.replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
+def _recommend_from_indexes(
+    request: BookRecommendationRequest, k: int
+) -> list[str] | None:
+    """Co-read neighbors of recent reads first, then catalog matches."""
+    co_read = get_co_read_index()
+    catalog = get_catalog()
+    if co_read is None and catalog is None:
+        return None
+    picks: list[str] = []
+    if co_read is not None and request.recent_reads:
+        for title in co_read.recommend(request.recent_reads, k=k):
+            doc_id = catalog.find_title(title) if catalog is not None else None
+            picks.append(catalog.display(doc_id) if doc_id is not None else title)
+    if catalog is not None and len(picks) < k:
+        seen = set(picks)
+        for doc_id in catalog.recommend(
+            request.favorite_genres, request.mood, request.recent_reads, k=2 * k
+        ):
+            display = catalog.display(doc_id)
+            if display not in seen:
+                picks.append(display)
+                seen.add(display)
+            if len(picks) == k:
+                break
+    return picks or None
+
+
 def recommend_books_action(request: BookRecommendationRequest) -> BookRecommendationResponse:
-    """Return a mock book recommendation list."""
-    if isinstance(request, dict):
-        request = BookRecommendationRequest(**request)
+    """Recommend titles from the local indexes, or a mock list without them."""
+    request = coerce(BookRecommendationRequest, request)
+    picks = _recommend_from_indexes(request, k=5)
+    if picks is not None:
+        return BookRecommendationResponse(
+            recommendations=picks,
+            generated_at=_utc_iso(datetime.now(timezone.utc)),
+        )
     fallback_titles = [
         "The Midnight Library",
         "Project Hail Mary",
@@ -206,111 +562,257 @@ def recommend_books_action(request: BookRecommendationRequest) -> BookRecommenda
     )
 
 
+def _place_order(request: BookOrderRequest) -> BookOrderResponse:
+    request_id = new_id("ORD")
+    status = "requested"
+    inventory = get_inventory()
+    if inventory is not None:
+        hold = inventory.reserve(
+            request_id, request.title, request.format, vendor=request.preferred_vendor
+        )
+        status = hold.status
+    response = BookOrderResponse(request_id=request_id, status=status)
+    _persist(storage.ORDERS, request, response)
+    return response
+
+
 def order_book_action(request: BookOrderRequest) -> BookOrderResponse:
-    """Mock placing a book order."""
-    if isinstance(request, dict):
-        request = BookOrderRequest(**request)
-    return BookOrderResponse(
-        request_id=f"ORD-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}",
-        status="requested",
+    """Place a hold or order; duplicates within the TTL replay the first.
+
+    With an inventory configured, a free copy is reserved, or the title is
+    backordered from ``preferred_vendor`` when none is on the shelf. Titles
+    the inventory declines to track stay "requested" for staff to handle.
+    """
+    request = coerce(BookOrderRequest, request)
+    payload, _ = _order_dedup.get_or_compute(
+        request_fingerprint(request),
+        lambda: _place_order(request).model_dump_json(),
     )
+    return BookOrderResponse.model_validate_json(payload)
 
 
 def issue_card_action(request: CardRequest) -> CardResponse:
-    """Mock issuing a new card (primary plus optional household)."""
-    if isinstance(request, dict):
-        request = CardRequest(**request)
-    now = datetime.now(timezone.utc)
-    return CardResponse(
-        card_number=f"CARD-{now.strftime('%H%M%S')}",
+    """Issue the primary card plus one card per household member.
+
+    All cards are recorded in a single transaction.
+    """
+    request = coerce(CardRequest, request)
+    households = get_household_index()
+    if 1 + len(request.household_members) > households.max_members:
+        return CardResponse(
+            status="household_full",
+            message=f"A household can have at most {households.max_members} members",
+        )
+    expires_at = _utc_iso(datetime.now(timezone.utc) + timedelta(days=365 * 3))
+    primary, *members = get_card_allocator().allocate(1 + len(request.household_members))
+    household_cards = [
+        HouseholdCard(
+            name=member.name,
+            card_number=card_number,
+            temporary_pin="1234",
+            expires_at=expires_at,
+        )
+        for member, card_number in zip(request.household_members, members)
+    ]
+    response = CardResponse(
+        card_number=primary,
         temporary_pin="1234",
-        expires_at=_utc_iso(now + timedelta(days=365 * 3)),
+        expires_at=expires_at,
+        household_cards=household_cards,
     )
+    store = get_store()
+    if store is not None:
+        store.record_many(
+            storage.CARDS,
+            [
+                (request, response),
+                *(
+                    (CardRequest(patron=member), card)
+                    for member, card in zip(request.household_members, household_cards)
+                ),
+            ],
+        )
+    for card in household_cards:
+        _link_household(primary, card.card_number)
+    return response
 
 
 def add_household_member_action(
     request: HouseholdAddRequest,
 ) -> HouseholdAddResponse:
-    """Mock adding a person to an existing library card."""
-    if isinstance(request, dict):
-        request = HouseholdAddRequest(**request)
-    return HouseholdAddResponse(
-        confirmation_id=f"HH-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M')}",
+    """Link a person to an existing library card's household.
+
+    Reports ``already_linked`` when the person is in that household already
+    and ``household_full`` when it is at its member cap.
+    """
+    request = coerce(HouseholdAddRequest, request)
+    member = request.new_member
+    try:
+        linked = _link_household(
+            card_key(request.primary_card_number),
+            member_key(
+                request.primary_card_number,
+                member.name,
+                card_number=member.card_number,
+                contact_email=member.contact_email,
+            ),
+        )
+    except HouseholdFullError as exc:
+        return HouseholdAddResponse(status="household_full", message=str(exc))
+    if not linked:
+        return HouseholdAddResponse(
+            status="already_linked",
+            message=f"{member.name} is already in this household",
+        )
+    response = HouseholdAddResponse(
+        confirmation_id=new_id("HH"),
         status="added",
     )
+    _persist(storage.HOUSEHOLD_LINKS, request, response)
+    return response
 
 
 def request_event_action(request: EventRequest) -> EventResponse:
-    """Mock logging an event request."""
-    if isinstance(request, dict):
-        request = EventRequest(**request)
-    return EventResponse(
-        event_request_id=f"EVT-{datetime.now(timezone.utc).strftime('%Y%m%d')}",
-        status="received",
-    )
-
-
-def _merge_values(base_value, update_value):
-    if update_value is None:
-        return None
-    if isinstance(base_value, BaseModel):
-        base_value = base_value.model_dump(exclude_none=False)
-    if isinstance(update_value, BaseModel):
-        update_value = update_value.model_dump(exclude_none=True)
-    if isinstance(base_value, dict) and isinstance(update_value, dict):
-        merged = dict(base_value)
-        for key, value in update_value.items():
-            merged[key] = _merge_values(merged.get(key), value)
-        return merged
-    return update_value
+    """Book an event room, or log the request when it cannot be scheduled.
+
+    Requests stay "received" when no scheduler is configured or the desired
+    date is missing or not ISO 8601, and with a message when the date has
+    passed. Requests larger than every room come back "over_capacity" and are
+    not logged.
+    """
+    request = coerce(EventRequest, request)
+    event_request_id = new_id("EVT")
+    status = "received"
+    message = None
+    scheduler = get_scheduler()
+    start = parse_event_time(request.desired_date)
+    if scheduler is not None and start is not None:
+        booking = scheduler.book(
+            event_request_id,
+            start,
+            attendees=request.attendees,
+            duration=scheduler.duration_for(request.event_type),
+        )
+        if booking.status == "over_capacity":
+            return EventResponse(
+                event_request_id=event_request_id,
+                status="over_capacity",
+                message=(
+                    f"Our largest room holds {scheduler.max_capacity} people; "
+                    f"{request.attendees} attendees will not fit"
+                ),
+            )
+        if booking.status == "past":
+            message = f"{request.desired_date} has already passed; please pick a future date"
+        else:
+            status = booking.status
+    response = EventResponse(event_request_id=event_request_id, status=status, message=message)
+    _persist(storage.EVENTS, request, response)
+    return response
 
 
 def _normalize_update_payload(update: ConversationStateUpdate | dict[str, Any]) -> dict[str, Any]:
     if isinstance(update, ConversationStateUpdate):
         return update.model_dump(exclude_none=True)
+    if isinstance(update, (str, bytes, bytearray)):
+        update = adapter_for(dict[str, Any]).validate_json(update)
     normalized: dict[str, Any] = {}
-    allowed_fields = set(ConversationStateUpdate.model_fields)
+    allowed_fields = model_schema(ConversationStateUpdate).top_level
     for key, value in update.items():
         if key in allowed_fields:
             normalized[key] = value
     return normalized
 
 
+_SECTION_ADAPTERS: dict[str, TypeAdapter] = {
+    name: adapter_for(field.annotation)
+    for name, field in ConversationState.model_fields.items()
+}
+
+
+def _validate_sections(
+    payload: dict[str, Any], sections: list[str]
+) -> dict[str, Any]:
+    """Validate only ``sections`` of ``payload``; return the parsed values."""
+    validated: dict[str, Any] = {}
+    for section in sections:
+        validated[section] = _SECTION_ADAPTERS[section].validate_python(
+            payload.get(section)
+        )
+    return validated
+
+
 def save_conversation_state_action(
     update: ConversationStateUpdate, tool_context: ToolContext
 ) -> ConversationStateResponse:
     """Persist patron-provided information to session state."""
     update_dict = _normalize_update_payload(update)
+    stored_value = load_conversation_state(tool_context.state)
     if not update_dict:
-        stored_value = tool_context.state.get(LIBRARY_STATE_KEY, {}) or {}
-        current = (
-            ConversationState.model_validate(stored_value)
-            if stored_value
-            else ConversationState()
-        )
+        current = coerce(ConversationState, stored_value) if stored_value else ConversationState()
         return ConversationStateResponse(state=current, applied_fields=[])
 
-    stored_value = tool_context.state.get(LIBRARY_STATE_KEY, {}) or {}
-    current_state = (
-        ConversationState.model_validate(stored_value)
-        if stored_value
-        else ConversationState()
-    )
-    merged_payload = current_state.model_dump(exclude_none=False)
-    for field, value in update_dict.items():
-        merged_payload[field] = _merge_values(merged_payload.get(field), value)
-
-    merged_state = ConversationState.model_validate(merged_payload)
-    tool_context.state[LIBRARY_STATE_KEY] = merged_state.model_dump(exclude_none=True)
+    ops = diff_update(stored_value, update_dict)
+    sections = touched_sections(ops)
+    patched = apply_patch(stored_value, ops)
+    validated = _validate_sections(patched, sections)
+    for section, value in validated.items():
+        if value is None:
+            patched.pop(section, None)
+        elif isinstance(value, BaseModel):
+            patched[section] = value.model_dump(exclude_none=True)
+        else:
+            patched[section] = value
+    pending = patched.get(PENDING_SLOTS_KEY)
+    if pending and any(section in pending for section in sections):
+        # A saved section supersedes whatever was extracted for it.
+        remaining = {key: value for key, value in pending.items() if key not in sections}
+        if remaining:
+            patched[PENDING_SLOTS_KEY] = remaining
+        else:
+            patched.pop(PENDING_SLOTS_KEY)
+
+    if ops:
+        tool_context.state[LIBRARY_STATE_KEY] = _state_codec.encode(
+            patched, recent=sections
+        )
     return ConversationStateResponse(
-        state=merged_state, applied_fields=list(update_dict.keys())
+        state=ConversationState.model_construct(**validated),
+        applied_fields=list(update_dict.keys()),
+        applied_paths=[op.dotted for op in ops],
     )
 
 
+def list_missing_fields_action(
+    section: SectionName, tool_context: ToolContext
+) -> MissingFieldsResponse:
+    """List only the required fields still missing for one state section."""
+    tool_key = _SECTION_TOOLS.get(section)
+    if tool_key is None:
+        raise ValueError(f"Unknown section '{section}'. Available: {sorted(_SECTION_TOOLS)}")
+    conversation = load_conversation_state(tool_context.state)
+    pending = (conversation.get(PENDING_SLOTS_KEY) or {}).get(section, {})
+    missing = [
+        MissingField(path=path, prompt=question.prompt, pending_value=pending.get(path))
+        for path, question in missing_required(tool_key, conversation.get(section))
+    ]
+    return MissingFieldsResponse(section=section, missing=missing, complete=not missing)
+
+
 # Tools exposed to agents --------------------------------------------------
-recommend_books = FunctionTool(recommend_books_action)
-order_book = FunctionTool(order_book_action)
-issue_library_card = FunctionTool(issue_card_action)
-add_household_member = FunctionTool(add_household_member_action)
-request_library_event = FunctionTool(request_event_action)
-save_conversation_state = FunctionTool(save_conversation_state_action)
+recommend_books = ValidatedFunctionTool(recommend_books_action)
+order_book = ValidatedFunctionTool(order_book_action)
+issue_library_card = ValidatedFunctionTool(issue_card_action)
+add_household_member = ValidatedFunctionTool(add_household_member_action)
+request_library_event = ValidatedFunctionTool(request_event_action)
+# The action validates only the sections an update touches.
+save_conversation_state = ValidatedFunctionTool(
+    save_conversation_state_action, raw_args=["update"]
+)
+list_missing_fields = ValidatedFunctionTool(list_missing_fields_action)
+
+# Opt-in per-tool metrics; needs LIBRARY_STATE_KEY, so it is set up here.
+if os.getenv("LIBRARY_TOOL_METRICS"):
+    _tool_metrics = metrics_from_env()
+    _tool_metrics.watch_cache(order_book.name, get_order_dedup)
+    set_tool_metrics(_tool_metrics)
@@ -0,0 +1,154 @@
+"""Cached validation for tool arguments and a FunctionTool that uses it.
+
+``adapter_for`` keeps one ``TypeAdapter`` per request type and ``coerce``
+turns whatever a caller passed into that type: an instance of it is returned
+as is, ``str``/``bytes`` are validated straight from JSON and anything else
+goes through ``validate_python``.
+
+ADK's ``FunctionTool`` re-runs ``inspect.signature`` several times per call
+and rebuilds the tool's function declaration (a JSON schema walk of every
+request model) for every model request. ``ValidatedFunctionTool`` reads the
+signature once, converts arguments with the cached adapters and builds the
+declaration once per API variant. It also reports each call to the installed
+``ToolMetrics`` (see ``instrumentation``), if any.
+"""
+from __future__ import annotations
+
+import inspect
+import logging
+import time
+from functools import lru_cache
+from types import UnionType
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from google.adk.tools import FunctionTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from library_agent.tools import instrumentation
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+_run_async = FunctionTool.run_async
+
+
+@lru_cache(maxsize=None)
+def adapter_for(annotation: Any) -> TypeAdapter:
+    """Return the shared ``TypeAdapter`` for ``annotation``."""
+    return TypeAdapter(annotation)
+
+
+def coerce(model: type[M], value: Any) -> M:
+    """Return ``value`` as a ``model``, validating only when it is not one yet."""
+    if isinstance(value, model):
+        return value
+    adapter = adapter_for(model)
+    if isinstance(value, (str, bytes, bytearray)):
+        return adapter.validate_json(value)
+    return adapter.validate_python(value)
+
+
+def _model_parameter(annotation: Any) -> type[BaseModel] | None:
+    if get_origin(annotation) in (Union, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            return None
+        annotation = args[0]
+    if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+class ValidatedFunctionTool(FunctionTool):
+    """``FunctionTool`` with a cached signature, adapters and declaration.
+
+    Parameters named in ``raw_args`` are passed through unconverted, for
+    actions that validate only the parts of their input they use.
+    """
+
+    def __init__(
+        self, func: Callable[..., Any], *, raw_args: Iterable[str] = (), **kwargs: Any
+    ) -> None:
+        super().__init__(func, **kwargs)
+        signature = inspect.signature(func)
+        # Actions use ``from __future__ import annotations``; resolve the strings.
+        hints = get_type_hints(func)
+        skipped = set(raw_args)
+        self._models = {
+            name: model
+            for name in signature.parameters
+            if name not in skipped
+            and (model := _model_parameter(hints.get(name))) is not None
+        }
+        self._valid_params = frozenset(signature.parameters)
+        self._mandatory_args = super()._get_mandatory_args()
+        self._declarations: dict[Any, Optional[types.FunctionDeclaration]] = {}
+
+    def _get_declaration(self) -> Optional[types.FunctionDeclaration]:
+        # Shared across requests: ADK only reads declarations it is given.
+        variant = self._api_variant
+        if variant not in self._declarations:
+            self._declarations[variant] = super()._get_declaration()
+        return self._declarations[variant]
+
+    def _get_mandatory_args(self) -> list[str]:
+        return list(self._mandatory_args)
+
+    def _preprocess_args(self, args: dict[str, Any]) -> dict[str, Any]:
+        converted = dict(args)
+        for name, model in self._models.items():
+            value = args.get(name)
+            if value is None or isinstance(value, model):
+                continue
+            try:
+                converted[name] = coerce(model, value)
+            except ValidationError as exc:
+                # Like FunctionTool: the action sees the raw value and raises.
+                logger.warning(
+                    "Failed to convert argument '%s' to %s: %s", name, model.__name__, exc
+                )
+        return converted
+
+    def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Awaitable[Any]:
+        # Hands back the coroutine rather than awaiting it, so a call without
+        # metrics costs one lookup and no extra coroutine frame.
+        metrics = instrumentation.get_tool_metrics()
+        if metrics is None:
+            return _run_async(self, args=args, tool_context=tool_context)
+        return instrumentation.measure_call(
+            metrics, self.name, args, tool_context, super().run_async
+        )
+
+    def _prepare_invocation_args(
+        self, args: dict[str, Any], tool_context: ToolContext
+    ) -> dict[str, Any]:
+        spent = instrumentation.validation_time.get()
+        if spent is None:
+            return self._convert_args(args, tool_context)
+        start = time.perf_counter_ns()
+        try:
+            return self._convert_args(args, tool_context)
+        finally:
+            spent.append(time.perf_counter_ns() - start)
+
+    def _convert_args(self, args: dict[str, Any], tool_context: ToolContext) -> dict[str, Any]:
+        if "input_stream" in self._valid_params:
+            return super()._prepare_invocation_args(args, tool_context)
+        prepared = self._preprocess_args(args)
+        if self._context_param_name in self._valid_params:
+            prepared[self._context_param_name] = tool_context
+        return {key: value for key, value in prepared.items() if key in self._valid_params}
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+from google.adk import Agent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from library_agent import agent as agent_module
+from library_agent.agent_registry import LazyAgent, ModelPool, warm_up
+
+
+class ScriptedLlm(BaseLlm):
+    transfer_to: str | None = None
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        if self.transfer_to and self.calls == 1:
+            part = types.Part(
+                function_call=types.FunctionCall(
+                    name="transfer_to_agent", args={"agent_name": self.transfer_to}
+                )
+            )
+        else:
+            part = types.Part(text=f"{self.model} reply {self.calls}")
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+def test_model_pool_builds_one_client_per_model():
+    built = []
+    pool = ModelPool(lambda name: built.append(name) or ScriptedLlm(model=name))
+
+    assert pool.get("a") is pool.get("a")
+    assert pool.get("b") is not pool.get("a")
+    assert built == ["a", "b"] and len(pool) == 2
+
+
+def test_subagent_is_built_on_first_transfer_and_reused():
+    builds = []
+    card_model = ScriptedLlm(model="card")
+
+    def build():
+        builds.append(1)
+        return Agent(name="card_services_agent", model=card_model, instruction="Cards.")
+
+    lazy = LazyAgent(name="card_services_agent", description="Issues cards.", factory=build)
+    root = Agent(
+        name="library_root_agent",
+        model=ScriptedLlm(model="root", transfer_to="card_services_agent"),
+        instruction="Route.",
+        sub_agents=[lazy],
+    )
+    runner = InMemoryRunner(agent=root, app_name="library")
+
+    async def turn(session_id, text):
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        return [
+            event
+            async for event in runner.run_async(
+                user_id="u", session_id=session_id, new_message=message
+            )
+        ]
+
+    async def go():
+        session = await runner.session_service.create_session(app_name="library", user_id="u")
+        assert not lazy.loaded
+        first = await turn(session.id, "I need a card")
+        second = await turn(session.id, "My name is Quinn")
+        return first, second
+
+    first, second = asyncio.run(go())
+
+    assert builds == [1]
+    assert lazy.resolve().parent_agent is root
+    assert first[-1].author == "card_services_agent"
+    assert second[-1].author == "card_services_agent"
+    assert card_model.calls == 2
+
+
+def test_warm_up_builds_each_placeholder_once():
+    lazies = [
+        LazyAgent(
+            name=name,
+            factory=lambda name=name: Agent(name=name, model=ScriptedLlm(model=name)),
+        )
+        for name in ("one", "two")
+    ]
+
+    assert warm_up(lazies) == 2
+    assert warm_up(lazies) == 0
+    assert all(lazy.loaded for lazy in lazies)
+
+
+def test_factory_must_build_the_named_agent():
+    lazy = LazyAgent(name="one", factory=lambda: Agent(name="two", model=ScriptedLlm(model="x")))
+
+    with pytest.raises(ValueError, match="built an agent named 'two'"):
+        lazy.resolve()
+
+
+def test_package_agents_start_unbuilt_and_share_the_root_client():
+    subagents = agent_module.root_agent.sub_agents
+
+    assert all(isinstance(sub, LazyAgent) for sub in subagents)
+    book_order = agent_module.book_order_agent.resolve()
+    assert book_order.model is agent_module.root_agent.model
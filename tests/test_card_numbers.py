@@ -0,0 +1,161 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from library_agent.tools import storage, tools
+from library_agent.tools.card_numbers import (
+    CardNumberAllocator,
+    MemoryBlockSource,
+    SQLiteBlockSource,
+    WorkerBlockSource,
+    format_card_number,
+    is_valid_card_number,
+    luhn_check_digit,
+)
+
+
+def test_luhn_check_digit_matches_known_values():
+    assert luhn_check_digit("7992739871") == "3"
+    assert format_card_number(42) == "CARD-20000000000428"
+    assert is_valid_card_number("CARD-20000000000428")
+
+
+def test_check_digit_catches_typos_and_swaps():
+    number = format_card_number(123_456)
+    digits = number.removeprefix("CARD-")
+    typo = digits[:5] + str((int(digits[5]) + 1) % 10) + digits[6:]
+    swapped = digits[:-3] + digits[-2] + digits[-3] + digits[-1]
+
+    assert not is_valid_card_number("CARD-" + typo)
+    assert not is_valid_card_number("CARD-" + swapped)
+    assert not is_valid_card_number("CARD-1001")
+
+
+def test_allocator_leases_one_block_per_block_size():
+    allocator = CardNumberAllocator(MemoryBlockSource(), block_size=10)
+
+    numbers = allocator.allocate(3) + allocator.allocate(7) + allocator.allocate(25)
+
+    assert len(set(numbers)) == 35
+    assert all(is_valid_card_number(number) for number in numbers)
+    assert allocator.leases == 2  # the 25-card request leases one larger block
+
+
+def test_sqlite_source_gives_disjoint_blocks_to_each_allocator(tmp_path):
+    path = tmp_path / "cards.sqlite"
+    allocators = [
+        CardNumberAllocator(SQLiteBlockSource(path), block_size=50) for _ in range(3)
+    ]
+    issued = []
+
+    def issue(allocator):
+        for _ in range(40):
+            issued.extend(allocator.allocate(4))
+
+    threads = [
+        threading.Thread(target=issue, args=(allocator,))
+        for allocator in allocators
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(issued) == len(set(issued)) == 3 * 2 * 40 * 4
+    restarted = CardNumberAllocator(SQLiteBlockSource(path), block_size=50)
+    assert restarted.allocate(1)[0] not in set(issued)
+
+
+def test_default_allocators_never_overlap(tmp_path, monkeypatch):
+    monkeypatch.delenv("LIBRARY_DB_PATH", raising=False)
+    monkeypatch.setenv("LIBRARY_WORKER_LOCK_DIR", str(tmp_path))
+    previous = tools.get_card_allocator()
+    issued = []
+    try:
+        for _ in range(3):
+            tools.set_card_allocator(None)
+            allocator = tools.get_card_allocator()
+            assert isinstance(allocator.source, WorkerBlockSource)
+            issued.extend(allocator.allocate(5))
+    finally:
+        tools.set_card_allocator(previous)
+
+    assert len(set(issued)) == 15
+    assert all(is_valid_card_number(number) for number in issued)
+
+
+def test_separate_processes_issue_distinct_cards(tmp_path):
+    code = (
+        "from library_agent.tools import tools\n"
+        "card = tools.issue_card_action({'patron': {'name': 'A'}})\n"
+        "print(card.card_number)"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "LIBRARY_DB_PATH"}
+    env["LIBRARY_WORKER_LOCK_DIR"] = str(tmp_path)
+
+    def spawn():
+        return subprocess.Popen(
+            [sys.executable, "-c", code], env=env, stdout=subprocess.PIPE, text=True
+        )
+
+    concurrent = [spawn(), spawn()]
+    numbers = [process.communicate()[0].strip() for process in concurrent]
+    numbers.append(spawn().communicate()[0].strip())
+
+    assert len(set(numbers)) == 3
+    assert all(is_valid_card_number(number) for number in numbers)
+
+
+def test_issue_card_action_issues_household_cards_in_one_transaction(tmp_path):
+    store = storage.LibraryStore(tmp_path / "library.sqlite")
+    tools.set_store(store)
+    try:
+        response = tools.issue_card_action(
+            {
+                "patron": {"name": "Quinn"},
+                "household_members": [{"name": "Toby"}, {"name": "Ada"}],
+            }
+        )
+        commits = store.writer.commits
+        count = store.count(storage.CARDS)
+        member_row = store.fetch(storage.CARDS, response.household_cards[1].card_number)
+    finally:
+        tools.set_store(None)
+        store.close()
+
+    numbers = [response.card_number] + [card.card_number for card in response.household_cards]
+    assert [card.name for card in response.household_cards] == ["Toby", "Ada"]
+    assert len(set(numbers)) == 3
+    assert all(is_valid_card_number(number) for number in numbers)
+    assert (count, commits) == (3, 1)
+    assert json.loads(member_row[0])["patron"]["name"] == "Ada"
+
+
+def test_failed_batch_records_no_cards(tmp_path):
+    store = storage.LibraryStore(tmp_path / "library.sqlite")
+    previous = tools.get_card_allocator()
+    duplicate = previous.allocate(1)[0]
+
+    class Replaying:
+        def allocate(self, count):
+            return [duplicate] * count
+
+    tools.set_store(store)
+    tools.set_card_allocator(Replaying())
+    try:
+        with pytest.raises(Exception):
+            tools.issue_card_action(
+                {"patron": {"name": "Quinn"}, "household_members": [{"name": "Toby"}]}
+            )
+        count = store.count(storage.CARDS)
+    finally:
+        tools.set_card_allocator(previous)
+        tools.set_store(None)
+        store.close()
+
+    assert count == 0
@@ -0,0 +1,165 @@
+import asyncio
+import os
+
+import pytest
+from google.adk import Agent
+from google.adk.models.llm_request import LlmRequest
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from library_agent import agent_registry
+from library_agent.cassette import (
+    MAGIC,
+    Cassette,
+    CassetteLlm,
+    CassetteMissError,
+    missing_report,
+)
+from library_agent.llm_fingerprint import fingerprint, has_volatile
+from library_agent.scripted_llm import ScriptedLlm, Step
+from library_agent.tools import tools
+
+
+def test_cassette_appends_and_indexes_records(tmp_path):
+    path = tmp_path / "c.cas"
+    writer, reader = Cassette(path), Cassette(path)
+
+    writer.append(b"a" * 32, b"[1]")
+    assert reader.get(b"a" * 32) == b"[1]"
+    writer.append(b"b" * 32, b"[2]")
+    writer.append(b"a" * 32, b"[3]")
+
+    assert reader.get(b"b" * 32) == b"[2]"
+    assert reader.get(b"a" * 32) == b"[3]"
+    assert reader.get(b"c" * 32) is None
+    assert len(reader) == 2
+    assert path.read_bytes().startswith(MAGIC)
+
+    (tmp_path / "bad.cas").write_bytes(b"not a cassette")
+    with pytest.raises(ValueError):
+        Cassette(tmp_path / "bad.cas").get(b"a" * 32)
+
+
+def test_racing_recorders_write_one_header(tmp_path, monkeypatch):
+    path = tmp_path / "c.cas"
+    first, second = Cassette(path), Cassette(path)
+    fstat = os.fstat
+    raced = []
+
+    def stale_fstat(fd):
+        # The second recorder writes between the first one's size check and
+        # its write, as if both had opened the empty file at once.
+        result = fstat(fd)
+        if not raced:
+            raced.append(True)
+            second.append(b"b" * 32, b"[2]")
+        return result
+
+    monkeypatch.setattr(os, "fstat", stale_fstat)
+    first.append(b"a" * 32, b"[1]")
+    monkeypatch.undo()
+
+    reader = Cassette(path)
+    assert path.read_bytes().count(MAGIC) == 1
+    assert len(reader) == 2
+    assert reader.get(b"a" * 32) == b"[1]"
+
+
+def _request(call_id: str, order_id: str) -> LlmRequest:
+    call = types.FunctionCall(id=call_id, name="order_book_action", args={})
+    response = types.FunctionResponse(
+        id=call_id,
+        name="order_book_action",
+        response={"request_id": order_id, "at": "2026-10-17T09:30:00Z"},
+    )
+    return LlmRequest(
+        model="m",
+        contents=[
+            types.Content(role="model", parts=[types.Part(function_call=call)]),
+            types.Content(role="user", parts=[types.Part(function_response=response)]),
+        ],
+    )
+
+
+def test_fingerprint_ignores_call_ids_generated_ids_and_timestamps():
+    assert fingerprint(_request("adk-1", "ORD-02X2F9BPEE000")) == fingerprint(
+        _request("adk-2", "ORD-02X2F9BQQQ001")
+    )
+    assert fingerprint(_request("adk-1", "CARD-20000000000014")) == fingerprint(
+        _request("adk-1", "CARD-20000000001012")
+    )
+    assert has_volatile("Your card is CARD-20000000000014.")
+    changed = _request("adk-1", "ORD-02X2F9BPEE000")
+    changed.model = "other"
+    assert fingerprint(changed) != fingerprint(_request("adk-1", "ORD-02X2F9BPEE000"))
+
+
+def _conversation(llm, instruction: str) -> list[str]:
+    agent = Agent(
+        name="book_order_agent",
+        model=llm,
+        instruction=instruction,
+        tools=[tools.order_book, tools.save_conversation_state],
+    )
+    runner = InMemoryRunner(agent=agent, app_name="library")
+
+    async def go():
+        session = await runner.session_service.create_session(app_name="library", user_id="u")
+        texts = []
+        for text in ("Order Fourth Wing please", "Thanks"):
+            message = types.Content(role="user", parts=[types.Part(text=text)])
+            async for event in runner.run_async(
+                user_id="u", session_id=session.id, new_message=message
+            ):
+                if event.is_final_response() and event.content:
+                    texts.append(event.content.parts[0].text)
+        return texts
+
+    return asyncio.run(go())
+
+
+SCRIPT = {
+    "book_order_agent": [
+        Step(
+            tool="save_conversation_state_action",
+            args={"update": {"card_request": {"patron": {"name": "Eve"}}}},
+        ),
+        Step(text="Saved your details."),
+    ]
+}
+
+
+def test_replay_serves_the_recording_and_reports_prompt_changes(tmp_path):
+    cassette = Cassette(tmp_path / "flow.cas")
+    scripted = ScriptedLlm(script=SCRIPT)
+    recorder = CassetteLlm(model="m", mode="record", inner=scripted, cassette=cassette)
+
+    recorded = _conversation(recorder, "Order books.")
+    replayer = CassetteLlm(model="m", mode="replay", cassette=cassette)
+    replayed = _conversation(replayer, "Order books.")
+
+    assert replayed == recorded == ["Saved your details.", scripted.default_text]
+    assert scripted.calls == 3
+    assert len(cassette) == 3
+    assert missing_report([replayer]) == ""
+
+    with pytest.raises(CassetteMissError):
+        _conversation(replayer, "Order books, politely.")
+    report = missing_report([replayer])
+    assert report.startswith("1 request(s) missing")
+    assert "book_order_agent: 'Order Fourth Wing please'" in report
+
+
+def test_pool_wraps_clients_when_the_env_asks(tmp_path, monkeypatch):
+    monkeypatch.setenv("LIBRARY_CASSETTE", "replay")
+    monkeypatch.setenv("LIBRARY_CASSETTE_PATH", str(tmp_path / "pool.cas"))
+
+    client = agent_registry._client_factory()("gpt-4.1-mini")
+
+    assert isinstance(client, CassetteLlm)
+    assert client.inner is None and client.model == "gpt-4.1-mini"
+    with pytest.raises(ValueError):
+        CassetteLlm(mode="record", cassette=Cassette(tmp_path / "x.cas"))
+    monkeypatch.setenv("LIBRARY_CASSETTE", "rewind")
+    with pytest.raises(ValueError, match="LIBRARY_CASSETTE"):
+        agent_registry._client_factory()
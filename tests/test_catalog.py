@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from library_agent.tools import tools
+from library_agent.tools.catalog import CatalogIndex, load_catalog
+
+CATALOG = [
+    {
+        "title": "The Thursday Murder Club",
+        "author": "Richard Osman",
+        "genres": ["mystery", "cozy mystery"],
+        "subjects": ["retirement village", "amateur sleuths"],
+        "blurb": "Four friends in a retirement village meet to solve cold cases.",
+    },
+    {
+        "title": "The Man Who Died Twice",
+        "author": "Richard Osman",
+        "genres": ["mystery", "cozy mystery"],
+        "subjects": ["amateur sleuths"],
+        "blurb": "The club returns for a comforting new case.",
+    },
+    {
+        "title": "Fourth Wing",
+        "author": "Rebecca Yarros",
+        "genres": ["fantasy", "romance"],
+        "subjects": ["dragons", "war college"],
+        "blurb": "A brutal war college for dragon riders.",
+    },
+    {
+        "title": "Project Hail Mary",
+        "author": "Andy Weir",
+        "genres": ["science fiction"],
+        "subjects": ["space", "first contact"],
+        "blurb": "A lone astronaut must save the earth.",
+    },
+    {
+        "title": "The Maid",
+        "author": "Nita Prose",
+        "genres": ["mystery"],
+        "subjects": ["hotels"],
+        "blurb": "A cozy, comforting whodunit set in a grand hotel.",
+    },
+]
+
+
+@pytest.fixture()
+def catalog_file(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in CATALOG))
+    return path
+
+
+def test_load_catalog_reads_csv_lists(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text(
+        "title,author,genres,subjects,blurb\n"
+        "Fourth Wing,Rebecca Yarros,fantasy|romance,dragons,Riders.\n"
+    )
+
+    (entry,) = load_catalog(path)
+
+    assert entry.genres == ("fantasy", "romance")
+    assert entry.subjects == ("dragons",)
+
+
+def test_recommend_ranks_genre_and_mood_matches(catalog_file):
+    index = CatalogIndex.from_file(catalog_file)
+
+    ranked = index.recommend(["cozy mysteries"], mood="comforting", k=3)
+
+    assert {index.titles[doc_id] for doc_id in ranked} == {
+        "The Thursday Murder Club",
+        "The Man Who Died Twice",
+        "The Maid",
+    }
+
+
+def test_recommend_uses_recent_reads_and_excludes_them(catalog_file):
+    index = CatalogIndex.from_file(catalog_file)
+
+    ranked = index.recommend(recent_reads=["the thursday murder club"], k=2)
+
+    titles = [index.titles[doc_id] for doc_id in ranked]
+    assert "The Thursday Murder Club" not in titles
+    assert titles[0] == "The Man Who Died Twice"
+
+
+def test_recommend_fills_from_catalog_order_without_matches(catalog_file):
+    index = CatalogIndex.from_file(catalog_file)
+
+    assert index.recommend(["westerns"], k=2) == [0, 1]
+
+
+def test_top_k_breaks_ties_on_catalog_order(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("\n".join(json.dumps({"title": f"Title {n}"}) for n in range(12)))
+    index = CatalogIndex.from_file(path)
+    scores = np.ones(12, dtype=np.float32)
+    scores[10] = 2.0
+
+    assert index.top_k(scores, 3) == [10, 0, 1]
+
+
+def test_saved_index_round_trips(catalog_file, tmp_path):
+    index = CatalogIndex.from_file(catalog_file)
+    index.save(tmp_path / "catalog.npz")
+
+    loaded = CatalogIndex.from_file(tmp_path / "catalog.npz")
+
+    assert loaded.recommend(["fantasy"], k=1) == index.recommend(["fantasy"], k=1)
+
+
+def test_recommend_books_action_uses_configured_catalog(catalog_file):
+    tools.set_catalog(CatalogIndex.from_file(catalog_file))
+    try:
+        response = tools.recommend_books_action(
+            {"patron": {"name": "Alyssa"}, "favorite_genres": ["science fiction"]}
+        )
+    finally:
+        tools.set_catalog(None)
+
+    assert response.recommendations[0] == "Project Hail Mary by Andy Weir"
+    assert len(response.recommendations) == 5
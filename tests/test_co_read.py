@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from library_agent.tools import tools
+from library_agent.tools.co_read import CoReadIndex, build_index
+
+HISTORY = """patron,title
+p1,The Thursday Murder Club
+p1,The Man Who Died Twice
+p1,The Maid
+p2,The Thursday Murder Club
+p2,The Man Who Died Twice
+p2,The Bullet That Missed
+p3,The Thursday Murder Club
+p3,The Maid
+p4,Fourth Wing
+p4,Iron Flame
+p5,The Man Who Died Twice
+p5,The Bullet That Missed
+"""
+
+
+@pytest.fixture()
+def index_path(tmp_path):
+    history = tmp_path / "history.csv"
+    history.write_text(HISTORY)
+    path = tmp_path / "co_read.idx"
+    assert build_index(history, path, top_n=3) == 6
+    return path
+
+
+def test_neighbors_are_ranked_by_normalized_co_reads(index_path):
+    index = CoReadIndex.open(index_path)
+
+    neighbors = index.neighbors("the thursday murder club")
+
+    titles = [index.title(title_id) for title_id, _ in neighbors]
+    # Cosine normalization ranks The Maid (2 of 2 readers) above the more
+    # widely read The Man Who Died Twice (2 of 3 readers).
+    assert titles == ["The Maid", "The Man Who Died Twice", "The Bullet That Missed"]
+    assert index.neighbors("Unknown Title") == []
+
+
+def test_every_title_resolves_through_the_mapped_hash_table(index_path):
+    index = CoReadIndex.open(index_path)
+
+    assert [index.find(index.title(i)) for i in range(len(index))] == list(
+        range(len(index))
+    )
+
+
+def test_recommend_excludes_seeds_and_penalizes_similar_picks(index_path):
+    index = CoReadIndex.open(index_path)
+
+    greedy = index.recommend(["The Man Who Died Twice"], k=3, diversity=0.0)
+    diverse = index.recommend(["The Man Who Died Twice"], k=3, diversity=5.0)
+
+    assert "The Man Who Died Twice" not in greedy
+    assert set(greedy) == set(diverse)
+    assert greedy != diverse
+
+
+def test_recommend_books_action_prefers_co_read_neighbors(index_path):
+    tools.set_co_read_index(CoReadIndex.open(index_path))
+    try:
+        response = tools.recommend_books_action(
+            {"patron": {"name": "Sam"}, "recent_reads": ["Fourth Wing"]}
+        )
+    finally:
+        tools.set_co_read_index(None)
+
+    assert response.recommendations == ["Iron Flame"]
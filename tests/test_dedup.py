@@ -0,0 +1,98 @@
+import threading
+import time
+
+from library_agent.tools import tools
+from library_agent.tools.dedup import DedupCache, request_fingerprint
+
+ORDER = {
+    "patron": {"name": "Eve Rider"},
+    "title": "Fourth Wing",
+    "shipping_address": {
+        "street_line1": "1 Library Way",
+        "city": "Stack City",
+        "state_or_province": "CA",
+        "postal_code": "94016",
+    },
+    "preferred_vendor": "Local Books",
+    "preferred_vendor_address": {
+        "street_line1": "2 Vendor Rd",
+        "city": "Stack City",
+        "state_or_province": "CA",
+        "postal_code": "94016",
+    },
+}
+
+
+def test_fingerprint_ignores_case_whitespace_and_explicit_defaults():
+    variant = dict(ORDER, title="  fourth   WING ", format="paperback")
+
+    assert request_fingerprint(tools.BookOrderRequest(**ORDER)) == request_fingerprint(
+        tools.BookOrderRequest(**variant)
+    )
+    assert request_fingerprint(tools.BookOrderRequest(**ORDER)) != request_fingerprint(
+        tools.BookOrderRequest(**dict(ORDER, format="ebook"))
+    )
+
+
+def test_cache_expires_entries_and_evicts_least_recent():
+    now = [1000.0]
+    cache = DedupCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+    cache.get_or_compute("a", lambda: "A")
+    cache.get_or_compute("b", lambda: "B")
+    cache.get_or_compute("a", lambda: "unused")
+    cache.get_or_compute("c", lambda: "C")
+
+    assert cache.get_or_compute("b", lambda: "B2") == ("B2", False)
+    now[0] += 11
+    assert cache.get_or_compute("c", lambda: "C2") == ("C2", False)
+
+
+def test_cache_coalesces_concurrent_duplicates():
+    cache = DedupCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert {value for value, _ in results} == {"value"}
+    assert cache.hits == 7 and cache.misses == 1
+
+
+def test_sqlite_backing_survives_restart_and_reports_metrics(tmp_path):
+    path = tmp_path / "dedup.sqlite"
+    DedupCache(path=path).get_or_compute("k", lambda: "first")
+    events = []
+
+    restarted = DedupCache(path=path, name="orders", metrics=lambda n, v: events.append((n, v)))
+
+    assert restarted.get_or_compute("k", lambda: "second") == ("first", True)
+    assert events == [("orders.hit", 1.0), ("orders.hit_rate", 1.0)]
+
+
+def test_order_book_action_replays_duplicate_orders():
+    previous = tools.get_order_dedup()
+    tools.set_order_dedup(DedupCache(name="order_dedup"))
+    try:
+        first = tools.order_book_action(ORDER)
+        retry = tools.order_book_action(dict(ORDER, title="fourth wing"))
+        other = tools.order_book_action(dict(ORDER, title="Iron Flame"))
+        hit_rate = tools.get_order_dedup().hit_rate
+    finally:
+        tools.set_order_dedup(previous)
+
+    assert retry == first
+    assert other.request_id != first.request_id
+    assert hit_rate == 1 / 3
@@ -0,0 +1,103 @@
+import pytest
+
+from library_agent import eval_runner
+from library_agent.eval_runner import (
+    Invocation,
+    agent_fingerprints,
+    case_hash,
+    load_eval_set,
+    response_match_scores,
+    run_eval_set,
+    score_cases,
+)
+
+
+def test_response_match_is_rouge_1_f1():
+    scores = response_match_scores(
+        ["the cozy mystery picks", "alpha beta", "anything"],
+        ["cozy mystery picks for you", "alpha beta", ""],
+    )
+
+    # 3 shared tokens: precision 3/5, recall 3/4.
+    assert scores[0] == pytest.approx(2 * 0.6 * 0.75 / 1.35)
+    assert scores[1] == pytest.approx(1.0)
+    assert scores[2] == 0.0
+
+
+def test_only_cases_through_a_changed_agent_get_a_new_hash():
+    cases = load_eval_set()
+    fingerprints = agent_fingerprints()
+    before = [case_hash(case, fingerprints, "mock") for case in cases]
+
+    after = [
+        case_hash(case, {**fingerprints, "events_agent": "edited"}, "mock") for case in cases
+    ]
+
+    changed = [case["eval_id"] for case, old, new in zip(cases, before, after) if old != new]
+    assert changed == ["event_request_study_room"]
+    assert case_hash(cases[0], fingerprints, "gpt-4.1-mini") != before[0]
+
+
+def test_trajectory_compares_action_tools_by_eval_name():
+    case = load_eval_set()[1]
+    expected = case["conversation"][0]
+    use = expected["intermediate_data"]["tool_uses"][0]
+    response = expected["final_response"]["parts"][0]["text"]
+    criteria = {"tool_trajectory_avg_score": 1.0, "response_match_score": 0.8}
+
+    right, wrong = score_cases(
+        [case, case],
+        [
+            [Invocation(((use["name"], use["args"]),), response)],
+            [Invocation((("order_book", {**use["args"], "format": "ebook"}),), response)],
+        ],
+        criteria,
+        [False, False],
+    )
+
+    assert right.passed and right.tool_trajectory_avg_score == 1.0
+    assert not wrong.passed and wrong.tool_trajectory_avg_score == 0.0
+    assert wrong.response_match_score == 1.0
+
+
+def test_mock_run_is_cached_until_a_case_changes(tmp_path, monkeypatch):
+    cache = tmp_path / "cache.json"
+
+    first = run_eval_set(mock=True, workers=2, cache_path=cache)
+    second = run_eval_set(mock=True, workers=2, cache_path=cache)
+
+    assert first.passed and (first.ran, first.cached) == (5, 0)
+    assert second.passed and (second.ran, second.cached) == (0, 5)
+    assert [score.cached for score in second.scores] == [True] * 5
+
+    fingerprints = agent_fingerprints()
+    monkeypatch.setattr(
+        eval_runner,
+        "agent_fingerprints",
+        lambda: {**fingerprints, "book_order_agent": "edited"},
+    )
+    third = run_eval_set(mock=True, workers=1, cache_path=cache)
+    assert (third.ran, third.cached) == (1, 4)
+
+
+def test_failing_case_is_scored_as_failed_and_not_cached(tmp_path, monkeypatch):
+    cache = tmp_path / "cache.json"
+    broken = load_eval_set()[0]["eval_id"]
+    run_case = eval_runner.run_case
+
+    def flaky(case, mock, latency):
+        if case["eval_id"] == broken:
+            raise RuntimeError("model unavailable")
+        return run_case(case, mock, latency)
+
+    monkeypatch.setattr(eval_runner, "run_case", flaky)
+    first = run_eval_set(mock=True, workers=1, cache_path=cache)
+    monkeypatch.setattr(eval_runner, "run_case", run_case)
+    second = run_eval_set(mock=True, workers=1, cache_path=cache)
+
+    failed = first.scores[0]
+    assert not first.passed and (first.ran, first.cached) == (5, 0)
+    assert failed.error == "RuntimeError: model unavailable"
+    assert not failed.passed and failed.tool_trajectory_avg_score == 0.0
+    assert all(score.passed for score in first.scores[1:])
+    assert second.passed and (second.ran, second.cached) == (1, 4)
@@ -0,0 +1,124 @@
+import pytest
+
+from library_agent.tools import tools
+from library_agent.tools.household import (
+    HouseholdFullError,
+    HouseholdIndex,
+    HouseholdStore,
+    card_key,
+    member_key,
+)
+
+
+def test_links_share_a_household_and_count_members():
+    index = HouseholdIndex()
+    index.link("CARD-1", "CARD-2")
+    index.link("CARD-1", member_key("CARD-1", "Toby"))
+    index.link("CARD-9", "CARD-8")
+
+    assert index.same_household("CARD-2", member_key("CARD-1", " toby "))
+    assert not index.same_household("CARD-1", "CARD-9")
+    assert index.size("CARD-2") == 3
+    assert index.is_linked("CARD-9")
+    assert not index.is_linked("CARD-404")
+    assert index.link("CARD-2", member_key("CARD-1", "Toby")) is False
+    assert index.members("CARD-1") == ["CARD-1", "CARD-2", "name:CARD-1/toby"]
+
+
+def test_member_keys_scope_bare_names_to_the_household():
+    assert member_key("CARD-1", "Sam") != member_key("CARD-2", "Sam")
+    assert member_key("CARD-1", "Sam", contact_email="Sam@X.org ") == "email:sam@x.org"
+    assert member_key("CARD-1", "Sam", card_number=" CARD-7") == "CARD-7"
+    assert member_key("CARD-1\n", "Sam\n") == "name:CARD-1/sam"
+    assert card_key(" CARD-\n1 ") == "CARD- 1"
+
+
+def test_cap_applies_to_merged_households():
+    index = HouseholdIndex(max_members=4)
+    index.link("A", "A1")
+    index.link("A", "A2")
+    index.link("B", "B1")
+
+    with pytest.raises(HouseholdFullError):
+        index.link("A", "B")
+    index.link("A", "A3")
+    with pytest.raises(HouseholdFullError):
+        index.link("A", "A4")
+    assert index.size("A") == 4
+
+
+def test_snapshot_round_trip_keeps_households_and_accepts_new_links(tmp_path):
+    index = HouseholdIndex.from_links(
+        [("CARD-1", "CARD-2"), ("CARD-2", "CARD-3"), ("CARD-5", "CARD-6")]
+    )
+    path = tmp_path / "households.bin"
+    index.save(path)
+
+    restored = HouseholdIndex.load(path)
+    restored.link("CARD-3", "CARD-4")
+
+    assert len(restored) == 6
+    assert restored.links == 3 + 1
+    assert restored.size("CARD-1") == 4
+    assert sorted(restored.members("CARD-4")) == ["CARD-1", "CARD-2", "CARD-3", "CARD-4"]
+    assert not restored.same_household("CARD-1", "CARD-5")
+    (tmp_path / "bad.bin").write_bytes(b"nope" + bytes(20))
+    with pytest.raises(ValueError):
+        HouseholdIndex.load(tmp_path / "bad.bin")
+
+
+def test_actions_record_links_and_report_the_cap():
+    tools.set_household_index(HouseholdIndex(max_members=3))
+    try:
+        card = tools.issue_card_action(
+            {"patron": {"name": "Quinn"}, "household_members": [{"name": "Toby"}]}
+        )
+        added = tools.add_household_member_action(
+            {"primary_card_number": card.card_number, "new_member": {"name": "Ada"}}
+        )
+        again = tools.add_household_member_action(
+            {"primary_card_number": card.card_number, "new_member": {"name": " ada "}}
+        )
+        newline = tools.add_household_member_action(
+            {"primary_card_number": f"{card.card_number}\n", "new_member": {"name": "Ada"}}
+        )
+        index = tools.get_household_index()
+        size = index.size(card.card_number)
+        full = tools.add_household_member_action(
+            {"primary_card_number": card.card_number, "new_member": {"name": "Bo"}}
+        )
+        too_big = tools.issue_card_action(
+            {"patron": {"name": "Big"}, "household_members": [{"name": str(n)} for n in range(3)]}
+        )
+    finally:
+        tools.set_household_index(None)
+
+    assert added.status == "added" and added.confirmation_id.startswith("HH-")
+    assert again.status == "already_linked" and again.confirmation_id is None
+    assert newline.status == "already_linked"
+    assert full.status == "household_full" and "limit is 3" in full.message
+    assert too_big.status == "household_full" and too_big.card_number is None
+    assert card.status == "issued"
+    assert size == 3
+    assert index.same_household(card.household_cards[0].card_number, card.card_number)
+
+
+def test_store_journals_links_and_compacts_without_losing_other_writers(tmp_path):
+    path = tmp_path / "households.bin"
+    first, second = HouseholdStore(path), HouseholdStore(path)
+    first.append("CARD-1", "CARD-2")
+    second.append("CARD-1", "CARD-3")
+    with first.journal.open("a") as fh:
+        fh.write('["CARD-9", "CA')  # a write cut short by a crash
+
+    crashed = HouseholdStore(path).load()
+    assert crashed.size("CARD-1") == 3
+
+    first.compact()
+    second.append("CARD-5", "CARD-6")
+    restored = HouseholdStore(path).load()
+
+    assert first.journal.read_text().splitlines() == ['["CARD-5", "CARD-6"]']
+    assert restored.size("CARD-3") == 3
+    assert restored.same_household("CARD-5", "CARD-6")
+    assert len(restored) == 5
@@ -0,0 +1,126 @@
+import multiprocessing
+import sys
+import threading
+
+import pytest
+
+from library_agent.tools import ids, tools
+
+
+def test_encoded_ids_round_trip_and_sort_numerically():
+    values = [0, 1, 31, 32, 2**40, 2**63 - 1]
+
+    encoded = [ids.encode_id(value) for value in values]
+
+    assert [ids.decode_id(text) for text in encoded] == values
+    assert sorted(encoded) == encoded
+    assert {len(text) for text in encoded} == {ids.ENCODED_LENGTH}
+
+
+def test_allocator_is_monotonic_and_packs_worker_id():
+    allocator = ids.IdAllocator(worker_id=7)
+
+    values = [allocator.next_int() for _ in range(10_000)]
+
+    assert values == sorted(set(values))
+    _, worker, _ = ids.split_id(values[-1])
+    assert worker == 7
+
+
+def test_allocator_reanchors_when_counter_clock_lags(monkeypatch):
+    allocator = ids.IdAllocator(worker_id=3)
+    first = allocator.next_int()
+    now = ids._now_ms()
+    monkeypatch.setattr(ids, "_now_ms", lambda: now + 5 * ids.REANCHOR_LAG_MS)
+
+    allocator.next_int()
+    later = allocator.next_int()
+
+    assert later > first
+    timestamp, _, _ = ids.split_id(later)
+    assert timestamp.timestamp() * 1000 >= now + 5 * ids.REANCHOR_LAG_MS - 1
+
+
+def test_lock_file_leases_never_share_a_worker_id(tmp_path, monkeypatch):
+    monkeypatch.delenv("LIBRARY_WORKER_ID", raising=False)
+
+    leases = [ids.claim_worker_id(tmp_path) for _ in range(5)]
+
+    assert len({lease.worker_id for lease in leases}) == 5
+    released = leases[0].worker_id
+    leases[0].release()
+    assert ids.claim_worker_id(tmp_path).worker_id == released
+
+
+def test_env_worker_id_is_a_base_for_per_process_leases(tmp_path, monkeypatch):
+    monkeypatch.setenv("LIBRARY_WORKER_ID", "40")
+
+    leases = [ids.claim_worker_id(tmp_path) for _ in range(3)]
+
+    assert [lease.worker_id for lease in leases] == [40, 41, 42]
+    monkeypatch.setenv("LIBRARY_WORKER_ID", str(ids.MAX_WORKER_ID + 1))
+    with pytest.raises(ValueError):
+        ids.claim_worker_id(tmp_path)
+
+
+def test_threads_never_collide():
+    allocator = ids.IdAllocator(worker_id=11)
+    results: list[list[int]] = [[] for _ in range(8)]
+
+    def draw(bucket: list[int]) -> None:
+        bucket.extend(allocator.next_int() for _ in range(25_000))
+
+    threads = [threading.Thread(target=draw, args=(bucket,)) for bucket in results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    drawn = [value for bucket in results for value in bucket]
+    assert len(set(drawn)) == len(drawn) == 200_000
+    assert all(bucket == sorted(bucket) for bucket in results)
+
+
+def _draw_in_child(count: int) -> list[int]:
+    return [ids.decode_id(ids.new_id("T")) for _ in range(count)]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="relies on fork and flock")
+def test_forked_processes_never_collide(monkeypatch):
+    monkeypatch.delenv("LIBRARY_WORKER_ID", raising=False)
+    ids.new_id("WARM")  # the parent holds a lease before forking
+    context = multiprocessing.get_context("fork")
+
+    with context.Pool(4) as pool:
+        batches = pool.map(_draw_in_child, [20_000] * 4)
+
+    drawn = [value for batch in batches for value in batch]
+    assert len(set(drawn)) == len(drawn)
+    workers = {ids.split_id(batch[0])[1] for batch in batches}
+    assert ids.get_allocator().worker_id not in workers
+
+
+def test_actions_use_shared_allocator():
+    order = tools.order_book_action(
+        {
+            "patron": {"name": "Eve"},
+            "title": "Fourth Wing",
+            "shipping_address": {
+                "street_line1": "1 Way",
+                "city": "Stack City",
+                "state_or_province": "CA",
+                "postal_code": "94016",
+            },
+            "preferred_vendor": "Local Books",
+            "preferred_vendor_address": {
+                "street_line1": "2 Rd",
+                "city": "Stack City",
+                "state_or_province": "CA",
+                "postal_code": "94016",
+            },
+        }
+    )
+    event = tools.request_event_action({"patron": {"name": "Jo"}, "event_type": "Club"})
+
+    assert order.request_id.startswith("ORD-")
+    assert ids.decode_id(event.event_request_id) > ids.decode_id(order.request_id)
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+from google.adk.sessions.state import State
+from pydantic import BaseModel, ValidationError, field_validator
+
+from benchmarks.bench_tool_calls import ARGS
+from library_agent.tools import tools
+from library_agent.tools.dedup import DedupCache
+from library_agent.tools.instrumentation import (
+    Histogram,
+    JsonFileSink,
+    LogSink,
+    PrometheusSink,
+    ToolMetrics,
+    render_prometheus,
+    set_tool_metrics,
+    sinks_from_spec,
+)
+from library_agent.tools.validation import ValidatedFunctionTool
+
+VALIDATION_SECONDS = 0.005
+
+
+class SlowRequest(BaseModel):
+    name: str
+
+    @field_validator("name")
+    @classmethod
+    def _slow(cls, value: str) -> str:
+        time.sleep(VALIDATION_SECONDS)
+        return value
+
+
+def slow_action(request: SlowRequest) -> dict:
+    """Echo the request."""
+    assert isinstance(request, SlowRequest)
+    return {"name": request.name}
+
+
+@pytest.fixture
+def metrics():
+    installed = ToolMetrics()
+    set_tool_metrics(installed)
+    yield installed
+    set_tool_metrics(None)
+
+
+def _call(tool, args, ctx):
+    return asyncio.run(tool.run_async(args=args, tool_context=ctx))
+
+
+def test_histogram_percentiles_stay_within_the_bucket_error():
+    histogram = Histogram()
+    for value in range(1, 100_001):
+        histogram.record(value)
+
+    assert (histogram.count, histogram.min, histogram.max) == (100_000, 1, 100_000)
+    for q in (1, 50, 90, 99, 99.9):
+        exact = q * 1000
+        assert exact <= histogram.percentile(q) <= exact * (1 + 1 / 16)
+    assert histogram.percentile(100) == 100_000
+
+    small = Histogram()
+    for value in (3, 3, 7, 31):
+        small.record(value)
+    assert [small.percentile(q) for q in (50, 75, 100)] == [3, 7, 31]
+
+
+def test_tool_calls_record_latency_split_and_sizes(metrics):
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    update = {"card_request": {"patron": {"name": "Rio", "contact_email": "rio@example.org"}}}
+
+    _call(tools.save_conversation_state, {"update": update}, ctx)
+    _call(tools.issue_library_card, {"request": {"patron": {"name": "Rio"}}}, ctx)
+    with pytest.raises(ValidationError):
+        _call(tools.issue_library_card, {"request": {"patron": {}}}, ctx)
+
+    saved = metrics.stats("save_conversation_state_action")
+    assert saved.calls == 1 and saved.errors == 0
+    assert saved.request_bytes.max == len(json.dumps({"update": update}, separators=(",", ":")))
+    assert saved.response_bytes.max > 0
+    assert saved.state_bytes.max > len("Rio")
+
+    issued = metrics.stats("issue_card_action")
+    assert (issued.calls, issued.errors) == (2, 1)
+    assert issued.validation_ns.count == 2 and issued.validation_ns.max > 0
+    assert issued.logic_ns.total + issued.validation_ns.total == issued.latency_ns.total
+
+    snapshot = metrics.snapshot()
+    assert list(snapshot) == ["issue_card_action", "save_conversation_state_action"]
+    assert snapshot["issue_card_action"]["latency_seconds"]["p99"] > 0
+
+
+def test_validation_time_covers_the_request_model_conversion(metrics):
+    tool = ValidatedFunctionTool(slow_action)
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+
+    _call(tool, {"request": {"name": "Rio"}}, ctx)
+
+    stats = metrics.stats("slow_action")
+    assert stats.validation_ns.min >= VALIDATION_SECONDS * 1e9
+    assert stats.logic_ns.max < VALIDATION_SECONDS * 1e9
+
+
+def test_disabled_metrics_record_nothing():
+    observed = ToolMetrics()
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+
+    _call(tools.recommend_books, {"request": {"patron": {"name": "Rio"}}}, ctx)
+
+    assert observed.snapshot() == {}
+
+
+def test_sinks_export_json_log_and_prometheus(metrics, tmp_path, caplog):
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    _call(tools.recommend_books, {"request": {"patron": {"name": "Rio"}}}, ctx)
+    snapshot = metrics.snapshot()
+
+    JsonFileSink(tmp_path / "out" / "tools.json").export(snapshot)
+    written = json.loads((tmp_path / "out" / "tools.json").read_text())
+    assert written["tools"]["recommend_books_action"]["calls"] == 1
+
+    with caplog.at_level(logging.INFO):
+        LogSink().export(snapshot)
+    assert "tool recommend_books_action calls=1 errors=0" in caplog.text
+
+    text = render_prometheus(snapshot)
+    assert 'library_tool_calls_total{tool="recommend_books_action"} 1' in text
+    assert '# TYPE library_tool_latency_seconds summary' in text
+    assert 'library_tool_request_bytes_count{tool="recommend_books_action"} 1' in text
+
+    sink = PrometheusSink(port=0)
+    served = ToolMetrics([sink])
+    try:
+        served.observe(
+            "order_book_action",
+            latency_ns=2_000,
+            validation_ns=500,
+            request_bytes=10,
+            response_bytes=20,
+            state_bytes=0,
+        )
+        with urllib.request.urlopen(f"http://127.0.0.1:{sink.port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        served.close()
+    assert 'library_tool_logic_seconds_sum{tool="order_book_action"} 1.5e-06' in body
+
+
+def test_sink_spec_parsing(tmp_path):
+    sinks = sinks_from_spec(f"log, json:{tmp_path / 'm.json'},prometheus:9000")
+
+    assert [type(sink) for sink in sinks] == [LogSink, JsonFileSink, PrometheusSink]
+    assert sinks[2].port == 9000
+    with pytest.raises(ValueError):
+        sinks_from_spec("statsd")
+
+
+def test_order_dedup_hit_rate_is_reported_with_the_tool(metrics):
+    previous = tools.get_order_dedup()
+    tools.set_order_dedup(DedupCache(name="order_dedup"))
+    metrics.watch_cache(tools.order_book.name, tools.get_order_dedup)
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    args = {"request": ARGS["order_book"](1)["request"]}
+    try:
+        for _ in range(3):
+            _call(tools.order_book, args, ctx)
+        snapshot = metrics.snapshot()
+    finally:
+        tools.set_order_dedup(previous)
+
+    cache = snapshot["order_book_action"]["cache"]
+    assert (cache["hits"], cache["misses"]) == (2, 1)
+    assert snapshot["order_book_action"]["calls"] == 3
+    text = render_prometheus(snapshot)
+    assert 'library_tool_cache_hits_total{tool="order_book_action"} 2' in text
+    assert 'library_tool_cache_hit_rate{tool="order_book_action"} 0.666666667' in text
+
+
+def test_env_setup_watches_the_order_dedup(tmp_path):
+    code = (
+        "from library_agent.tools import instrumentation, tools\n"
+        "snapshot = instrumentation.get_tool_metrics().snapshot()\n"
+        "print(sorted(snapshot['order_book_action']['cache']))"
+    )
+    env = dict(os.environ, LIBRARY_TOOL_METRICS=f"json:{tmp_path / 'm.json'}")
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+
+    assert out.stdout.strip() == "['hit_rate', 'hits', 'misses']"
@@ -0,0 +1,149 @@
+import threading
+
+import pytest
+
+from library_agent.tools import tools
+from library_agent.tools.dedup import DedupCache
+from library_agent.tools.inventory import Inventory
+
+ORDER = {
+    "patron": {"name": "Eve Rider"},
+    "title": "Fourth Wing",
+    "format": "hardcover",
+    "shipping_address": {
+        "street_line1": "1 Library Way",
+        "city": "Stack City",
+        "state_or_province": "CA",
+        "postal_code": "94016",
+    },
+    "preferred_vendor": "Local Books",
+    "preferred_vendor_address": {
+        "street_line1": "2 Vendor Rd",
+        "city": "Stack City",
+        "state_or_province": "CA",
+        "postal_code": "94016",
+    },
+}
+
+
+@pytest.fixture()
+def inventory():
+    inventory = Inventory(["Main", "East"])
+    inventory.add_copies("Fourth Wing", "hardcover", "East", 1)
+    inventory.add_copies("Fourth Wing", "hardcover", "Main", 1)
+    return inventory
+
+
+def test_reserve_then_backorder_per_title_and_format(inventory):
+    first = inventory.reserve("h1", "fourth  wing", "Hardcover")
+    second = inventory.reserve("h2", "Fourth Wing", "hardcover")
+    third = inventory.reserve("h3", "Fourth Wing", "hardcover", vendor="Local Books")
+    ebook = inventory.reserve("h4", "Fourth Wing", "ebook", vendor="Local Books")
+
+    assert (first.status, first.branch) == ("reserved", "Main")
+    assert (second.status, second.branch) == ("reserved", "East")
+    assert (third.status, third.vendor) == ("backordered", "Local Books")
+    assert ebook.status == "backordered"
+    assert inventory.available("Fourth Wing", "hardcover") == 0
+    assert inventory.queue_length("Fourth Wing", "hardcover") == 1
+
+
+def test_holds_queue_is_fifo_and_skips_released_holds(inventory):
+    inventory.reserve("h1", "Fourth Wing", "hardcover")
+    inventory.reserve("h2", "Fourth Wing", "hardcover")
+    for hold_id in ("w1", "w2", "w3"):
+        inventory.reserve(hold_id, "Fourth Wing", "hardcover")
+
+    assert inventory.release("w1") == []
+    filled = inventory.release("h1")
+    received = inventory.add_copies("Fourth Wing", "hardcover", "East", 2)
+
+    assert [hold.hold_id for hold in filled] == ["w2"]
+    assert filled[0].branch == "Main"
+    assert [hold.hold_id for hold in received] == ["w3"]
+    assert inventory.status("w3").status == "reserved"
+    assert inventory.status("w1") is None
+    assert inventory.available("Fourth Wing", "hardcover", "East") == 1
+    assert inventory.queue_length("Fourth Wing", "hardcover") == 0
+
+
+def test_released_waiting_hold_does_not_block_new_reservations(inventory):
+    inventory.reserve("h1", "Fourth Wing", "hardcover")
+    inventory.reserve("h2", "Fourth Wing", "hardcover")
+    inventory.reserve("w1", "Fourth Wing", "hardcover")
+    inventory.release("w1")
+    inventory.add_copies("Fourth Wing", "hardcover", "Main", 1)
+
+    assert inventory.reserve("h3", "Fourth Wing", "hardcover").status == "reserved"
+
+
+def test_unknown_titles_are_capped_and_release_clamps():
+    inventory = Inventory(["Main"], max_unknown=2)
+    inventory.add_copies("Iron Flame", "paperback", "Main", 1)
+    held = inventory.reserve("h1", "Iron Flame", "paperback")
+    first = inventory.reserve("u1", "Onyx Storm", "hardcover")
+    second = inventory.reserve("u2", "Sunrise", "ebook")
+    again = inventory.reserve("u3", "Onyx Storm", "hardcover")
+    capped = inventory.reserve("u4", "Anything At All", "ebook")
+    inventory.add_copies("Onyx Storm", "hardcover", "Main", 1)
+    now_known = inventory.reserve("u5", "Yet Another", "ebook")
+
+    assert [first.status, second.status, again.status] == ["backordered"] * 3
+    assert capped.status == "requested"
+    assert inventory.status("u4") is None
+    assert now_known.status == "backordered"
+    assert len(inventory) == 4
+
+    inventory.add_copies("Iron Flame", "paperback", "Main", 0xFFFF)
+    assert inventory.release(held.hold_id) == []
+    assert inventory.available("Iron Flame", "paperback") == 0xFFFF
+
+
+def test_concurrent_reserves_never_oversell():
+    inventory = Inventory(["Main"])
+    inventory.add_copies("Iron Flame", "paperback", "Main", 25)
+    results = []
+
+    def place(worker):
+        for n in range(10):
+            results.append(inventory.reserve(f"{worker}-{n}", "Iron Flame", "paperback"))
+
+    threads = [threading.Thread(target=place, args=(n,)) for n in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(hold.status == "reserved" for hold in results) == 25
+    assert inventory.queue_length("Iron Flame", "paperback") == 175
+
+
+def test_copy_counts_are_two_bytes_per_title_and_branch():
+    inventory = Inventory([f"Branch {n}" for n in range(10)])
+    for n in range(1000):
+        inventory.add_copies(f"Title {n}", "paperback", "Branch 3", 50)
+
+    assert len(inventory) == 1000
+    assert inventory.nbytes == 1000 * 10 * 2
+    with pytest.raises(ValueError):
+        inventory.add_copies("Title 1", "paperback", "Branch 3", 70_000)
+
+
+def test_order_book_action_reports_inventory_status(tmp_path):
+    stock = tmp_path / "inventory.csv"
+    stock.write_text("title,format,branch,copies\nFourth Wing,hardcover,Main,1\n")
+    tools.set_inventory(Inventory.from_file(stock))
+    previous = tools.get_order_dedup()
+    tools.set_order_dedup(DedupCache(name="order_dedup"))
+    try:
+        reserved = tools.order_book_action(ORDER)
+        backordered = tools.order_book_action(dict(ORDER, patron={"name": "Al"}))
+        hold = tools.get_inventory().status(backordered.request_id)
+    finally:
+        tools.set_order_dedup(previous)
+        tools.set_inventory(None)
+
+    assert reserved.status == "reserved"
+    assert backordered.status == "backordered"
+    assert hold.vendor == "Local Books"
+    assert tools.order_book_action(dict(ORDER, title="Onyx Storm")).status == "requested"
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+from google.adk.sessions.state import State
+
+from library_agent.tools import tools
+from library_agent.tools.question_bank import _load_bank
+from library_agent.tools.requirements_helper import compile_path
+
+_ADDRESS = {
+    "street_line1": "1 Library Way",
+    "city": "Stack City",
+    "state_or_province": "CA",
+    "postal_code": "94016",
+}
+# A complete state section for every question-bank tool key.
+COMPLETE = {
+    "recommend_books": {"patron": {"name": "Casey Doe"}},
+    "order_book": {
+        "patron": {"name": "Eve Rider"},
+        "title": "Fourth Wing",
+        "format": "paperback",
+        "shipping_address": _ADDRESS,
+        "preferred_vendor": "Local Books",
+        "preferred_vendor_address": dict(_ADDRESS, street_line1="2 Vendor Rd"),
+    },
+    "issue_library_card": {
+        "patron": {"name": "Ana Ruiz"},
+        "household_members": [{"name": "Leo Ruiz"}],
+    },
+    "add_household_member": {
+        "primary_card_number": "CARD-7788",
+        "new_member": {"name": "Leo Ruiz"},
+    },
+    "request_library_event": {"patron": {"name": "Sam Lee"}, "event_type": "book club"},
+}
+
+
+def _required_ids(tool_key):
+    questions = _load_bank()[tool_key]["collection"]["questions"]
+    return [question["id"] for question in questions if question.get("required")]
+
+
+def _ctx(state=None):
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    if state:
+        tools.save_conversation_state_action(state, ctx)
+    return ctx
+
+
+def test_every_tool_key_is_covered():
+    assert set(COMPLETE) == set(_load_bank()) == set(tools.TOOL_SECTIONS)
+
+
+@pytest.mark.parametrize("tool_key", sorted(COMPLETE))
+def test_empty_section_lists_every_required_question(tool_key):
+    section = tools.TOOL_SECTIONS[tool_key]
+
+    response = tools.list_missing_fields_action(section, _ctx())
+
+    assert [field.path for field in response.missing] == [
+        question_id for question_id in _required_ids(tool_key) if "[]" not in question_id
+    ]
+    assert all(field.prompt for field in response.missing)
+    assert not response.complete
+
+
+@pytest.mark.parametrize("tool_key", sorted(COMPLETE))
+def test_saved_section_is_complete(tool_key):
+    section = tools.TOOL_SECTIONS[tool_key]
+
+    response = tools.list_missing_fields_action(section, _ctx({section: COMPLETE[tool_key]}))
+
+    assert response.missing == []
+    assert response.complete
+
+
+def test_list_paths_expand_per_item():
+    read = compile_path("household_members[].patron.name").read
+
+    assert read({"household_members": [{"patron": {"name": "Leo"}}, {}]}) == [
+        ("household_members[0].patron.name", "Leo"),
+        ("household_members[1].patron.name", None),
+    ]
+    assert read({}) == []
+    assert compile_path("shipping_address.city").read({"shipping_address": "n/a"}) == [
+        ("shipping_address.city", None)
+    ]
+
+
+def test_pending_slots_are_returned_for_confirmation():
+    ctx = _ctx()
+    ctx.state[tools.LIBRARY_STATE_KEY] = {
+        tools.PENDING_SLOTS_KEY: {"book_order": {"format": "ebook"}}
+    }
+
+    response = tools.list_missing_fields_action("book_order", ctx)
+
+    pending = {field.path: field.pending_value for field in response.missing}
+    assert pending["format"] == "ebook"
+    assert pending["title"] is None
+
+
+def test_unknown_section_is_rejected():
+    with pytest.raises(ValueError, match="Unknown section"):
+        tools.list_missing_fields_action("parking_permit", _ctx())
@@ -0,0 +1,84 @@
+import asyncio
+
+from google.adk import Agent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from library_agent.pre_router import IntentRouter, load_examples, pre_route
+
+
+class RecordingLlm(BaseLlm):
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=f"{self.model} here")])
+        )
+
+
+def test_router_is_confident_only_on_clear_requests():
+    router = IntentRouter(load_examples())
+
+    assert router.route("I want a new library card").agent_name == "card_services_agent"
+    assert router.route("book a study room for Friday").agent_name == "events_agent"
+    assert router.route("Add my brother to my card").agent_name == "household_link_agent"
+    for vague in ("hi", "yes, that's right", "what are your hours?", "My name is Quinn"):
+        assert router.route(vague).agent_name is None
+
+
+def test_threshold_controls_fallback():
+    strict = IntentRouter(load_examples(), threshold=0.999999)
+
+    decision = strict.route("Can you recommend something like Dune?")
+
+    assert decision.agent_name is None
+    assert 0.2 < decision.confidence < 0.999999
+    assert abs(sum(decision.scores.values()) - 1) < 1e-9
+
+
+def _run(text):
+    root_model = RecordingLlm(model="root")
+    card_model = RecordingLlm(model="card")
+    root = Agent(
+        name="library_root_agent",
+        model=root_model,
+        instruction="Route patrons.",
+        before_model_callback=pre_route,
+        sub_agents=[
+            Agent(name="card_services_agent", model=card_model, instruction="Issue cards."),
+            Agent(name="events_agent", model=RecordingLlm(model="events"), instruction="Events."),
+        ],
+    )
+    runner = InMemoryRunner(agent=root, app_name="library")
+
+    async def go():
+        session = await runner.session_service.create_session(app_name="library", user_id="u")
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        return [
+            event
+            async for event in runner.run_async(
+                user_id="u", session_id=session.id, new_message=message
+            )
+        ]
+
+    events = asyncio.run(go())
+    return root_model, card_model, events
+
+
+def test_pre_route_transfers_without_calling_the_root_model():
+    root_model, card_model, events = _run("I want a new library card")
+
+    assert root_model.calls == 0
+    assert card_model.calls == 1
+    assert events[-1].author == "card_services_agent"
+
+
+def test_pre_route_falls_back_to_the_llm_when_unsure():
+    root_model, card_model, events = _run("hello there")
+
+    assert root_model.calls == 1
+    assert card_model.calls == 0
+    assert events[-1].author == "library_root_agent"
@@ -0,0 +1,46 @@
+import json
+
+from library_agent import agent, prompt_bundle
+from library_agent.tools.question_bank import QuestionBankRegistry, _load_bank
+
+
+def test_shipped_question_ids_resolve_to_model_fields():
+    assert prompt_bundle.check_question_paths() == []
+
+
+def test_unknown_question_id_is_reported():
+    bank = json.loads(json.dumps(_load_bank()))
+    bank["order_book"]["collection"]["questions"].append({"id": "shipping_address.zip"})
+
+    errors = prompt_bundle.check_question_paths(bank)
+
+    assert errors == [
+        "order_book: question id 'shipping_address.zip' is not a field of BookOrderRequest"
+    ]
+
+
+def test_bundle_seeds_renders_that_match_live_rendering(tmp_path):
+    path = tmp_path / "bundle.json"
+    assert prompt_bundle.build(path) > 20
+    registry = QuestionBankRegistry()
+
+    assert prompt_bundle.load(registry, path)
+
+    def never(_bank):
+        raise AssertionError("rendered live despite the bundle")
+
+    assert registry.memo(("root_instruction", "full"), never) == agent.root_instruction()
+    assert registry.memo(("root_instruction", ("book_order",)), never) == (
+        agent.root_instruction_for(("book_order",))
+    )
+
+
+def test_stale_or_missing_bundle_falls_back(tmp_path):
+    path = tmp_path / "bundle.json"
+    prompt_bundle.build(path)
+    payload = json.loads(path.read_text())
+    payload["hash"] = "0" * 64
+    path.write_text(json.dumps(payload))
+
+    assert not prompt_bundle.load(QuestionBankRegistry(), path)
+    assert not prompt_bundle.load(QuestionBankRegistry(), tmp_path / "missing.json")
@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from library_agent.subagents import card_services
+from library_agent.tools import question_bank
+from library_agent.tools.question_bank import QUESTIONS_DIR, QuestionBankRegistry
+
+
+@pytest.fixture
+def bank_dir(tmp_path):
+    directory = tmp_path / "questions"
+    shutil.copytree(QUESTIONS_DIR, directory)
+    return directory
+
+
+@pytest.fixture
+def registry(bank_dir):
+    registry = QuestionBankRegistry(bank_dir, poll_interval=0)
+    question_bank.set_registry(registry)
+    yield registry
+    question_bank.set_registry(None)
+
+
+def _edit_first_prompt(bank_dir, tool_key, prompt):
+    path = bank_dir / f"{tool_key}.json"
+    data = json.loads(path.read_text())
+    data["collection"]["questions"][0]["prompt"] = prompt
+    path.write_text(json.dumps(data))
+    stat = path.stat()
+    # Filesystems with coarse mtimes could hide a same-size rewrite.
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_renders_once_per_version(registry, bank_dir):
+    calls = []
+
+    def render(bank):
+        calls.append(1)
+        return len(bank)
+
+    assert registry.memo("size", render) == registry.memo("size", render) == 5
+    assert len(calls) == 1
+    first = question_bank.format_question_collection("issue_library_card")
+    assert question_bank.format_question_collection("issue_library_card") is first
+
+    _edit_first_prompt(bank_dir, "issue_library_card", "What name goes on the card?")
+
+    assert registry.memo("size", render) == 5
+    assert len(calls) == 2
+    assert registry.version == 2
+    assert 'ask: "What name goes on the card?"' in question_bank.format_question_collection(
+        "issue_library_card"
+    )
+
+
+def test_instruction_provider_picks_up_edits(registry, bank_dir):
+    before = card_services.instruction()
+    assert card_services.instruction() is before
+
+    _edit_first_prompt(bank_dir, "issue_library_card", "Whose card is this?")
+
+    after = card_services.instruction()
+    assert 'ask: "Whose card is this?"' in after
+    assert 'ask: "Whose card is this?"' not in before
+
+
+def test_broken_file_keeps_last_good_bank(registry, bank_dir):
+    version = registry.version
+    (bank_dir / "order_book.json").write_text('{"collection": ')
+
+    with pytest.warns(UserWarning, match=f"Keeping question bank v{version}"):
+        assert "order_book" in registry.bank
+        assert registry.version == version
+
+
+def test_poll_interval_throttles_stat_calls(bank_dir):
+    registry = QuestionBankRegistry(bank_dir, poll_interval=3600)
+    version = registry.version
+    _edit_first_prompt(bank_dir, "order_book", "Who wants the book?")
+
+    assert registry.version == version
+    assert registry.reload() == version + 1
@@ -0,0 +1,139 @@
+import asyncio
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from library_agent import agent_registry
+from library_agent.response_cache import CachingLlm, cache_key
+from library_agent.scripted_llm import ScriptedLlm, Step, transfer
+from library_agent.tools.dedup import DedupCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _request(agent: str, *contents: types.Content) -> LlmRequest:
+    request = LlmRequest(model="m", contents=list(contents))
+    request.config.labels = {"adk_agent_name": agent}
+    return request
+
+
+def _user(text: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def _tool_result(name: str, response: dict) -> list[types.Content]:
+    call = types.FunctionCall(id="adk-1", name=name, args={})
+    result = types.FunctionResponse(id="adk-1", name=name, response=response)
+    return [
+        types.Content(role="model", parts=[types.Part(function_call=call)]),
+        types.Content(role="user", parts=[types.Part(function_response=result)]),
+    ]
+
+
+def _ask(llm: CachingLlm, request: LlmRequest) -> list:
+    async def go():
+        return [response async for response in llm.generate_content_async(request)]
+
+    return asyncio.run(go())
+
+
+SCRIPT = {
+    "library_root_agent": [transfer("card_services_agent")],
+    "card_services_agent": [
+        Step(tool="issue_card_action", args={"request": {"patron": {"name": "Eve"}}}),
+        Step(text="Your card CARD-20000000000014 is ready."),
+    ],
+    "book_order_agent": [Step(text="Your order ORD-02X2F9BPEE000 is placed.")],
+}
+
+
+def test_repeated_routing_prompt_is_served_from_cache():
+    inner = ScriptedLlm(script=SCRIPT)
+    llm = CachingLlm(inner=inner, cache=DedupCache(name="responses"))
+    opening = _request("library_root_agent", _user("I need a library card"))
+
+    first = _ask(llm, opening)
+    second = _ask(llm, _request("library_root_agent", _user("I need a library card")))
+    _ask(llm, _request("library_root_agent", _user("Order a book")))
+
+    assert inner.calls == 2
+    assert second[0].content == first[0].content
+    assert second[0].content.parts[0].function_call.name == "transfer_to_agent"
+    stats = llm.stats
+    assert (stats.hits, stats.misses, stats.skipped) == (1, 2, 0)
+    assert stats.hit_rate == 1 / 3
+
+
+def test_side_effects_and_volatile_replies_are_never_cached():
+    inner = ScriptedLlm(script=SCRIPT)
+    llm = CachingLlm(inner=inner, cache=DedupCache(name="responses"))
+    issue = _request("card_services_agent", _user("Card for Eve please"))
+    confirm = _request(
+        "card_services_agent",
+        _user("Card for Eve please"),
+        *_tool_result("issue_card_action", {"card_number": "CARD-20000000000014"}),
+    )
+    order = _request("book_order_agent", _user("Order Dune"))
+
+    for request in (issue, issue, confirm, confirm, order, order):
+        _ask(llm, request)
+
+    assert inner.calls == 6
+    assert llm.stats.hits == 0
+    assert llm.stats.skipped == 2
+
+
+def test_key_canonicalizes_state_and_timestamps_but_keeps_ids():
+    def saved(state: dict, at: str = "2026-10-17T09:30:00Z", order: str = "ORD-02X2F9BPEE000"):
+        return _request(
+            "library_root_agent",
+            _user(f"Order {order} placed at {at}"),
+            *_tool_result("save_conversation_state_action", {"result": {"state": state}}),
+        )
+
+    base = cache_key(saved({"card_request": {"patron": {"name": "Eve"}}}))
+    assert base == cache_key(
+        saved({"card_request": {"patron": {"name": " Eve ", "card_number": None},
+                                "household_members": []}})
+    )
+    assert base == cache_key(
+        saved({"card_request": {"patron": {"name": "Eve"}}}, at="2026-10-18T11:00:00Z")
+    )
+    assert base != cache_key(
+        saved({"card_request": {"patron": {"name": "Eve"}}}, order="ORD-02X2F9BQQQ001")
+    )
+    assert base != cache_key(saved({"card_request": {"patron": {"name": "Eva"}}}))
+
+
+def test_entries_expire_and_survive_restarts_on_disk(tmp_path):
+    clock = Clock()
+    path = tmp_path / "responses.db"
+    inner = ScriptedLlm(script=SCRIPT)
+    opening = _request("library_root_agent", _user("I need a library card"))
+
+    first = CachingLlm(inner=inner, cache=DedupCache(ttl_seconds=60, path=path, clock=clock))
+    _ask(first, opening)
+    restarted = CachingLlm(inner=inner, cache=DedupCache(ttl_seconds=60, path=path, clock=clock))
+    _ask(restarted, opening)
+    assert (inner.calls, restarted.stats.hits) == (1, 1)
+
+    clock.now += 61
+    _ask(restarted, opening)
+    assert inner.calls == 2
+
+
+def test_pool_wraps_clients_when_the_env_asks(tmp_path, monkeypatch):
+    monkeypatch.setenv("LIBRARY_RESPONSE_CACHE", "1")
+    monkeypatch.setenv("LIBRARY_CASSETTE", "replay")
+    monkeypatch.setenv("LIBRARY_CASSETTE_PATH", str(tmp_path / "pool.cas"))
+
+    client = agent_registry._client_factory()("gpt-4.1-mini")
+
+    assert isinstance(client, CachingLlm)
+    assert client.model == client.inner.model == "gpt-4.1-mini"
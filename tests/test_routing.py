@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from library_agent import agent as agent_module
+from library_agent.routing import SERVICES_BY_KEY, detect_intents, resolve_intents
+from library_agent.tools import tools
+from library_agent.tools.requirements_helper import format_requirement_section
+
+
+@pytest.mark.parametrize(
+    ("text", "intent"),
+    [
+        ("I love cozy mysteries and want something comforting to read.", "recommendation"),
+        ("Please order a hardcover copy of Fourth Wing from Local Books.", "book_order"),
+        ("I need a new family card for the Jackson household.", "card_request"),
+        ("Add my sister Jo to card CARD-2222.", "household_request"),
+        ("Reserve a study room for four on March 12th.", "event_request"),
+    ],
+)
+def test_detect_intents_on_eval_openers(text, intent):
+    assert detect_intents(text) == (intent,)
+
+
+def test_genre_cues_match_whole_words_only():
+    assert detect_intents("Any good mysteries?") == ("recommendation",)
+    assert "recommendation" not in detect_intents("need a card for my mysteriesx club")
+    assert detect_intents("a sci-fixer upper") == ()
+
+
+def test_resolve_intents_prefers_latest_message_then_saved_state():
+    state = {tools.LIBRARY_STATE_KEY: {"event_request": {"event_type": "Book Club"}}}
+
+    assert resolve_intents({}, ["hello"]) == ()
+    assert resolve_intents(state, ["hello", "thanks!"]) == ("event_request",)
+    assert resolve_intents(state, ["Can you order Iron Flame?"]) == ("book_order",)
+    assert resolve_intents({}, ["I need a new library card", "it's Quinn"]) == (
+        "card_request",
+    )
+
+
+def test_scoped_instruction_carries_only_the_detected_service():
+    order = SERVICES_BY_KEY["book_order"]
+    card = SERVICES_BY_KEY["card_request"]
+    routing = agent_module.root_instruction_for(())
+    scoped = agent_module.root_instruction_for(("book_order",))
+
+    assert order.requirements() in scoped and order.confirmation() in scoped
+    assert card.requirements() not in scoped and card.confirmation() not in scoped
+    assert "book_order.title" in scoped and "card_request.patron" not in scoped
+    assert "book_order.title" not in routing
+    assert "`card_services_agent`" in routing
+    assert len(routing) < len(scoped) < len(agent_module.root_instruction())
+
+
+def test_instruction_provider_reads_session_events():
+    def user_event(text):
+        return SimpleNamespace(
+            author="user", content=types.Content(role="user", parts=[types.Part(text=text)])
+        )
+
+    context = SimpleNamespace(
+        state={},
+        session=SimpleNamespace(
+            events=[user_event("Hi!"), user_event("Add my son Eli to my card")]
+        ),
+    )
+
+    assert agent_module.scoped_root_instruction(context) == agent_module.root_instruction_for(
+        ("household_request",)
+    )
+
+
+def test_requirement_section_can_expand_selected_sections_only():
+    section = format_requirement_section(tools.ConversationStateUpdate, sections=["card_request"])
+
+    assert "- card_request.household_members[].name (required)" in section
+    assert "- book_order (optional)" in section
+    assert "book_order.title" not in section
@@ -0,0 +1,149 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from library_agent.tools import tools
+from library_agent.tools.scheduler import EventScheduler, Room, parse_event_time
+
+START = datetime(2026, 3, 5, 19, 0, tzinfo=timezone.utc)
+BEFORE_START = (START - timedelta(days=1)).timestamp
+
+
+@pytest.fixture()
+def scheduler():
+    scheduler = EventScheduler([Room("Auditorium", 100), Room("Study", 8)], clock=BEFORE_START)
+    tools.set_scheduler(scheduler)
+    yield scheduler
+    tools.set_scheduler(None)
+
+
+def test_books_smallest_room_that_fits(scheduler):
+    small = scheduler.book("a", START, attendees=6)
+    large = scheduler.book("b", START, attendees=6)
+    full = scheduler.book("c", START, attendees=60)
+    too_big = scheduler.book("d", START, attendees=200)
+
+    assert (small.status, small.room) == ("scheduled", "Study")
+    assert (large.status, large.room) == ("scheduled", "Auditorium")
+    assert full.status == "waitlisted"
+    assert too_big.status == "over_capacity"
+    assert scheduler.status("d") is None
+    assert scheduler.waitlist_length() == 1
+
+
+def test_past_bookings_and_waitlist_entries_expire():
+    now = [START.timestamp()]
+    scheduler = EventScheduler([Room("Study", 8)], clock=lambda: now[0])
+    scheduler.book("past", START, attendees=4)
+    scheduler.book("past-waiting", START, attendees=4)
+    scheduler.book("long-waiting", START, attendees=4, duration=timedelta(hours=3))
+
+    now[0] = (START + timedelta(hours=2)).timestamp()
+    upcoming = scheduler.book("upcoming", START + timedelta(days=1), attendees=4)
+
+    assert upcoming.room == "Study"
+    assert scheduler.status("past") is None
+    assert scheduler.status("past-waiting") is None
+    assert scheduler.status("long-waiting").status == "waitlisted"
+    assert scheduler.waitlist_length() == 1
+    assert scheduler.cancel("past") == []
+
+
+def test_back_to_back_slots_do_not_overlap(scheduler):
+    scheduler.book("a", START, attendees=4)
+    after = scheduler.book("b", START + timedelta(hours=1), attendees=4)
+    before = scheduler.book("c", START - timedelta(hours=1), attendees=4)
+    overlapping = scheduler.book("d", START + timedelta(minutes=30), attendees=4)
+
+    assert after.room == before.room == "Study"
+    assert overlapping.room == "Auditorium"
+
+
+def test_cancel_promotes_waitlist_by_priority(scheduler):
+    scheduler.book("a", START, attendees=50)
+    scheduler.book("b", START, attendees=5)
+    scheduler.book("late", START, attendees=60, priority=5)
+    scheduler.book("urgent", START, attendees=60, priority=1)
+    assert scheduler.waitlist_length() == 2
+
+    promoted = scheduler.cancel("a")
+
+    assert [booking.request_id for booking in promoted] == ["urgent"]
+    assert scheduler.status("urgent").room == "Auditorium"
+    assert scheduler.status("late").status == "waitlisted"
+    assert scheduler.cancel("late") == []
+    assert scheduler.waitlist_length() == 0
+
+
+def test_past_start_neither_books_nor_waitlists():
+    scheduler = EventScheduler([Room("A", 10)], clock=START.timestamp)
+    past = START - timedelta(days=1)
+
+    first = scheduler.book("r1", past, attendees=5)
+    second = scheduler.book("r2", past, attendees=5)
+
+    assert (first.status, first.room) == ("past", None)
+    assert second.status == "past"
+    assert scheduler.status("r1") is None
+    assert scheduler.waitlist_length() == 0
+    assert scheduler.book("r3", START, attendees=5).room == "A"
+
+
+def test_concurrent_bookings_never_double_book():
+    scheduler = EventScheduler([Room(f"Room {n}", 10) for n in range(4)], clock=BEFORE_START)
+    results = []
+
+    def book(worker):
+        results.append(scheduler.book(f"r{worker}", START, attendees=5))
+
+    threads = [threading.Thread(target=book, args=(n,)) for n in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    rooms = [booking.room for booking in results if booking.status == "scheduled"]
+    assert sorted(rooms) == [f"Room {n}" for n in range(4)]
+
+
+def test_parse_event_time_accepts_iso_only():
+    assert parse_event_time("2026-03-05T19:00:00Z") == START
+    assert parse_event_time("2026-03-05").tzinfo is timezone.utc
+    assert parse_event_time("next Tuesday evening") is None
+    assert parse_event_time(None) is None
+
+
+def test_request_event_action_uses_scheduler(tmp_path):
+    rooms = tmp_path / "rooms.json"
+    rooms.write_text(
+        json.dumps(
+            {"rooms": [{"name": "Story Room", "capacity": 20}], "duration_minutes": {"Book Club": 90}}
+        )
+    )
+    tools.set_scheduler(EventScheduler.from_file(rooms, clock=BEFORE_START))
+    try:
+        request = {
+            "patron": {"name": "Jo"},
+            "event_type": "book club",
+            "desired_date": "2026-03-05T19:00:00Z",
+            "attendees": 12,
+        }
+        first = tools.request_event_action(request)
+        second = tools.request_event_action(
+            {**request, "desired_date": "2026-03-05T20:00:00Z"}
+        )
+        freeform = tools.request_event_action({**request, "desired_date": "soon"})
+        crowd = tools.request_event_action({**request, "attendees": 45})
+        past = tools.request_event_action({**request, "desired_date": "2026-02-01T19:00:00Z"})
+    finally:
+        tools.set_scheduler(None)
+
+    assert first.status == "scheduled"
+    assert second.status == "waitlisted"
+    assert freeform.status == "received"
+    assert crowd.status == "over_capacity"
+    assert "holds 20" in crowd.message
+    assert past.status == "received"
+    assert "already passed" in past.message
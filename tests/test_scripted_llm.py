@@ -0,0 +1,89 @@
+import asyncio
+import random
+
+import pytest
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from benchmarks.load_test import SCENARIOS, percentile, run_load
+from library_agent.agent import create_root_agent
+from library_agent.agent_registry import ModelPool, get_model_pool, set_model_pool
+from library_agent.scripted_llm import Latency, ScriptedLlm, Step
+from library_agent.tools import tools
+
+
+def test_latency_specs():
+    rng = random.Random(1)
+
+    assert Latency.parse("0.25").sample(rng) == 0.25
+    assert 0.1 <= Latency.parse("uniform:0.1,0.2").sample(rng) <= 0.2
+    assert Latency.parse("lognormal:0.5,0.4").sample(rng) > 0
+    with pytest.raises(ValueError):
+        Latency.parse("poisson:1")
+    with pytest.raises(ValueError):
+        Step(text="hi", tool="save_conversation_state_action")
+
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_load_harness_runs_root_to_subagent_to_tool(scenario):
+    opening, script = SCENARIOS[scenario]
+    llm = ScriptedLlm(script=script, latency=Latency.parse("0.001"))
+    previous = get_model_pool()
+    set_model_pool(ModelPool(lambda _name: llm))
+    try:
+        root = create_root_agent()
+        samples, _ = asyncio.run(run_load(root, opening, sessions=4, concurrency=2, turns=2))
+    finally:
+        set_model_pool(previous)
+
+    # Root: save + transfer; subagent: action tool + text; then one closing reply.
+    assert sorted(sample.model_calls for sample in samples) == [1] * 4 + [4] * 4
+    assert llm.calls == 20
+    assert all(0 < sample.overhead < sample.seconds for sample in samples)
+    loaded = [sub.name for sub in root.sub_agents if sub.loaded]
+    assert loaded == [name for name in script if name != root.name]
+
+
+def test_scripted_tool_calls_reach_the_real_tools():
+    opening, script = SCENARIOS["card"]
+    llm = ScriptedLlm(script=script)
+    previous = get_model_pool()
+    set_model_pool(ModelPool(lambda _name: llm))
+    runner = InMemoryRunner(agent=create_root_agent(llm), app_name="library")
+
+    async def go():
+        session = await runner.session_service.create_session(app_name="library", user_id="u")
+        message = types.Content(role="user", parts=[types.Part(text=opening.format(i=3))])
+        events = [
+            event
+            async for event in runner.run_async(
+                user_id="u", session_id=session.id, new_message=message
+            )
+        ]
+        session = await runner.session_service.get_session(
+            app_name="library", user_id="u", session_id=session.id
+        )
+        return events, session
+
+    try:
+        events, session = asyncio.run(go())
+    finally:
+        set_model_pool(previous)
+
+    responses = {
+        response.name: response.response
+        for event in events
+        for response in event.get_function_responses()
+    }
+    assert responses["issue_card_action"]["result"].card_number.startswith("CARD-")
+    stored = tools.load_conversation_state(session.state)
+    assert stored["card_request"]["patron"]["name"] == "Reader 3"
+    assert events[-1].author == "card_services_agent"
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 95) == 3.0
@@ -0,0 +1,155 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk import Agent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.adk.sessions.state import State
+from google.genai import types
+
+from library_agent.pre_router import make_slot_filler
+from library_agent.tools import tools
+from library_agent.tools.slot_extractors import (
+    TOOL_SECTIONS,
+    compile_rule,
+    compile_tool,
+    extract_slots,
+    upsert_slots,
+    validate_slot,
+)
+
+
+def test_every_bank_question_compiles():
+    for tool_key in TOOL_SECTIONS:
+        extractors = compile_tool(tool_key)
+        assert extractors
+        for extractor in extractors:
+            assert extractor.rule.validate is not None
+    assert compile_tool("order_book") is compile_tool("order_book")
+
+
+def test_validators_normalise_and_reject():
+    assert validate_slot("order_book", "format", "E-Book") == "ebook"
+    assert validate_slot("order_book", "shipping_address.state_or_province", "ca") == "CA"
+    assert validate_slot("order_book", "shipping_address.postal_code", "k1a 0b6") == "K1A 0B6"
+    assert validate_slot("order_book", "needed_by", "2026-11-02") == "2026-11-02"
+    assert validate_slot("request_library_event", "attendees", "12") == 12
+    assert validate_slot("recommend_books", "favorite_genres", "mystery, sci-fi") == [
+        "mystery",
+        "sci-fi",
+    ]
+    for question_id, value in (
+        ("format", "scroll"),
+        ("patron.contact_email", "pat at example"),
+        ("shipping_address.state_or_province", "ZZ"),
+        ("needed_by", "next Tuesday"),
+        ("title", "  "),
+    ):
+        with pytest.raises(ValueError, match=question_id):
+            validate_slot("order_book", question_id, value)
+    with pytest.raises(ValueError):
+        validate_slot("request_library_event", "attendees", 0)
+    assert compile_rule("something new").validate(" x ") == "x"
+
+
+def test_extracts_order_details_from_one_message():
+    text = (
+        "I'm Sam, card CARD-20000000000428, email sam.lee@example.org. I'd like the "
+        "audiobook, shipped to 12 Elm St, Springfield, IL 62704 by 2026-11-02."
+    )
+
+    slots = extract_slots("order_book", text)
+
+    assert slots == {
+        "patron.card_number": "CARD-20000000000428",
+        "patron.contact_email": "sam.lee@example.org",
+        "format": "audiobook",
+        "shipping_address.state_or_province": "IL",
+        "shipping_address.postal_code": "62704",
+        "needed_by": "2026-11-02",
+    }
+
+
+def test_extraction_stays_conservative():
+    assert extract_slots("order_book", "Should I get the ebook or the audiobook?") == {}
+    assert extract_slots("order_book", "IN 2024 I read 12345 pages") == {}
+    assert extract_slots("request_library_event", "book club for 14 people at 6pm") == {
+        "attendees": 14
+    }
+    assert extract_slots("add_household_member", "card number is 88812 please") == {
+        "primary_card_number": "88812"
+    }
+
+
+def test_upsert_keeps_saved_fields_and_saving_clears_pending():
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    tools.save_conversation_state_action(
+        {
+            "card_request": {"patron": {"name": "Ana", "contact_email": "ana@example.com"}},
+        },
+        ctx,
+    )
+
+    changed = upsert_slots(
+        ctx.state,
+        ["issue_library_card", "order_book"],
+        "reach me at new@example.com, card CARD-7788, paperback",
+    )
+
+    assert changed == {
+        "card_request": {"patron.card_number": "CARD-7788"},
+        "book_order": {
+            "patron.card_number": "CARD-7788",
+            "patron.contact_email": "new@example.com",
+            "format": "paperback",
+        },
+    }
+    stored = tools.load_conversation_state(ctx.state)
+    assert stored["card_request"]["patron"]["contact_email"] == "ana@example.com"
+    assert upsert_slots(ctx.state, ["order_book"], "paperback please") == {}
+
+    tools.save_conversation_state_action(
+        {"card_request": {"patron": {"name": "Ana", "card_number": "CARD-7788"}}}, ctx
+    )
+    pending = tools.load_conversation_state(ctx.state)[tools.PENDING_SLOTS_KEY]
+    assert set(pending) == {"book_order"}
+
+
+class RecordingLlm(BaseLlm):
+    instructions: list[str] = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.instructions.append(llm_request.config.system_instruction or "")
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="ok")]))
+
+
+def test_slot_filler_updates_state_before_the_model_call():
+    model = RecordingLlm(model="order", instructions=[])
+    agent = Agent(
+        name="book_order_agent",
+        model=model,
+        instruction="Order books.",
+        before_model_callback=make_slot_filler(["order_book"]),
+    )
+    runner = InMemoryRunner(agent=agent, app_name="library")
+
+    async def go():
+        session = await runner.session_service.create_session(app_name="library", user_id="u")
+        message = types.Content(
+            role="user", parts=[types.Part(text="Hardcover please, email me at jo@example.com")]
+        )
+        async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+            pass
+        return await runner.session_service.get_session(
+            app_name="library", user_id="u", session_id=session.id
+        )
+
+    session = asyncio.run(go())
+
+    pending = tools.load_conversation_state(session.state)[tools.PENDING_SLOTS_KEY]
+    assert pending == {
+        "book_order": {"patron.contact_email": "jo@example.com", "format": "hardcover"}
+    }
+    assert "book_order.format='hardcover'" in model.instructions[-1]
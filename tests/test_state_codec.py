@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+from google.adk.sessions.state import State
+
+from library_agent.tools import tools
+from library_agent.tools.requirements_helper import iter_model_requirements
+from library_agent.tools.state_codec import (
+    FIELD_TAGS,
+    CompactStateCodec,
+    PlainStateCodec,
+    codec_from_name,
+    decode_state,
+    encoded_size,
+)
+
+STATE = {
+    "book_order": {
+        "patron": {"name": "Eve Rider"},
+        "title": "Fourth Wing",
+        "format": "hardcover",
+        "shipping_address": {
+            "street_line1": "1 Library Way",
+            "city": "Stack City",
+            "state_or_province": "CA",
+            "postal_code": "94016",
+            "country": "USA",
+        },
+    },
+    "card_request": {
+        "patron": {"name": "Eve Rider"},
+        "household_members": [{"name": "Toby"}, {"name": "Ana"}],
+    },
+    "last_confirmation_note": "Patron approved the order." * 4,
+}
+
+
+def test_every_state_field_has_a_unique_tag():
+    fields = {
+        part.removesuffix("[]")
+        for line in iter_model_requirements(tools.ConversationState)
+        for part in line.path.split(".")
+    }
+
+    assert fields <= set(FIELD_TAGS)
+    assert len(set(FIELD_TAGS.values())) == len(FIELD_TAGS)
+    assert not set(FIELD_TAGS.values()) & set(FIELD_TAGS)
+
+
+@pytest.mark.parametrize("name", ["plain", "compact", "compact+zlib"])
+def test_codecs_round_trip(name):
+    codec = codec_from_name(name)
+
+    encoded = codec.encode(STATE)
+
+    assert codec.decode(encoded) == STATE
+    assert decode_state(encoded) == STATE
+
+
+def test_compact_codec_is_smaller_than_plain():
+    plain = encoded_size(PlainStateCodec().encode(STATE))
+    compact = encoded_size(CompactStateCodec().encode(STATE))
+
+    assert compact < plain
+    assert CompactStateCodec().encode(STATE)["o"]["f"] == 0
+
+
+def test_budget_drops_stale_sections_first():
+    codec = CompactStateCodec(budget_bytes=260)
+
+    decoded = codec.decode(codec.encode(STATE, recent=["card_request"]))
+
+    assert "last_confirmation_note" not in decoded
+    assert "book_order" in decoded
+    assert decoded["card_request"] == STATE["card_request"]
+
+
+def test_budget_never_drops_recent_sections():
+    codec = PlainStateCodec(budget_bytes=10)
+
+    decoded = codec.decode(codec.encode(STATE, recent=["book_order"]))
+
+    assert set(decoded) == {"book_order"}
+
+
+def test_state_tool_reads_values_written_by_another_codec():
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    previous = tools.get_state_codec()
+    tools.set_state_codec(CompactStateCodec(compress=True))
+    try:
+        tools.save_conversation_state_action(
+            {"event_request": {"patron": {"name": "Jo"}, "event_type": "Reading"}},
+            ctx,
+        )
+        assert isinstance(ctx.state[tools.LIBRARY_STATE_KEY], str)
+    finally:
+        tools.set_state_codec(previous)
+
+    response = tools.save_conversation_state_action({"event_request": {"attendees": 3}}, ctx)
+
+    assert response.applied_paths == ["event_request.attendees"]
+    stored = ctx.state[tools.LIBRARY_STATE_KEY]
+    assert stored["event_request"]["event_type"] == "Reading"
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+from google.adk.sessions.state import State
+
+from library_agent.tools import tools
+from library_agent.tools.state_patch import (
+    PatchOp,
+    apply_patch,
+    diff_update,
+    touched_sections,
+)
+
+
+def test_diff_update_emits_leaf_operations_only():
+    base = {"book_order": {"shipping_address": {"postal_code": "94016", "city": "A"}}}
+    update = {"book_order": {"shipping_address": {"postal_code": "94110", "city": "A"}}}
+
+    ops = diff_update(base, update)
+
+    assert ops == [
+        PatchOp("replace", ("book_order", "shipping_address", "postal_code"), "94110")
+    ]
+    assert ops[0].pointer == "/book_order/shipping_address/postal_code"
+    assert ops[0].dotted == "book_order.shipping_address.postal_code"
+
+
+def test_diff_update_handles_add_remove_and_noop():
+    base = {"recommendation": {"mood": "cozy"}, "last_confirmation_note": "ok"}
+    update = {
+        "recommendation": {"mood": None, "favorite_genres": ["mystery"]},
+        "last_confirmation_note": "ok",
+    }
+
+    ops = diff_update(base, update)
+
+    assert PatchOp("remove", ("recommendation", "mood")) in ops
+    assert PatchOp("add", ("recommendation", "favorite_genres"), ["mystery"]) in ops
+    assert touched_sections(ops) == ["recommendation"]
+
+
+def test_apply_patch_copies_only_touched_containers():
+    untouched = {"patron": {"name": "Dev"}}
+    document = {"card_request": untouched, "event_request": {"attendees": 1}}
+    ops = [PatchOp("replace", ("event_request", "attendees"), 4)]
+
+    patched = apply_patch(document, ops)
+
+    assert patched["event_request"] == {"attendees": 4}
+    assert document["event_request"] == {"attendees": 1}
+    assert patched["card_request"] is untouched
+
+
+def test_save_conversation_state_returns_applied_paths():
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    tools.save_conversation_state_action(
+        {
+            "card_request": {"patron": {"name": "Dev"}},
+            "event_request": {"patron": {"name": "Dev"}, "event_type": "Reading"},
+        },
+        ctx,
+    )
+
+    response = tools.save_conversation_state_action(
+        {"event_request": {"attendees": 12}}, ctx
+    )
+
+    assert response.applied_paths == ["event_request.attendees"]
+    assert response.state.event_request.attendees == 12
+    assert response.state.card_request is None
+    stored = ctx.state[tools.LIBRARY_STATE_KEY]
+    assert stored["card_request"]["patron"]["name"] == "Dev"
+    assert stored["event_request"]["attendees"] == 12
+
+
+def test_save_conversation_state_clears_section_with_none():
+    ctx = SimpleNamespace(state=State(value={}, delta={}))
+    tools.save_conversation_state_action(
+        {"household_request": {"primary_card_number": "1", "new_member": {"name": "A"}}},
+        ctx,
+    )
+
+    response = tools.save_conversation_state_action({"household_request": None}, ctx)
+
+    assert response.applied_paths == ["household_request"]
+    assert "household_request" not in ctx.state[tools.LIBRARY_STATE_KEY]
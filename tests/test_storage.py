@@ -0,0 +1,118 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from library_agent.tools import storage, tools
+
+
+@pytest.fixture()
+def store(tmp_path):
+    store = storage.LibraryStore(tmp_path / "library.sqlite")
+    tools.set_store(store)
+    yield store
+    tools.set_store(None)
+    store.close()
+
+
+def test_actions_write_through_and_keep_return_types(store):
+    card = tools.issue_card_action({"patron": {"name": "Quinn"}})
+    link = tools.add_household_member_action(
+        {"primary_card_number": card.card_number, "new_member": {"name": "Toby"}}
+    )
+    event = tools.request_event_action({"patron": {"name": "Jo"}, "event_type": "Club"})
+
+    assert isinstance(card, tools.CardResponse)
+    request_json, response_json = store.fetch(storage.CARDS, card.card_number)
+    assert json.loads(request_json)["patron"]["name"] == "Quinn"
+    assert json.loads(response_json)["card_number"] == card.card_number
+    assert store.fetch(storage.HOUSEHOLD_LINKS, link.confirmation_id) is not None
+    assert store.fetch(storage.EVENTS, event.event_request_id) is not None
+
+
+def test_store_uses_wal_and_indexed_columns(store):
+    tools.request_event_action(
+        {"patron": {"name": "Jo"}, "event_type": "Reading", "attendees": 9}
+    )
+
+    connection = sqlite3.connect(store.path)
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert connection.execute(
+        "SELECT event_type, attendees, status FROM event_requests"
+    ).fetchall() == [("Reading", 9, "received")]
+
+
+def test_concurrent_writers_share_commits(store):
+    request = tools.EventRequest(patron=tools.PatronDetails(name="Jo"), event_type="Club")
+
+    def write(offset: int) -> None:
+        for index in range(50):
+            response = tools.EventResponse(
+                event_request_id=f"EVT-{offset}-{index}", status="received"
+            )
+            store.record(storage.EVENTS, request, response)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.count(storage.EVENTS) == 400
+    assert store.writer.statements == 400
+    assert store.writer.commits < 400
+
+
+def test_failed_submission_does_not_poison_its_batch(store):
+    request = tools.EventRequest(patron=tools.PatronDetails(name="Jo"), event_type="Club")
+    response = tools.EventResponse(event_request_id="EVT-1", status="received")
+    store.record(storage.EVENTS, request, response)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        store.record_many(
+            storage.EVENTS,
+            [
+                (request, tools.EventResponse(event_request_id="EVT-2", status="received")),
+                (request, response),
+            ],
+        )
+
+    assert store.fetch(storage.EVENTS, "EVT-2") is None
+    assert store.count(storage.EVENTS) == 1
+
+
+class _FailingBegin:
+    """Connection proxy whose next ``BEGIN`` raises a non-sqlite error."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.armed = True
+
+    def execute(self, sql, *params):
+        if sql == "BEGIN" and self.armed:
+            self.armed = False
+            raise RuntimeError("disk went away")
+        return self._connection.execute(sql, *params)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def test_non_sqlite_errors_fail_the_caller_and_keep_the_writer_alive(store):
+    writer = store.writer
+    sql = (
+        "INSERT INTO event_requests (event_request_id, created_at, attendees, "
+        "request_json, response_json) VALUES (?, ?, ?, '{}', '{}')"
+    )
+
+    with pytest.raises(OverflowError):
+        writer.submit([(sql, ("EVT-big", "now", 2**70))]).result(timeout=5)
+    writer._connection = _FailingBegin(writer._connection)
+    with pytest.raises(RuntimeError):
+        writer.submit([(sql, ("EVT-lost", "now", 1))]).result(timeout=5)
+    writer.submit([(sql, ("EVT-ok", "now", 1))]).result(timeout=5)
+
+    assert store.fetch(storage.EVENTS, "EVT-big") is None
+    assert store.fetch(storage.EVENTS, "EVT-lost") is None
+    assert store.fetch(storage.EVENTS, "EVT-ok") is not None
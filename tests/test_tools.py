@@ -5,7 +5,11 @@ import pytest
 
 from library_agent import agent as agent_module
 from library_agent.tools import tools
-from library_agent.tools.requirements_helper import format_requirement_section
+from library_agent.tools.requirements_helper import (
+    compile_path,
+    format_requirement_section,
+    model_schema,
+)
 from library_agent.tools.question_bank import (
     format_confirmation_checklist,
     format_question_collection,
@@ -102,6 +106,7 @@ def test_issue_card_action_accepts_dict_payload():
         tools.add_household_member,
         tools.request_library_event,
         tools.save_conversation_state,
+        tools.list_missing_fields,
     ],
 )
 def test_function_tools_generate_declarations(tool_instance):
@@ -130,6 +135,29 @@ def test_requirement_section_lists_nested_collection_fields():
     assert "household_members[].name" in text
 
 
+def test_model_schema_is_walked_once_per_class():
+    schema = model_schema(tools.CardRequest)
+
+    assert model_schema(tools.CardRequest) is schema
+    assert "household_members[].name" in schema.paths
+    assert schema.top_level == set(tools.CardRequest.model_fields)
+    assert format_requirement_section(tools.CardRequest) is format_requirement_section(
+        tools.CardRequest
+    )
+
+
+def test_field_paths_read_state_dicts():
+    section = {
+        "patron": {"contact_email": "ana@example.com"},
+        "household_members": [{"name": "Leo"}, {}],
+    }
+    members = compile_path("household_members[].name")
+
+    assert compile_path("patron.contact_email").get(section) == "ana@example.com"
+    assert members.get(section) == ["Leo", None]
+    assert members.read(section)[1] == ("household_members[1].name", None)
+
+
 def test_question_bank_renders_collection_with_prompts_and_validations():
     text = format_question_collection(
         "recommend_books",
@@ -212,16 +240,15 @@ def test_question_bank_collection_for_events():
 
 
 def test_agent_instructions_embed_confirmation_blocks_and_state_tool():
+    book_matching_instruction = agent_module.book_matching_agent.resolve().instruction(None)
+    assert "save_conversation_state" in book_matching_instruction
     assert (
-        "save_conversation_state" in agent_module.book_matching_agent.instruction
-    )
-    assert (
-        agent_module.book_recommendation_confirmation
-        in agent_module.book_matching_agent.instruction
+        agent_module.book_recommendation.confirmation_section()
+        in book_matching_instruction
     )
     assert (
-        agent_module.root_confirmation_sections
-        in agent_module.root_agent.instruction
+        agent_module.root_confirmation_sections()
+        in agent_module.root_agent.instruction(None)
     )
 
 
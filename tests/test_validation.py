@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.sessions.state import State
+from google.adk.tools import FunctionTool
+from pydantic import ValidationError
+
+from library_agent.tools import tools
+from library_agent.tools.validation import ValidatedFunctionTool, adapter_for, coerce
+
+
+def _ctx():
+    return SimpleNamespace(state=State(value={}, delta={}))
+
+
+def test_coerce_accepts_instances_dicts_and_json():
+    request = tools.CardRequest(patron=tools.PatronDetails(name="Rio"))
+
+    assert coerce(tools.CardRequest, request) is request
+    assert coerce(tools.CardRequest, {"patron": {"name": "Rio"}}) == request
+    assert coerce(tools.CardRequest, b'{"patron": {"name": "Rio"}}') == request
+    assert adapter_for(tools.CardRequest) is adapter_for(tools.CardRequest)
+    with pytest.raises(ValidationError):
+        coerce(tools.CardRequest, '{"patron": {}}')
+
+
+def test_declaration_is_built_once_and_matches_function_tool():
+    tool = tools.order_book
+
+    assert tool._get_declaration() is tool._get_declaration()
+    assert tool._get_declaration() == FunctionTool(tool.func)._get_declaration()
+
+
+def test_tool_converts_json_string_arguments():
+    response = asyncio.run(
+        tools.request_library_event.run_async(
+            args={"request": '{"patron": {"name": "Jamie"}, "event_type": "Book Club"}'},
+            tool_context=_ctx(),
+        )
+    )
+
+    assert response.event_request_id.startswith("EVT-")
+
+
+def test_missing_arguments_are_reported_like_function_tool():
+    response = asyncio.run(tools.order_book.run_async(args={}, tool_context=_ctx()))
+
+    assert "request" in response["error"]
+
+
+def test_save_validates_only_the_touched_sections():
+    ctx = _ctx()
+    tool = ValidatedFunctionTool(tools.save_conversation_state_action, raw_args=["update"])
+    assert "update" not in tool._models
+
+    response = asyncio.run(
+        tool.run_async(
+            args={"update": {"card_request": {"patron": {"name": "Ana"}}, "unknown": 1}},
+            tool_context=ctx,
+        )
+    )
+
+    assert response.applied_paths == ["card_request"]
+    assert tools.load_conversation_state(ctx.state) == {
+        "card_request": {"patron": {"name": "Ana"}, "household_members": []}
+    }
+
+
+def test_request_models_are_resolved_and_converted_before_the_action():
+    assert tools.order_book._models == {"request": tools.BookOrderRequest}
+    assert tools.issue_library_card._models == {"request": tools.CardRequest}
+    assert tools.save_conversation_state._models == {}
+
+    converted = tools.issue_library_card._preprocess_args(
+        {"request": '{"patron": {"name": "Rio"}}'}
+    )
+
+    assert converted["request"] == tools.CardRequest(patron=tools.PatronDetails(name="Rio"))